@@ -0,0 +1,62 @@
+# Prompt size and assembly time as the conversation history grows, for the context assembler
+# (rolling summary + relevant recent turns under CONTEXT_TOKEN_BUDGET) against pasting the whole
+# history into the prompt. Summaries are folded in after every command as in process_command,
+# using the extractive fallback so no Ollama server is needed. Uses a temporary database.
+# Run from the repository root: python -m benchmarks.bench_context
+import os
+import random
+import tempfile
+import time
+
+from core.memory import memory_store, init_memory_db, store_conversation, conversation_logger
+from core.context import ContextAssembler, estimate_tokens
+from utils.helpers import LLM_PERSONA_PROMPT
+
+TOPICS = ["the weather in London", "my dentist appointment", "a python sorting function", "the football score",
+          "dinner recipes", "the project deadline", "train times to Paris", "my sister's birthday"]
+CHECKPOINTS = [10, 100, 1000, 10000]
+
+
+def converse(rng, turn):
+    topic = rng.choice(TOPICS)
+    store_conversation(f"tell me about {topic} {turn}", None)
+    store_conversation(None, f"Here is what I found about {topic}, sir.")
+    store_conversation(None, f"Anything else about {topic} you would like to know?")
+
+
+def main():
+    tmp = tempfile.mkdtemp(prefix="jarvis-context-")
+    memory_store.db_path = os.path.join(tmp, "bench.db")
+    init_memory_db()
+    rng = random.Random(3)
+    assembler = ContextAssembler()
+    history_tokens = 0
+    turn = 0
+    refresh_ms = []
+    print(f"  {'turns':>6} {'naive prompt tok':>17} {'assembled tok':>14} {'assemble ms':>12} {'summary tok':>12}")
+    for checkpoint in CHECKPOINTS:
+        while turn < checkpoint:
+            converse(rng, turn)
+            turn += 1
+            conversation_logger.flush()
+            start = time.perf_counter()
+            assembler.refresh()
+            refresh_ms.append((time.perf_counter() - start) * 1000)
+        history_tokens = estimate_tokens(" ".join(f"{c} {r}" for c, r in memory_store.query(
+            "SELECT command, response FROM conversation")))
+        command = "what about the weather in London tomorrow"
+        samples = []
+        for _ in range(20):
+            start = time.perf_counter()
+            prompt, _ = assembler.build_prompt(LLM_PERSONA_PROMPT, command)
+            samples.append((time.perf_counter() - start) * 1000)
+        print(f"  {turn:6d} {history_tokens:17d} {estimate_tokens(prompt):14d} {sorted(samples)[10]:12.2f} "
+              f"{estimate_tokens(assembler.summary()['summary']):12d}")
+    print(f"  background refresh per command: median {sorted(refresh_ms)[len(refresh_ms) // 2]:.2f} ms, "
+          f"max {max(refresh_ms):.2f} ms, {assembler.stats()}")
+    print("\nprompt at the last checkpoint:\n" + prompt)
+    conversation_logger.stop()
+
+
+if __name__ == "__main__":
+    main()
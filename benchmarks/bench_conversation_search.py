@@ -0,0 +1,69 @@
+# "What did we say about X" over a large conversation table: the FTS5 index used by
+# search_conversation against the LIKE scan it falls back to without FTS5.
+# Uses a temporary database filled with synthetic command/response pairs; every topic word is
+# in about 12% of rows, a worst case for ranking, plus one rare topic from a year ago.
+# Run from the repository root: python -m benchmarks.bench_conversation_search [rows]
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+import core.memory as memory
+from core.memory import memory_store, init_memory_db, search_conversation
+
+TOPICS = ["weather", "london", "python", "reminder", "dentist", "groceries", "football", "meeting", "birthday",
+          "music", "traffic", "recipe", "laptop", "holiday", "garden", "invoice"]
+FILLER = ["sir", "today", "certainly", "the", "latest", "report", "shows", "nothing", "unusual", "again", "please",
+          "noted", "schedule", "update", "morning", "evening", "system", "check"]
+QUERIES = ["dentist", "weather in london", "python recipe", "kilimanjaro", "zebra"]
+
+
+def seed(rows):
+    rng = random.Random(7)
+    start = datetime.datetime.now() - datetime.timedelta(days=365)
+    # A rare topic from a year ago, which the LIKE scan only finds after reading the whole table
+    batch = [("plan the kilimanjaro trip", "Kilimanjaro is best climbed in the dry season, sir.",
+              start.isoformat())] * 3
+    for i in range(rows):
+        words = rng.sample(FILLER, 8) + rng.sample(TOPICS, 2)
+        rng.shuffle(words)
+        batch.append((" ".join(words[:4]), " ".join(words).capitalize() + ".",
+                      (start + datetime.timedelta(seconds=i * 60)).isoformat()))
+        if len(batch) == 10000:
+            memory_store.executemany("INSERT INTO conversation (command, response, timestamp) VALUES (?, ?, ?)", batch)
+            batch = []
+    if batch:
+        memory_store.executemany("INSERT INTO conversation (command, response, timestamp) VALUES (?, ?, ?)", batch)
+
+
+def timed(fts, query, offset=0, repeats=5):
+    memory.fts_enabled = fts
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        results, has_more = search_conversation(query, limit=3, offset=offset)
+        samples.append((time.perf_counter() - start) * 1000)
+    return sorted(samples)[len(samples) // 2], len(results), has_more
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    tmp = tempfile.mkdtemp(prefix="jarvis-search-")
+    memory_store.db_path = os.path.join(tmp, "bench.db")
+    init_memory_db()
+    start = time.perf_counter()
+    seed(rows)
+    print(f"{rows} conversation rows indexed through the triggers in {time.perf_counter() - start:.1f} s")
+    print(f"  {'query':22} {'FTS5 ms':>9} {'LIKE ms':>9}")
+    for query in QUERIES:
+        fts_ms, fts_found, _ = timed(True, query)
+        like_ms, like_found, _ = timed(False, query)
+        print(f"  {query!r:22} {fts_ms:9.2f} {like_ms:9.2f}   results {fts_found} / {like_found}")
+    fts_ms, found, has_more = timed(True, "dentist", offset=300)
+    print(f"  'dentist' page 101 (offset 300): FTS5 {fts_ms:.2f} ms, {found} results, more: {has_more}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# Routes a command corpus through the legacy if/elif chain and the compiled IntentRouter,
+# reporting commands/sec and every command the two disagree on. The router is still about
+# 2-3x slower than the chain (a few microseconds per command against speech recognition's
+# hundreds of milliseconds); it is there for correct routing, not speed.
+# Run from the repository root: python -m benchmarks.bench_intents [corpus.txt]
+# (one recorded command per line; a synthetic corpus is generated when no file is given)
+import random
+import sys
+import time
+from collections import Counter
+
+from utils.helpers import router
+
+TEMPLATES = [
+    "open youtube", "launch google", "search for {thing}", "look up {thing}", "find {thing}",
+    "what time is it", "current time", "what's the date", "open notepad", "open calculator",
+    "what's the weather", "weather in {city}", "what is the weather for {city}", "weather this evening",
+    "set my preferred weather city to {city}", "system shutdown", "restart computer", "power down",
+    "quit", "status report", "help", "what can you do", "thank you", "good morning", "good evening",
+    "good night", "what did we talk about", "remember that my {thing} is {value}",
+    "remember that the meeting time is {value}", "what is my {thing}", "tell me about {thing}",
+    "add {thing} to my {list} list", "remove {thing} from my {list} list", "what's on my {list} list",
+    "remind me to {task} at 2025-07-12T17:00", "remind me to check the weather at 2025-07-12T08:00",
+    "what do you know about me", "forget my {thing}", "write a python function to {task}",
+    "generate a sorting algorithm", "code for {task}", "why is the sky blue", "tell a joke",
+    "how far away is the moon", "who won the game last night",
+]
+FILLERS = {
+    "thing": ["keys", "car", "birthday date", "wifi password", "favourite song", "doctor"],
+    "value": ["blue", "on the table", "friday", "5 pm", "42"],
+    "city": ["london", "new york", "heraklion", "paris", "toronto"],
+    "list": ["shopping", "todo", "reading"],
+    "task": ["call mom", "sort a list", "water the plants", "update the calendar"],
+}
+
+
+def legacy_route(command):
+    if "open youtube" in command or "launch youtube" in command:
+        return "open_youtube"
+    elif "open google" in command or "launch google" in command:
+        return "open_google"
+    elif "search for" in command or "look up" in command or "find" in command:
+        return "search"
+    elif "what time is it" in command or "current time" in command or "time" in command:
+        return "time"
+    elif "what's the date" in command or "current date" in command or "date" in command:
+        return "date"
+    elif "open notepad" in command or "text editor" in command or "open editor" in command:
+        return "text_editor"
+    elif "open calculator" in command or "calculator" in command:
+        return "calculator"
+    elif "weather" in command:
+        return "weather"
+    elif "set my preferred" in command:
+        return "set_preference"
+    elif "system shutdown" in command or "shutdown computer" in command:
+        return "shutdown_computer"
+    elif "restart system" in command or "restart computer" in command:
+        return "restart_computer"
+    elif "power down" in command or "shut down jarvis" in command:
+        return "power_down"
+    elif "exit" in command or "quit" in command:
+        return "exit"
+    elif "status report" in command or "system status" in command:
+        return "status_report"
+    elif "help" in command or "what can you do" in command:
+        return "help"
+    elif "thank you" in command or "thanks" in command:
+        return "thanks"
+    elif "good morning" in command:
+        return "good_morning"
+    elif "good evening" in command:
+        return "good_evening"
+    elif "good night" in command:
+        return "good_night"
+    elif "what did we talk about" in command:
+        return "conversation_history"
+    elif "remember that" in command:
+        return "remember_that"
+    elif command.startswith("what is") or command.startswith("tell me about"):
+        return "what_is"
+    elif "add" in command and "to my" in command:
+        return "add_to_list"
+    elif "remove" in command and "from my" in command:
+        return "remove_from_list"
+    elif command.startswith("what's on my"):
+        return "read_list"
+    elif "remind me to" in command:
+        return "remind_me"
+    elif "what do you know about me" in command:
+        return "list_memories"
+    elif "forget" in command:
+        return "forget"
+    elif command.startswith("write a") or command.startswith("generate a") or command.startswith("code for"):
+        return "generate_code"
+    return None
+
+
+def router_route(command):
+    intent, _ = router.match(command)
+    return intent.name if intent else None
+
+
+def synthetic_corpus(size, seed=7):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        template = rng.choice(TEMPLATES)
+        corpus.append(template.format(**{k: rng.choice(v) for k, v in FILLERS.items()}))
+    return corpus
+
+
+def throughput(route, corpus):
+    start = time.perf_counter()
+    for command in corpus:
+        route(command)
+    return len(corpus) / (time.perf_counter() - start)
+
+
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding="utf-8") as f:
+            corpus = [line.strip().lower() for line in f if line.strip()]
+    else:
+        corpus = synthetic_corpus(50000)
+    router.compile()
+
+    legacy_rate = throughput(legacy_route, corpus)
+    router_rate = throughput(router_route, corpus)
+    matched = [(router.match(command)[0], command) for command in corpus]
+    start = time.perf_counter()
+    for intent, command in matched:
+        if intent is not None:
+            intent.extract(command)
+    extract_us = (time.perf_counter() - start) / len(corpus) * 1e6
+    print(f"corpus size: {len(corpus)}")
+    print(f"legacy chain: {legacy_rate:>12.0f} commands/s ({1e6 / legacy_rate:.2f} us/command)")
+    print(f"intent router:{router_rate:>12.0f} commands/s ({1e6 / router_rate:.2f} us/command, "
+          f"{extract_us:.2f} of it slot extraction, which the legacy chain left to the handlers)")
+
+    diffs = Counter()
+    examples = {}
+    for command in corpus:
+        before, after = legacy_route(command), router_route(command)
+        if before != after:
+            diffs[(before, after)] += 1
+            examples.setdefault((before, after), command)
+    changed = sum(diffs.values())
+    print(f"routing differences: {changed} ({changed / len(corpus):.1%})")
+    for (before, after), count in diffs.most_common():
+        print(f"  {str(before):<18} -> {str(after):<18} x{count:<6} e.g. {examples[(before, after)]!r}")
+
+
+if __name__ == "__main__":
+    main()
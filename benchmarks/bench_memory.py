@@ -0,0 +1,108 @@
+# Micro-benchmark: per-call sqlite3.connect (legacy) vs the pooled MemoryStore.
+# Run from the repository root: python -m benchmarks.bench_memory
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+import json
+
+from core.memory import MemoryStore, MemoryCache, _MISSING
+
+OPS = 2000
+
+
+def legacy_store_memory(db_path, key, value):
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute("INSERT OR REPLACE INTO memory (key, value) VALUES (?, ?)", (key, value))
+    conn.commit()
+    conn.close()
+
+
+def legacy_retrieve_memory(db_path, key):
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute("SELECT value FROM memory WHERE key = ?", (key,))
+    result = c.fetchone()
+    conn.close()
+    return result[0] if result else None
+
+
+def legacy_store_conversation(db_path, command, response):
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute("INSERT INTO conversation (command, response, timestamp) VALUES (?, ?, ?)",
+              (command, response, datetime.now().isoformat()))
+    conn.commit()
+    conn.close()
+
+
+def create_schema(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE IF NOT EXISTS memory (key TEXT PRIMARY KEY, value TEXT)")
+    conn.execute("CREATE TABLE IF NOT EXISTS conversation "
+                 "(id INTEGER PRIMARY KEY AUTOINCREMENT, command TEXT, response TEXT, timestamp TEXT)")
+    conn.commit()
+    conn.close()
+
+
+def timed(fn, ops):
+    start = time.perf_counter()
+    for i in range(ops):
+        fn(i)
+    return ops / (time.perf_counter() - start)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_db = os.path.join(tmp, "legacy.db")
+        pooled_db = os.path.join(tmp, "pooled.db")
+        create_schema(legacy_db)
+        create_schema(pooled_db)
+        store = MemoryStore(pooled_db)
+
+        cases = [
+            ("store_memory",
+             lambda i: legacy_store_memory(legacy_db, f"key{i % 50}", "value"),
+             lambda i: store.execute("INSERT OR REPLACE INTO memory (key, value) VALUES (?, ?)",
+                                     (f"key{i % 50}", "value"))),
+            ("retrieve_memory",
+             lambda i: legacy_retrieve_memory(legacy_db, f"key{i % 50}"),
+             lambda i: store.query_one("SELECT value FROM memory WHERE key = ?", (f"key{i % 50}",))),
+            ("store_conversation",
+             lambda i: legacy_store_conversation(legacy_db, None, "Sentence spoken by JARVIS."),
+             lambda i: store.execute("INSERT INTO conversation (command, response, timestamp) VALUES (?, ?, ?)",
+                                     (None, "Sentence spoken by JARVIS.", datetime.now().isoformat()))),
+        ]
+        print(f"{'operation':<22}{'legacy ops/s':>15}{'pooled ops/s':>15}{'speedup':>10}")
+        for name, legacy, pooled in cases:
+            before = timed(legacy, OPS)
+            after = timed(pooled, OPS)
+            print(f"{name:<22}{before:>15.0f}{after:>15.0f}{after / before:>9.1f}x")
+
+        store.execute("INSERT OR REPLACE INTO memory (key, value) VALUES (?, ?)",
+                      ("preference_weather_city", json.dumps({"type": "preference", "value": "Heraklion"})))
+        cache = MemoryCache()
+
+        def uncached(i):
+            row = store.query_one("SELECT value FROM memory WHERE key = ?", ("preference_weather_city",))
+            return json.loads(row[0])["value"]
+
+        def cached(i):
+            value = cache.get("preference_weather_city")
+            if value is _MISSING:
+                value = uncached(i)
+                cache.put("preference_weather_city", value)
+            return value
+
+        before = timed(uncached, OPS * 10)
+        after = timed(cached, OPS * 10)
+        print(f"{'get_preference':<22}{before:>15.0f}{after:>15.0f}{after / before:>9.1f}x  (pooled vs cached)")
+        print(f"cache stats: {cache.stats()}")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Startup cost of loading reminders from a database holding 10k of them (most already fired),
+# comparing the legacy "one job per stored future reminder" loader with load_reminders, which
+# schedules only the pending reminders inside REMINDER_WINDOW_S. Also checks that restarting
+# twice neither duplicates rows nor jobs. Uses a temporary database.
+# Run from the repository root: python -m benchmarks.bench_reminders [count]
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from core.memory import memory_store, init_memory_db, get_reminders, add_reminder_entry
+from core.scheduler import scheduler, load_reminders, start_scheduler
+
+
+def seed(count):
+    # A year of history: 90% fired in the past, the rest spread over the next 60 days
+    now = datetime.datetime.now()
+    past = int(count * 0.9)
+    rows = []
+    for i in range(count):
+        if i < past:
+            fire_at = now - datetime.timedelta(minutes=10 + i * 50)
+            rows.append((f"task {i}", fire_at.isoformat(), now.isoformat(), "fired"))
+        else:
+            fire_at = now + datetime.timedelta(minutes=(i - past + 1) * 60 * 24 * 60 // (count - past))
+            rows.append((f"task {i}", fire_at.isoformat(), now.isoformat(), "pending"))
+    memory_store.executemany("INSERT INTO reminders (task, fire_at, created_at, status) VALUES (?, ?, ?, ?)", rows)
+
+
+def legacy_load(legacy_scheduler):
+    # The old loader: scan every reminder, schedule each future one as its own job
+    now = datetime.datetime.now()
+    for reminder in get_reminders():
+        reminder_time = datetime.datetime.fromisoformat(reminder["time"])
+        if reminder_time > now:
+            legacy_scheduler.add_job(lambda: None, 'date', run_date=reminder_time)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    tmp = tempfile.mkdtemp(prefix="jarvis-reminders-")
+    memory_store.db_path = os.path.join(tmp, "bench.db")
+    init_memory_db()
+    start_scheduler()
+    seed(count)
+    print(f"{count} stored reminders, {len(get_reminders())} rows")
+
+    legacy_scheduler = BackgroundScheduler()
+    legacy_scheduler.start()
+    start = time.perf_counter()
+    legacy_load(legacy_scheduler)
+    print(f"  legacy loader:   {(time.perf_counter() - start) * 1000:8.1f} ms, "
+          f"{len(legacy_scheduler.get_jobs())} jobs")
+    legacy_scheduler.shutdown(wait=False)
+
+    for restart in range(2):
+        start = time.perf_counter()
+        load_reminders()
+        elapsed = (time.perf_counter() - start) * 1000
+        jobs = [job for job in scheduler.get_jobs() if job.id.startswith("reminder-")]
+        print(f"  load_reminders:  {elapsed:8.1f} ms, {len(jobs)} jobs (restart {restart + 1})")
+
+    # Storing the same reminder again keeps one row
+    first = get_reminders()[0]
+    add_reminder_entry(first["task"], first["time"])
+    print(f"  rows after re-adding an existing reminder: {len(get_reminders())}")
+    plan = memory_store.query("EXPLAIN QUERY PLAN SELECT id, task, fire_at FROM reminders "
+                              "WHERE status = 'pending' AND fire_at > ? AND fire_at < ?", ("a", "b"))
+    print(f"  pending query plan: {plan[0][-1]}")
+    scheduler.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# How long the voice loop is held by a remote command: the legacy blocking call (plus the
+# 2 s pause before shutdown) against submitting to RemoteExecutor and carrying on.
+# Uses benchmarks/fake_ssh.py with a simulated handshake and a slow remote command.
+# Run from the repository root: python -m benchmarks.bench_remote_jobs
+import os
+import tempfile
+import time
+
+from core.event_loop import event_loop
+from services.system import RemoteShell, RemoteExecutor, execute_remote, _shells
+
+FAKE_SSH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_ssh.py")
+
+
+def main():
+    os.environ.setdefault("FAKE_SSH_HANDSHAKE_S", "0.15")
+    with tempfile.TemporaryDirectory() as tmp:
+        shell = RemoteShell("jarvis", "main-pc", ssh_binary=FAKE_SSH, control_dir=os.path.join(tmp, "cm"))
+        _shells[("jarvis", "main-pc")] = shell
+        argv = ["sleep", "0.5"]
+        event_loop.start()
+
+        start = time.perf_counter()
+        time.sleep(2)
+        execute_remote(argv, "jarvis", "main-pc")
+        print(f"legacy shutdown handler:  loop blocked {(time.perf_counter() - start) * 1000:7.1f} ms")
+
+        announced = []
+        executor = RemoteExecutor(announce=announced.append, max_concurrent=2)
+        start = time.perf_counter()
+        for i in range(4):
+            executor.submit(f"job {i}", execute_remote, argv, "jarvis", "main-pc", success=f"job {i} done")
+        blocked = time.perf_counter() - start
+        print(f"executor, 4 commands:     loop blocked {blocked * 1000:7.3f} ms, "
+              f"in flight {len(executor.jobs(active_only=True))}")
+        executor.wait_idle(30)
+        print(f"  all finished after {(time.perf_counter() - start) * 1000:7.1f} ms with 2 slots, "
+              f"announced {announced}")
+
+        slow = RemoteExecutor(timeout=0.2)
+        slow.submit("hung", execute_remote, ["sleep", "5"], "jarvis", "main-pc")
+        slow.wait_idle(10)
+        print(f"  timeout: {slow.jobs()[-1]['status']} after {slow.jobs()[-1]['seconds']} s")
+        shell.close()
+        event_loop.stop()
+
+
+if __name__ == "__main__":
+    main()
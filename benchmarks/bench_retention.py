@@ -0,0 +1,76 @@
+# Runs the retention job over a year of synthetic history in a database created before
+# auto_vacuum was enabled, while another thread keeps writing conversation rows the way the
+# voice loop does, and reports rows pruned, bytes reclaimed and the worst writer stall: by
+# default the old file is left in its mode, then converted once with RETENTION_CONVERT_AUTO_VACUUM,
+# then compacted incrementally. Uses a temporary database.
+# Run from the repository root: python -m benchmarks.bench_retention [rows]
+import datetime
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+import core.retention as retention
+from core.memory import memory_store, init_memory_db, store_conversation, conversation_logger
+from core.retention import compact
+
+
+def seed_legacy_db(path, rows):
+    # Plain sqlite3 connection, so the file starts with auto_vacuum off like an old jarvis_memory.db
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE conversation (id INTEGER PRIMARY KEY AUTOINCREMENT, command TEXT, response TEXT, "
+                 "timestamp TEXT)")
+    now = datetime.datetime.now()
+    step = datetime.timedelta(days=365) / rows
+    conn.executemany("INSERT INTO conversation (command, response, timestamp) VALUES (?, ?, ?)",
+                     ((f"command {i}", "A response sentence of typical length, spoken back by JARVIS. " * 2,
+                       (now - datetime.timedelta(days=365) + step * i).isoformat()) for i in range(rows)))
+    conn.commit()
+    conn.close()
+
+
+def writer(stop, stalls):
+    while not stop.is_set():
+        start = time.perf_counter()
+        store_conversation("what time is it", "The current time is 10:00 AM, sir.")
+        conversation_logger.flush()
+        stalls.append(time.perf_counter() - start)
+        time.sleep(0.02)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    tmp = tempfile.mkdtemp(prefix="jarvis-retention-")
+    path = os.path.join(tmp, "bench.db")
+    seed_legacy_db(path, rows)
+    memory_store.db_path = path
+    init_memory_db()
+    size = memory_store.size_bytes()
+    print(f"{rows} conversation rows over a year, database {size / 1e6:.1f} MB")
+
+    old = datetime.datetime.now() - datetime.timedelta(days=200)
+    runs = [("default (old file left as is)", False), ("opt-in conversion", True), ("incremental only", False)]
+    for label, convert in runs:
+        retention.RETENTION_CONVERT_AUTO_VACUUM = convert
+        stop = threading.Event()
+        stalls = []
+        thread = threading.Thread(target=writer, args=(stop, stalls))
+        thread.start()
+        report = compact()
+        stop.set()
+        thread.join()
+        print(f"  {label}: {report}")
+        print(f"    concurrent writes: {len(stalls)}, worst {max(stalls) * 1000:.1f} ms, "
+              f"median {sorted(stalls)[len(stalls) // 2] * 1000:.2f} ms")
+        # More expired history for the next run to prune
+        memory_store.executemany("INSERT INTO conversation (command, response, timestamp) VALUES (?, ?, ?)",
+                                 [("old", "x" * 200, old.isoformat())] * 20000)
+    print(f"  database now {memory_store.size_bytes() / 1e6:.1f} MB, "
+          f"{memory_store.query_one('SELECT COUNT(*) FROM conversation')[0]} rows")
+    conversation_logger.stop()
+
+
+if __name__ == "__main__":
+    main()
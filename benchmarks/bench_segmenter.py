@@ -0,0 +1,89 @@
+# Feeds long synthetic LLM streams token by token through the legacy find()-based splitting
+# loop and the incremental SentenceSegmenter, reporting throughput and total splitting time.
+# Run from the repository root: python -m benchmarks.bench_segmenter [stream_chars]
+import random
+import sys
+import time
+
+from core.segmenter import SentenceSegmenter
+
+SENTENCES = [
+    "The quick brown fox jumps over the lazy dog.", "Dr. Smith measured 3.75 litres, i.e. a lot.",
+    "Is that really true?", "Yes!", "Prices rose by 2.5 percent in the U.S. last year.",
+    "We compared several options, e.g. caching, batching and prefetching, before deciding.",
+    "Here is a longer sentence that keeps going with commas, clauses and asides, "
+    "because language models like to ramble on when they explain things.",
+]
+CODE = "```python\ndef area(r):\n    return 3.14159 * r * r\n\nprint(area(2.0))\n```\n"
+
+
+def synthetic_stream(chars, with_punctuation=True, seed=11):
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    while total < chars:
+        if with_punctuation:
+            part = CODE if rng.random() < 0.05 else rng.choice(SENTENCES) + " "
+        else:
+            # A run-on stream with no sentence punctuation at all
+            part = "word " * rng.randint(5, 20)
+        parts.append(part)
+        total += len(part)
+    text = "".join(parts)[:chars]
+    tokens = []
+    i = 0
+    while i < len(text):
+        step = rng.randint(1, 6)
+        tokens.append(text[i:i + step])
+        i += step
+    return tokens
+
+
+def legacy_split(tokens):
+    sentences = []
+    buffer = ""
+    for token in tokens:
+        buffer += token
+        while '.' in buffer or '!' in buffer or '?' in buffer:
+            end_idx = min(
+                buffer.find('.') if '.' in buffer else len(buffer),
+                buffer.find('!') if '!' in buffer else len(buffer),
+                buffer.find('?') if '?' in buffer else len(buffer)
+            )
+            if end_idx < len(buffer):
+                sentences.append(buffer[:end_idx + 1].strip())
+                buffer = buffer[end_idx + 1:].strip()
+    if buffer:
+        sentences.append(buffer.strip())
+    return sentences
+
+
+def segmenter_split(tokens):
+    segmenter = SentenceSegmenter()
+    sentences = []
+    for token in tokens:
+        sentences.extend(segmenter.feed(token))
+    sentences.extend(segmenter.flush())
+    return sentences
+
+
+def run(label, split, tokens, chars):
+    start = time.perf_counter()
+    sentences = split(tokens)
+    elapsed = time.perf_counter() - start
+    longest = max((len(s) for s in sentences), default=0)
+    print(f"  {label:<10} {elapsed * 1000:>9.1f} ms  {chars / elapsed / 1e6:>7.2f} Mchar/s  "
+          f"{len(sentences):>7} chunks  longest {longest}")
+
+
+def main():
+    chars = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    for label, with_punctuation in (("prose with code", True), ("no punctuation", False)):
+        tokens = synthetic_stream(chars, with_punctuation)
+        print(f"{label}: {chars} chars in {len(tokens)} tokens")
+        run("legacy", legacy_split, tokens, chars)
+        run("segmenter", segmenter_split, tokens, chars)
+
+
+if __name__ == "__main__":
+    main()
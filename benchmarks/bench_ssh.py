@@ -0,0 +1,79 @@
+# Times the "open notepad" flow (probe gedit, probe nano, launch) with the legacy per-call
+# `ssh user@ip '...'` via shell=True against RemoteShell's multiplexed connection and probe cache.
+# Uses benchmarks/fake_ssh.py, which sleeps FAKE_SSH_HANDSHAKE_S for every new connection.
+# Run from the repository root: python -m benchmarks.bench_ssh [rounds]
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from services.system import RemoteShell
+
+FAKE_SSH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_ssh.py")
+
+
+def legacy_run(command, user, ip):
+    ssh_command = f"{FAKE_SSH} {user}@{ip} '{command}'"
+    try:
+        result = subprocess.run(ssh_command, shell=True, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        return result.stdout.decode()
+    except subprocess.CalledProcessError:
+        return None
+
+
+def legacy_open_editor():
+    if legacy_run("which gedit", "jarvis", "main-pc"):
+        legacy_run("gedit &", "jarvis", "main-pc")
+    elif legacy_run("which nano", "jarvis", "main-pc"):
+        legacy_run("nano &", "jarvis", "main-pc")
+
+
+def shell_open_editor(shell):
+    editor = shell.first_available("gedit", "nano")
+    if editor:
+        shell.run([editor], background=True)
+
+
+def timed(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with tempfile.TemporaryDirectory() as tmp:
+        # The fake remote host has nano installed but not gedit
+        bin_dir = os.path.join(tmp, "bin")
+        os.makedirs(bin_dir)
+        stub = os.path.join(bin_dir, "nano")
+        with open(stub, "w") as f:
+            f.write("#!/bin/sh\nexit 0\n")
+        os.chmod(stub, 0o755)
+        os.environ["FAKE_SSH_PATH"] = bin_dir
+        handshake = float(os.environ.setdefault("FAKE_SSH_HANDSHAKE_S", "0.15"))
+        print(f"simulated ssh handshake {handshake * 1000:.0f} ms, {rounds} x 'open notepad'")
+
+        samples = timed(legacy_open_editor, rounds)
+        print(f"  legacy ssh per call:  first {samples[0]:7.1f} ms, avg {sum(samples) / len(samples):7.1f} ms "
+              f"(3 ssh processes per command)")
+
+        shell = RemoteShell("jarvis", "main-pc", ssh_binary=FAKE_SSH, control_dir=os.path.join(tmp, "cm"))
+        samples = timed(lambda: shell_open_editor(shell), rounds)
+        print(f"  multiplexed + cached: first {samples[0]:7.1f} ms, avg {sum(samples) / len(samples):7.1f} ms "
+              f"({shell.calls / rounds:.1f} ssh processes per command)")
+        shell.close()
+
+        # Arguments reach the remote side as data, not shell syntax
+        hostile = "x'; touch injected; echo '"
+        result = shell.run(["echo", hostile])
+        print(f"  argument quoting:     echo returned {result.stdout.decode().strip()!r}, "
+              f"injected file created: {os.path.exists('injected')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# Startup time: how long `import main` takes and which heavy modules it loads, then per-phase
+# timings of main.initialize() against running the same phases one after another as main()
+# used to. Ollama is a local HTTP stand-in with a fixed delay per request, the microphone probe
+# is replaced by a sleep the length of its noise calibration, and the database is temporary.
+# Run from the repository root: python -m benchmarks.bench_startup
+import functools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+OLLAMA_LATENCY_S = 0.3
+MIC_PROBE_S = 0.5
+HEAVY_MODULES = ["edge_tts", "aiohttp", "speech_recognition", "numpy", "apscheduler", "requests"]
+
+
+class OllamaStandIn(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(OLLAMA_LATENCY_S)
+        self.reply({"models": [{"name": "phi:latest"}]})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        # Warm-up: loading the model
+        time.sleep(OLLAMA_LATENCY_S * 5)
+        self.reply({"done": True})
+
+    def reply(self, body):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def measure_import():
+    code = ("import sys, time; start = time.perf_counter(); import main; "
+            "print(round(time.perf_counter() - start, 3)); "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.split("\n")
+    return float(out[0]), out[1]
+
+
+def probe_microphone():
+    # find_working_microphone calibrates every candidate for 0.5 s
+    time.sleep(MIC_PROBE_S)
+    return -1
+
+
+def main():
+    seconds, loaded = measure_import()
+    print(f"import main: {seconds * 1000:.0f} ms, heavy modules loaded: {loaded or 'none'}")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OllamaStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    import main as jarvis
+    from core.memory import memory_store
+    from core.phi2 import Phi2Service
+    memory_store.db_path = os.path.join(tempfile.mkdtemp(prefix="jarvis-startup-"), "bench.db")
+    jarvis.Phi2Service = functools.partial(Phi2Service, base_url=f"http://127.0.0.1:{server.server_port}")
+    jarvis.find_working_microphone = probe_microphone
+    # The morning briefing would start a weather fetch and a synthesis unrelated to startup cost
+    jarvis.BRIEFING_ENABLED = False
+    print(f"stand-ins: Ollama {OLLAMA_LATENCY_S * 1000:.0f} ms per request, microphone probe {MIC_PROBE_S * 1000:.0f} ms")
+
+    start = time.perf_counter()
+    jarvis.timed_phase("memory", jarvis.init_memory)
+    llm = jarvis.timed_phase("llm", jarvis.init_llm)
+    jarvis.timed_phase("microphone", jarvis.init_microphone)
+    serial = time.perf_counter() - start
+    llm.warm_up_future.result()
+    print(f"  one after another: ready after {serial * 1000:6.0f} ms  {jarvis.startup_timings}")
+
+    jarvis.startup_timings.clear()
+    start = time.perf_counter()
+    mic_index, llm = jarvis.initialize(prewarm=False)
+    ready = time.perf_counter() - start
+    service = llm.result()
+    llm_ready = time.perf_counter() - start
+    service.warm_up_future.result()
+    warm = time.perf_counter() - start
+    print(f"  initialize():      ready after {ready * 1000:6.0f} ms  {jarvis.startup_timings}")
+    print(f"    LLM service available at {llm_ready * 1000:.0f} ms, model warm at {warm * 1000:.0f} ms "
+          f"(in the background)")
+    jarvis.scheduler.shutdown(wait=False)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# Compares the legacy two-request get_weather with the cached WeatherClient against a local
+# HTTP stand-in for Open-Meteo that adds a fixed delay to every response, and checks the
+# client's behaviour against it: stale-while-revalidate, request coalescing, error fallback
+# and prefetch. A failed check raises AssertionError.
+# Run from the repository root: python -m benchmarks.bench_weather
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+from core.memory import memory_store, init_memory_db
+import services.weather
+from services.weather import WeatherClient, describe_weather, get_weather
+
+LATENCY_S = 0.08
+CITIES = {"london": (51.507, -0.128), "heraklion": (35.339, 25.144), "paris": (48.853, 2.349)}
+
+
+class OpenMeteoStandIn(BaseHTTPRequestHandler):
+    calls = {"geocode": 0, "forecast": 0}
+    lock = threading.Lock()
+    # Every forecast is a tenth of a degree warmer than the last, so a stale answer can be told apart
+    temperature = 21.5
+    failing = False
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        time.sleep(LATENCY_S)
+        if self.failing:
+            self.send_error(503)
+            return
+        if url.path == "/v1/search":
+            kind = "geocode"
+            name = query.get("name", [""])[0].lower()
+            body = {"results": [{"name": name.title(), "latitude": CITIES[name][0],
+                                 "longitude": CITIES[name][1]}]} if name in CITIES else {}
+        else:
+            kind = "forecast"
+        with self.lock:
+            self.calls[kind] += 1
+            if kind == "forecast":
+                OpenMeteoStandIn.temperature = round(OpenMeteoStandIn.temperature + 0.1, 1)
+                body = {"current_weather": {"temperature": OpenMeteoStandIn.temperature, "weathercode": 2}}
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def legacy_get_weather(city, base):
+    response = requests.get(f"{base}/v1/search?name={city}", timeout=10)
+    data = response.json()
+    latitude = data["results"][0]["latitude"]
+    longitude = data["results"][0]["longitude"]
+    response = requests.get(f"{base}/v1/forecast?latitude={latitude}&longitude={longitude}&current_weather=true",
+                            timeout=10)
+    return describe_weather(city, response.json()["current_weather"])
+
+
+def reset_calls():
+    calls = dict(OpenMeteoStandIn.calls)
+    for kind in OpenMeteoStandIn.calls:
+        OpenMeteoStandIn.calls[kind] = 0
+    return calls
+
+
+def timed_calls(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summary(samples):
+    return f"first {samples[0]:7.1f} ms, then avg {sum(samples[1:]) / max(1, len(samples) - 1):7.2f} ms"
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OpenMeteoStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    tmp = tempfile.mkdtemp(prefix="jarvis-weather-")
+    memory_store.db_path = os.path.join(tmp, "bench.db")
+    init_memory_db()
+    repeats = 20
+    print(f"stand-in latency {LATENCY_S * 1000:.0f} ms per request, {repeats} repeated 'weather in london'")
+
+    samples = timed_calls(lambda: legacy_get_weather("london", base), repeats)
+    print(f"  legacy:          {summary(samples)}  server calls {reset_calls()}")
+
+    client = WeatherClient(f"{base}/v1/search", f"{base}/v1/forecast", ttl_s=600, stale_s=3600)
+    samples = timed_calls(lambda: describe_weather("london", client.current("london")), repeats)
+    print(f"  weather client:  {summary(samples)}  server calls {reset_calls()}")
+
+    # A new client (as after a restart) still finds the geocode in the memory DB
+    restarted = WeatherClient(f"{base}/v1/search", f"{base}/v1/forecast")
+    samples = timed_calls(lambda: restarted.current("london"), 1)
+    print(f"  after restart:   first {samples[0]:7.1f} ms  server calls {reset_calls()}")
+
+    # Stale-while-revalidate: past the TTL the old forecast is served while a refresh runs
+    stale = WeatherClient(f"{base}/v1/search", f"{base}/v1/forecast", ttl_s=0.05, stale_s=3600)
+    first = stale.current("heraklion")
+    time.sleep(0.1)
+    served = []
+    samples = timed_calls(lambda: served.append(stale.current("heraklion")), 1)
+    time.sleep(LATENCY_S * 3)
+    print(f"  stale serve:     {samples[0]:7.2f} ms  server calls {reset_calls()}  {stale.stats()}")
+    assert served[0] == first, "a stale forecast should be served as is"
+    assert samples[0] < LATENCY_S * 1000 / 2, "a stale forecast should not wait for the refresh"
+    assert stale.stats()["stale"] == 1
+    refreshed = stale._forecasts[(35.339, 25.144)][1]
+    assert refreshed["temperature"] > first["temperature"], "the background refresh should replace the stale value"
+
+    # Ten concurrent requests for a cold city share a single forecast fetch
+    cold = WeatherClient(f"{base}/v1/search", f"{base}/v1/forecast")
+    cold.geocode("paris")
+    reset_calls()
+    with ThreadPoolExecutor(10) as pool:
+        answers = list(pool.map(lambda _: cold.current("paris"), range(10)))
+    calls = reset_calls()
+    print(f"  10 concurrent:   server calls {calls}  {cold.stats()}")
+    assert calls["forecast"] == 1, "concurrent requests should share one forecast fetch"
+    assert all(answer == answers[0] for answer in answers)
+
+    # Errors: a failed refresh keeps serving the stale forecast, a failed miss and an unknown
+    # city get their spoken fallbacks
+    OpenMeteoStandIn.failing = True
+    time.sleep(0.1)
+    assert stale.current("heraklion") == refreshed, "a failed refresh should keep the stale forecast"
+    time.sleep(LATENCY_S * 3)
+    assert stale.current("heraklion") == refreshed
+    services.weather.weather_client = WeatherClient(f"{base}/v1/search", f"{base}/v1/forecast")
+    assert get_weather("london") == "Sorry, I couldn't fetch the weather."
+    OpenMeteoStandIn.failing = False
+    assert get_weather("atlantis") == "Sorry, I couldn't find weather information for atlantis."
+    assert get_weather("london").startswith("The weather in london is partly cloudy")
+    print(f"  errors:          fallbacks as expected  server calls {reset_calls()}")
+
+    # Prefetch warms the caches in the background; the next command is answered without a request
+    warm = WeatherClient(f"{base}/v1/search", f"{base}/v1/forecast")
+    warm.prefetch("paris").result()
+    reset_calls()
+    samples = timed_calls(lambda: warm.current("paris"), 1)
+    calls = reset_calls()
+    print(f"  after prefetch:  {samples[0]:7.2f} ms  server calls {calls}")
+    assert calls == {"geocode": 0, "forecast": 0}, "a prefetched city should be answered from cache"
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
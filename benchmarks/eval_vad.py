@@ -0,0 +1,172 @@
+# Runs the wake-word voice-activity gate over a corpus of WAV clips, reports how many clips it
+# would forward to the remote recognizer and how many wake words it would miss, and fails with
+# AssertionError when the missed-wake or false-trigger rate exceeds its limit below.
+# Run from the repository root: python -m benchmarks.eval_vad [corpus_dir] [template_dir]
+# corpus_dir holds wake/, speech/ and noise/ subdirectories of WAV files (recorded with the same
+# microphone as the assistant) and defaults to the fixtures in benchmarks/vad_fixtures. Those were
+# written with synthetic_corpus(dir, per_class=8, seed=11); recordings can replace them file for file.
+# "synthetic" as corpus_dir writes a larger synthetic corpus to a temporary directory instead.
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+from config.settings import VAD_ENERGY_RATIO, VAD_MIN_ENERGY, VAD_MAX_ZCR, VAD_MIN_SPEECH_MS, WAKE_MAX_DISTANCE
+from core.vad import VoiceActivityGate, load_keyword_templates, read_wav
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "vad_fixtures")
+# A missed wake word goes unanswered; a false trigger costs one remote recognizer call. The energy
+# gate alone forwards all speech, so only forwarded noise counts against it; with keyword spotting
+# any forwarded clip without the wake word is a false trigger.
+MAX_MISSED_WAKE = 0.05
+MAX_FALSE_TRIGGER = {"energy": 0.15, "keyword": 0.05}
+
+SAMPLE_RATE = 16000
+CLIP_S = 2.0
+CLASSES = ("wake", "speech", "noise")
+# Formant-like harmonic weightings standing in for syllables; the first two are "jar" and "vis"
+SYLLABLES = [(700, 1200), (300, 2300), (500, 1500), (400, 800), (600, 1800), (350, 2000), (450, 1100)]
+
+
+def write_wav(path, samples):
+    pcm = (np.clip(samples, -1, 1) * 32767).astype("<i2")
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(pcm.tobytes())
+
+
+def syllable(rng, formants, duration):
+    t = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+    f0 = rng.uniform(100, 190)
+    wave_ = np.zeros_like(t)
+    for k in range(1, int(3000 / f0)):
+        weight = sum(np.exp(-((k * f0 - f) / 150) ** 2) for f in formants) + 0.05 / k
+        wave_ += weight * np.sin(2 * np.pi * k * f0 * t * (1 + 0.02 * np.sin(2 * np.pi * 5 * t)))
+    envelope = np.sin(np.pi * t / duration) ** 0.5
+    return envelope * wave_ / np.abs(wave_).max()
+
+
+def background(rng, kind, level):
+    n = int(CLIP_S * SAMPLE_RATE)
+    if kind == "silence":
+        return rng.normal(0, level * 0.1, n)
+    if kind == "hiss":
+        return rng.normal(0, level, n)
+    if kind == "hum":
+        t = np.arange(n) / SAMPLE_RATE
+        return level * 3 * np.sin(2 * np.pi * 50 * t) + rng.normal(0, level * 0.3, n)
+    noise = rng.normal(0, level, n)
+    clicks = rng.integers(0, n - 200, 3)
+    for c in clicks:
+        noise[c:c + 80] += rng.uniform(0.3, 0.6) * np.sign(rng.normal(size=80))
+    return noise
+
+
+def utterance(rng, syllables, start):
+    clip = np.zeros(int(CLIP_S * SAMPLE_RATE))
+    pos = int(start * SAMPLE_RATE)
+    for formants in syllables:
+        piece = syllable(rng, formants, rng.uniform(0.18, 0.26)) * rng.uniform(0.2, 0.5)
+        end = min(len(clip), pos + len(piece))
+        clip[pos:end] += piece[:end - pos]
+        pos = end + int(rng.uniform(0.02, 0.08) * SAMPLE_RATE)
+    return clip
+
+
+def synthetic_corpus(directory, per_class=60, seed=3):
+    rng = np.random.default_rng(seed)
+    for cls in CLASSES + ("templates",):
+        os.makedirs(os.path.join(directory, cls), exist_ok=True)
+    for i in range(per_class):
+        noise = background(rng, rng.choice(["silence", "hiss", "hum", "clicks"]), rng.uniform(0.001, 0.02))
+        write_wav(os.path.join(directory, "noise", f"{i:03}.wav"), noise)
+        words = [SYLLABLES[j] for j in rng.integers(2, len(SYLLABLES), rng.integers(2, 6))]
+        speech = utterance(rng, words, rng.uniform(0.1, 0.6)) + background(rng, "hiss", 0.003)
+        write_wav(os.path.join(directory, "speech", f"{i:03}.wav"), speech)
+        # Half of the wake clips run straight on into a command
+        extra = [SYLLABLES[j] for j in rng.integers(2, len(SYLLABLES), 2)] if i % 2 else []
+        wake = utterance(rng, SYLLABLES[:2] + extra, rng.uniform(0.1, 0.6)) + background(rng, "hiss", 0.003)
+        write_wav(os.path.join(directory, "wake", f"{i:03}.wav"), wake)
+    for i in range(3):
+        template = utterance(rng, SYLLABLES[:2], 0.2) + background(rng, "hiss", 0.003)
+        write_wav(os.path.join(directory, "templates", f"{i}.wav"), template)
+    return directory
+
+
+def evaluate(gate, corpus_dir):
+    rows = {}
+    distances = {cls: [] for cls in CLASSES}
+    elapsed = 0.0
+    for cls in CLASSES:
+        forwarded = total = 0
+        folder = os.path.join(corpus_dir, cls)
+        for name in sorted(os.listdir(folder)) if os.path.isdir(folder) else []:
+            if not name.lower().endswith(".wav"):
+                continue
+            samples, sample_rate = read_wav(os.path.join(folder, name))
+            start = time.perf_counter()
+            forward, result = gate.should_forward(samples, sample_rate)
+            elapsed += time.perf_counter() - start
+            total += 1
+            forwarded += forward
+            if result["keyword_distance"] is not None:
+                distances[cls].append(result["keyword_distance"])
+        rows[cls] = (forwarded, total)
+    return rows, distances, elapsed
+
+
+def report(label, gate, corpus_dir, non_wake):
+    # Returns the missed-wake rate and the false-trigger rate over the `non_wake` classes
+    rows, distances, elapsed = evaluate(gate, corpus_dir)
+    forwarded = sum(f for f, _ in rows.values())
+    total = sum(t for _, t in rows.values())
+    wake_forwarded, wake_total = rows["wake"]
+    print(f"{label}:")
+    for cls, (f, t) in rows.items():
+        spread = ""
+        if distances[cls]:
+            spread = f"  keyword distance p10/p50/p90 {np.percentile(distances[cls], [10, 50, 90]).round(2)}"
+        print(f"  {cls:<7} forwarded {f:>4}/{t:<4}{spread}")
+    print(f"  forwarded-clip ratio: {forwarded / total:.1%}  (remote calls saved: {total - forwarded})")
+    missed = 1 - wake_forwarded / wake_total if wake_total else 0.0
+    false_forwarded = sum(rows[cls][0] for cls in non_wake)
+    false_total = sum(rows[cls][1] for cls in non_wake)
+    false_trigger = false_forwarded / false_total if false_total else 0.0
+    print(f"  missed-wake rate:     {missed:.1%}" if wake_total else "  no wake clips")
+    print(f"  false-trigger rate:   {false_trigger:.1%}  ({'/'.join(non_wake)} clips forwarded)")
+    print(f"  gate cost:            {elapsed / total * 1000:.2f} ms/clip")
+    return missed, false_trigger
+
+
+def check(label, rates, max_false_trigger):
+    missed, false_trigger = rates
+    assert missed <= MAX_MISSED_WAKE, f"{label}: missed-wake rate {missed:.1%} over {MAX_MISSED_WAKE:.0%}"
+    assert false_trigger <= max_false_trigger, \
+        f"{label}: false-trigger rate {false_trigger:.1%} over {max_false_trigger:.0%}"
+
+
+def main():
+    corpus_dir = sys.argv[1] if len(sys.argv) > 1 else FIXTURE_DIR
+    if corpus_dir == "synthetic":
+        corpus_dir = synthetic_corpus(tempfile.mkdtemp(prefix="jarvis-vad-"))
+    template_dir = sys.argv[2] if len(sys.argv) > 2 else os.path.join(corpus_dir, "templates")
+    print(f"corpus: {corpus_dir}")
+    rates = report("energy/ZCR gate",
+                   VoiceActivityGate(VAD_ENERGY_RATIO, VAD_MIN_ENERGY, VAD_MAX_ZCR, VAD_MIN_SPEECH_MS),
+                   corpus_dir, ("noise",))
+    check("energy/ZCR gate", rates, MAX_FALSE_TRIGGER["energy"])
+    if os.path.isdir(template_dir):
+        templates = load_keyword_templates(template_dir)
+        rates = report("energy/ZCR gate + keyword spotting",
+                       VoiceActivityGate(VAD_ENERGY_RATIO, VAD_MIN_ENERGY, VAD_MAX_ZCR, VAD_MIN_SPEECH_MS,
+                                         templates, WAKE_MAX_DISTANCE), corpus_dir, ("speech", "noise"))
+        check("energy/ZCR gate + keyword spotting", rates, MAX_FALSE_TRIGGER["keyword"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# Stand-in for the ssh client, for exercising services/system.py without a remote host.
+# Point SSH_BINARY (or RemoteShell(ssh_binary=...)) at this file. Each new connection sleeps
+# FAKE_SSH_HANDSHAKE_S; with ControlMaster=auto a control file is created at ControlPath and later
+# calls reuse it without the delay until "-O exit". The remote command runs locally through sh -c,
+# with FAKE_SSH_PATH prepended to PATH to stand in for the programs installed on the remote host.
+import hashlib
+import os
+import subprocess
+import sys
+import time
+
+
+def main(args):
+    options = {}
+    control = None
+    i = 0
+    while i < len(args) and args[i].startswith("-") and args[i] != "--":
+        if args[i] == "-o":
+            key, _, value = args[i + 1].partition("=")
+            options[key] = value
+            i += 2
+        elif args[i] == "-O":
+            control = args[i + 1]
+            i += 2
+        else:
+            i += 1
+    target = args[i]
+    rest = args[i + 1:]
+    if rest and rest[0] == "--":
+        rest = rest[1:]
+    control_path = options.get("ControlPath", "").replace("%C", hashlib.sha1(target.encode()).hexdigest())
+    if control == "exit":
+        if control_path and os.path.exists(control_path):
+            os.remove(control_path)
+        return 0
+    if not (control_path and os.path.exists(control_path)):
+        time.sleep(float(os.environ.get("FAKE_SSH_HANDSHAKE_S", "0.15")))
+        if control_path and options.get("ControlMaster") == "auto":
+            open(control_path, "w").close()
+    env = dict(os.environ, PATH=os.environ.get("FAKE_SSH_PATH", "") + os.pathsep + "/usr/bin:/bin")
+    return subprocess.run(["sh", "-c", " ".join(rest)], env=env).returncode
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
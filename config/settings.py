@@ -1,2 +1,106 @@
 MAIN_PC_USER = "somarakis"
 MAIN_PC_IP = "-"
+
+TTS_VOICE = "en-US-GuyNeural"
+TTS_CACHE_DIR = "tts_cache"
+TTS_CACHE_MAX_BYTES = 50 * 1024 * 1024
+TTS_PREWARM = True
+TTS_STREAMING = True
+
+SPEECH_PREFETCH_DEPTH = 2
+SPEECH_MAX_PENDING_TEXT = 4
+
+OLLAMA_URL = "http://localhost:11434"
+OLLAMA_KEEP_ALIVE = "30m"
+OLLAMA_CONNECT_TIMEOUT = 3
+OLLAMA_READ_TIMEOUT = 120
+
+LLM_CACHE_ENABLED = False
+LLM_CACHE_TTL_S = 24 * 3600
+LLM_CACHE_MAX_ENTRIES = 500
+
+# Streamed LLM text is cut into chunks of this size for TTS
+SEGMENT_MIN_CHARS = 12
+SEGMENT_MAX_CHARS = 300
+
+# Worker threads the shared event loop uses for blocking clients (HTTP, ssh)
+IO_WORKERS = 8
+# Canned phrases synthesized at once while pre-warming the TTS cache
+TTS_PREWARM_CONCURRENCY = 4
+
+# Local voice-activity gate in front of the remote wake-word recognizer
+VAD_ENABLED = True
+VAD_ENERGY_RATIO = 3.0
+VAD_MIN_ENERGY = 0.005
+VAD_MAX_ZCR = 0.3
+VAD_MIN_SPEECH_MS = 150
+# A directory of recorded "jarvis" WAV clips turns on keyword spotting in the gate
+WAKE_TEMPLATE_DIR = None
+# None calibrates the keyword-match cut-off from the spread between the recorded templates
+WAKE_MAX_DISTANCE = None
+
+# Persistent microphone capture
+MIC_BUFFER_S = 30
+MIC_CALIBRATION_S = 0.5
+MIC_ENERGY_RATIO = 1.5
+MIC_MIN_ENERGY = 100
+MIC_PAUSE_S = 0.8
+MIC_PRE_ROLL_S = 0.5
+
+WAKE_WORD = "jarvis"
+# Words dropped in front of a wake word that ends the phrase ("hey jarvis")
+WAKE_FILLERS = {"hey", "hi", "hello", "ok", "okay", "yo"}
+# Wake phrases may carry a whole command ("jarvis what's the weather in london")
+WAKE_PHRASE_LIMIT_S = 5
+
+# Open-Meteo endpoints (overridable to point at a local stand-in)
+WEATHER_GEOCODE_URL = "https://geocoding-api.open-meteo.com/v1/search"
+WEATHER_FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+# Forecasts are fresh for WEATHER_TTL_S; for WEATHER_STALE_S after that they are served while refreshing
+WEATHER_TTL_S = 600
+WEATHER_STALE_S = 3 * 3600
+WEATHER_TIMEOUT = 10
+
+# Morning briefing, built ahead of the usual "good morning" (learned from history, else this time)
+BRIEFING_ENABLED = True
+BRIEFING_WAKE_TIME = "07:30"
+BRIEFING_LEAD_MIN = 20
+BRIEFING_MAX_AGE_S = 3 * 3600
+
+# Remote execution on the main PC; SSH_BINARY can point at a stand-in for testing
+SSH_BINARY = "ssh"
+SSH_MULTIPLEX = True
+SSH_CONTROL_DIR = "~/.ssh/jarvis-cm"
+SSH_CONTROL_PERSIST = "10m"
+SSH_CONNECT_TIMEOUT = 5
+SSH_COMMAND_TIMEOUT = 15
+# How long "is gedit installed" style probe results are trusted
+SSH_PROBE_TTL_S = 3600
+
+# Remote commands run in the background: at most this many at once, with a table of recent jobs
+REMOTE_MAX_CONCURRENT = 2
+REMOTE_JOB_HISTORY = 20
+
+# Reminders due within this window are held as scheduler jobs; the rest wait in the database
+REMINDER_WINDOW_S = 6 * 3600
+# A reminder this late (e.g. JARVIS was restarting) is still announced; older ones are marked missed
+REMINDER_GRACE_S = 300
+
+# Retention: a nightly job prunes old rows in small batches and returns the space to disk
+RETENTION_ENABLED = True
+RETENTION_TIME = "04:00"
+CONVERSATION_RETENTION_DAYS = 90
+REMINDER_RETENTION_DAYS = 30
+RETENTION_BATCH_ROWS = 500
+RETENTION_VACUUM_PAGES = 256
+# A database created before incremental auto-vacuum needs one full VACUUM to convert; it rewrites
+# the file and blocks every write meanwhile, so it only runs when this is turned on
+RETENTION_CONVERT_AUTO_VACUUM = False
+
+# LLM prompt context: a rolling summary plus the most relevant recent turns, within this many tokens
+CONTEXT_ENABLED = True
+CONTEXT_TOKEN_BUDGET = 512
+CONTEXT_SUMMARY_TOKENS = 160
+# Rows kept verbatim after the summary; once this many more have piled up they are folded in
+CONTEXT_RECENT_ROWS = 24
+CONTEXT_SUMMARY_CHUNK = 24
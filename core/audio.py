@@ -0,0 +1,307 @@
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from queue import Queue
+
+# edge-tts sends 48 kbit/s MP3; assuming a lower bitrate over-estimates a clip's length, never under
+MIN_BYTES_PER_S = 4000
+# Extra wait for a player's end-of-track message before it is considered hung
+PLAYBACK_SLACK_S = 5.0
+
+
+class Clip:
+    def __init__(self, path, on_done=None):
+        self.path = path
+        self.on_done = on_done
+        self.done = threading.Event()
+        self.queued_at = time.perf_counter()
+        self.started_at = None
+        self.first_audio_at = None
+
+
+class StreamClip(Clip):
+    """A clip whose MP3 bytes arrive while it is already queued or playing."""
+
+    def __init__(self, on_done=None):
+        super().__init__(None, on_done)
+        self._chunks = Queue()
+
+    def write(self, data):
+        self._chunks.put(data)
+
+    def close(self):
+        self._chunks.put(None)
+
+    def chunks(self):
+        while True:
+            data = self._chunks.get()
+            if data is None:
+                return
+            yield data
+
+
+class AudioSink:
+    """Plays queued clips back-to-back through one long-lived player process.
+
+    The player is detected once. With mpg123 a single `mpg123 -R` process is kept
+    open and fed LOAD commands over its stdin pipe, so consecutive clips play with
+    no process spawn between them; other players fall back to one spawn per clip.
+    """
+
+    def __init__(self):
+        self.player = None
+        self.spawn_count = 0
+        self.clips_played = 0
+        self._queue = Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._process = None
+        self._track_finished = threading.Event()
+        self._pending = 0
+        self._idle = threading.Condition(self._lock)
+        self._audio_starts = deque(maxlen=64)
+
+    def detect_player(self):
+        if self.player is not None:
+            return self.player
+        system = platform.system()
+        if system == "Windows":
+            self.player = "wmplayer"
+        elif system == "Darwin":
+            self.player = "afplay"
+        else:
+            for candidate in ("mpg123", "cvlc", "mpv"):
+                if shutil.which(candidate):
+                    self.player = candidate
+                    break
+            else:
+                self.player = ""
+                logging.error("No audio player found to play TTS audio.")
+                print("No audio player found to play TTS audio.")
+        logging.info(f"Audio player selected: {self.player or 'none'}")
+        return self.player
+
+    def play(self, path, wait=True, on_done=None):
+        clip = Clip(path, on_done)
+        self._enqueue(clip)
+        if wait:
+            clip.done.wait()
+        return clip
+
+    def _enqueue(self, clip):
+        with self._lock:
+            self._pending += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="audio-sink", daemon=True)
+                self._thread.start()
+        self._queue.put(clip)
+
+    def open_stream(self, on_done=None):
+        clip = StreamClip(on_done)
+        self._enqueue(clip)
+        return clip
+
+    def is_busy(self):
+        return self._pending > 0
+
+    def first_audio_since(self, since):
+        # When the first clip that started playing after `since` became audible; the player thread
+        # appends meanwhile, and iterating a deque that changes size raises, so read a snapshot
+        return next((t for t in tuple(self._audio_starts) if t >= since), None)
+
+    def wait_idle(self, timeout=None):
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def _run(self):
+        while True:
+            clip = self._queue.get()
+            if clip is None:
+                break
+            clip.started_at = time.perf_counter()
+            try:
+                self._play_clip(clip)
+            except Exception as e:
+                logging.error(f"Audio playback failed for {clip.path}: {e}")
+            finally:
+                self.clips_played += 1
+                if clip.first_audio_at is not None:
+                    self._audio_starts.append(clip.first_audio_at)
+                clip.done.set()
+                if clip.on_done:
+                    try:
+                        clip.on_done(clip)
+                    except Exception as e:
+                        logging.error(f"Audio completion callback failed: {e}")
+                with self._idle:
+                    self._pending -= 1
+                    self._idle.notify_all()
+
+    def _play_clip(self, clip):
+        player = self.detect_player()
+        if isinstance(clip, StreamClip):
+            if player == "mpg123" and hasattr(os, "mkfifo"):
+                self._play_remote_stream(clip)
+                return
+            clip.path = self._spool(clip)
+        clip.first_audio_at = time.perf_counter()
+        if player == "mpg123":
+            self._play_remote(clip.path)
+        elif player == "wmplayer":
+            self._spawn(f'start /min wmplayer "{clip.path}"', shell=True)
+        elif player == "afplay":
+            self._spawn(["afplay", clip.path])
+        elif player == "cvlc":
+            self._spawn(["cvlc", "--play-and-exit", clip.path])
+        elif player == "mpv":
+            self._spawn(["mpv", clip.path])
+        if isinstance(clip, StreamClip):
+            os.remove(clip.path)
+
+    def _spool(self, clip):
+        # Players that cannot read a pipe get the stream written to a temporary file first
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as f:
+            for data in clip.chunks():
+                f.write(data)
+        return f.name
+
+    def _spawn(self, command, shell=False):
+        self.spawn_count += 1
+        subprocess.run(command, shell=shell, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def _ensure_remote_player(self):
+        if self._process is not None and self._process.poll() is None:
+            return self._process
+        self.spawn_count += 1
+        self._process = subprocess.Popen(["mpg123", "-R"], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         stderr=subprocess.DEVNULL, text=True, bufsize=1)
+        threading.Thread(target=self._read_remote, args=(self._process,), name="mpg123-reader",
+                         daemon=True).start()
+        # Stop per-frame progress messages; only track start/stop events are needed
+        self._process.stdin.write("SILENCE\n")
+        self._process.stdin.flush()
+        logging.info(f"Started persistent mpg123 player (pid {self._process.pid})")
+        return self._process
+
+    def _read_remote(self, process):
+        # A player that was killed and replaced must not end the new player's track
+        for line in process.stdout:
+            if line.startswith("@P 0") or line.startswith("@E"):
+                if line.startswith("@E"):
+                    logging.error(f"mpg123: {line.strip()}")
+                if process is self._process:
+                    self._track_finished.set()
+        # The process exited; release anyone waiting on the current track
+        if process is self._process:
+            self._track_finished.set()
+
+    def _wait_track(self, process, audio_bytes):
+        # Waits for the end of the track, at most its length at the lowest expected bitrate plus slack.
+        # A player that never reports it is killed, and the next clip starts a new one
+        timeout = audio_bytes / MIN_BYTES_PER_S + PLAYBACK_SLACK_S
+        if self._track_finished.wait(timeout):
+            return True
+        logging.error(f"mpg123 did not finish a track within {timeout:.1f} s; restarting the player")
+        if self._process is process:
+            self._process = None
+        try:
+            process.kill()
+            process.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logging.error(f"Failed to stop the hung player: {e}")
+        return False
+
+    def _play_remote(self, path):
+        process = self._ensure_remote_player()
+        self._track_finished.clear()
+        try:
+            process.stdin.write(f"LOAD {os.path.abspath(path)}\n")
+            process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            logging.error(f"Persistent player pipe closed: {e}")
+            self._process = None
+            return
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        self._wait_track(process, size)
+
+    def _play_remote_stream(self, clip):
+        process = self._ensure_remote_player()
+        fifo_dir = tempfile.mkdtemp(prefix="jarvis-audio-")
+        fifo_path = os.path.join(fifo_dir, "stream.mp3")
+        os.mkfifo(fifo_path)
+        try:
+            self._track_finished.clear()
+            process.stdin.write(f"LOAD {fifo_path}\n")
+            process.stdin.flush()
+            fd = self._open_fifo_writer(fifo_path)
+            if fd is None:
+                logging.error("Persistent player never opened the audio stream")
+                for _ in clip.chunks():
+                    pass
+                return
+            written = 0
+            try:
+                for data in clip.chunks():
+                    if clip.first_audio_at is None:
+                        clip.first_audio_at = time.perf_counter()
+                    written += len(data)
+                    view = memoryview(data)
+                    while view:
+                        view = view[os.write(fd, view):]
+            except BrokenPipeError:
+                logging.error("Persistent player closed the audio stream early")
+                for _ in clip.chunks():
+                    pass
+            finally:
+                os.close(fd)
+            self._wait_track(process, written)
+        except (BrokenPipeError, OSError) as e:
+            logging.error(f"Streaming playback failed: {e}")
+            self._process = None
+        finally:
+            os.remove(fifo_path)
+            os.rmdir(fifo_dir)
+
+    def _open_fifo_writer(self, fifo_path, timeout=5.0):
+        # A non-blocking open fails with ENXIO until the player has opened its end
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                fd = os.open(fifo_path, os.O_WRONLY | os.O_NONBLOCK)
+            except OSError:
+                if self._track_finished.is_set():
+                    return None
+                time.sleep(0.005)
+                continue
+            os.set_blocking(fd, True)
+            return fd
+        return None
+
+    def stats(self):
+        return {
+            "player": self.player,
+            "clips_played": self.clips_played,
+            "spawn_count": self.spawn_count,
+            "spawns_per_clip": round(self.spawn_count / self.clips_played, 3) if self.clips_played else 0.0,
+        }
+
+    def close(self):
+        self._queue.put(None)
+        process, self._process = self._process, None
+        if process is not None and process.poll() is None:
+            try:
+                process.stdin.write("QUIT\n")
+                process.stdin.flush()
+                process.wait(timeout=2)
+            except (OSError, subprocess.TimeoutExpired):
+                process.kill()
+        logging.info(f"Audio sink closed: {self.stats()}")
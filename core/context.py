@@ -0,0 +1,186 @@
+import logging
+import threading
+from core.event_loop import event_loop
+from core.memory import get_conversation_since, get_latest_summary, store_summary, search_terms
+from config.settings import CONTEXT_TOKEN_BUDGET, CONTEXT_SUMMARY_TOKENS, CONTEXT_RECENT_ROWS, CONTEXT_SUMMARY_CHUNK
+
+SUMMARY_PROMPT = ("Update the running summary of a conversation between a user and JARVIS, an AI assistant. "
+                  "Keep names, facts, decisions and open requests; drop small talk. "
+                  "Answer with the updated summary only, in at most {words} words.\n\n"
+                  "Current summary: {summary}\n\nNew conversation:\n{lines}\n\nUpdated summary:")
+# One long spoken answer should not crowd every other turn out of the budget
+LINE_TOKENS = 60
+MAX_FOLD_CHUNKS = 4
+
+
+def estimate_tokens(text):
+    # phi's BPE averages about four characters per token on English; no tokenizer is loaded for this
+    return len(text) // 4 + 1
+
+
+def clip_tokens(text, tokens, keep_end=False):
+    limit = tokens * 4
+    if len(text) <= limit:
+        return text
+    if keep_end:
+        return "..." + text[-limit:].split(" ", 1)[-1]
+    return text[:limit].rsplit(" ", 1)[0] + "..."
+
+
+def format_row(row):
+    if row["command"]:
+        return f"User: {row['command']}"
+    return f"JARVIS: {row['response']}"
+
+
+def group_turns(rows):
+    # A turn is a user command with the sentences spoken after it
+    turns = []
+    for row in rows:
+        if row["command"] or not turns:
+            turns.append([])
+        turns[-1].append(row)
+    return turns
+
+
+class ContextAssembler:
+    """Builds the conversation context for LLM prompts within a fixed token budget.
+
+    Context is the rolling summary cached in the memory DB plus the recent turns that
+    share the most words with the command, newest first on ties. Rows older than the
+    last CONTEXT_RECENT_ROWS are folded into the summary in the background, a chunk at
+    a time, so neither the prompt nor the summarization request grows with history.
+    Folding only runs between commands: a command cancels the summarization request in
+    flight and the fold is retried after it.
+    """
+
+    def __init__(self, token_budget=CONTEXT_TOKEN_BUDGET, summary_tokens=CONTEXT_SUMMARY_TOKENS,
+                 recent_rows=CONTEXT_RECENT_ROWS, chunk_rows=CONTEXT_SUMMARY_CHUNK):
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.recent_rows = recent_rows
+        self.chunk_rows = chunk_rows
+        self._summary = None
+        self._lock = threading.Lock()
+        self._refresh = None
+        self._command_active = threading.Event()
+        self.counts = {"assembled": 0, "summaries": 0, "llm_failures": 0, "deferred": 0}
+
+    def summary(self):
+        with self._lock:
+            if self._summary is None:
+                self._summary = get_latest_summary() or {"end_id": 0, "summary": ""}
+            return self._summary
+
+    def context(self, command):
+        return self.assemble(command)[0]
+
+    def assemble(self, command):
+        # Returns the context text and a fingerprint of what went into it: the summary's end row
+        # and the ids of the included turns. The fingerprint is empty when there is no context.
+        summary = self.summary()
+        # The turns after the summary are bounded by the background folding; the cap covers a lagging summary
+        rows = get_conversation_since(summary["end_id"], limit=self.recent_rows + self.chunk_rows)
+        if rows and rows[-1]["command"] == command:
+            rows = rows[:-1]
+        budget = self.token_budget
+        parts = []
+        if summary["summary"]:
+            text = clip_tokens(summary["summary"], min(self.summary_tokens, budget))
+            parts.append(f"Summary of earlier conversation: {text}")
+            budget -= estimate_tokens(parts[0])
+        turns = group_turns(rows)
+        terms = set(search_terms(command))
+        scored = []
+        for age, turn in enumerate(reversed(turns)):
+            lines = [clip_tokens(format_row(row), LINE_TOKENS) for row in turn]
+            words = set(search_terms(" ".join(lines)))
+            # The last turn always ranks first, so follow-ups like "and tomorrow?" keep their referent
+            scored.append((age == 0, len(terms & words), -age, lines, turn[0]["id"]))
+        chosen = []
+        for _, _, age, lines, turn_id in sorted(scored, key=lambda s: s[:3], reverse=True):
+            cost = sum(estimate_tokens(line) + 1 for line in lines)
+            if cost > budget:
+                continue
+            chosen.append((age, lines, turn_id))
+            budget -= cost
+        if chosen:
+            recent = [line for _, lines, _ in sorted(chosen) for line in lines]
+            parts.append("Recent conversation:\n" + "\n".join(recent))
+        self.counts["assembled"] += 1
+        if not parts:
+            return "", ""
+        turn_ids = ",".join(str(turn_id) for turn_id in sorted(turn_id for _, _, turn_id in chosen))
+        return "\n\n".join(parts), f"{summary['end_id']}:{turn_ids}"
+
+    def build_prompt(self, template, command):
+        # Returns the prompt and the key to cache its answer under: the bare question plus the
+        # context fingerprint, so an answer is only reused for the same question in the same context
+        context, fingerprint = self.assemble(command)
+        prompt = template.format(command=command)
+        if not context:
+            return prompt, prompt
+        return f"{context}\n\n{prompt}", f"{prompt}\n[context {fingerprint}]"
+
+    def command_started(self):
+        self._command_active.set()
+
+    def command_finished(self):
+        self._command_active.clear()
+
+    def schedule_refresh(self, llm=None):
+        # At most one refresh runs at a time; a refresh requested meanwhile is covered by its loop
+        with self._lock:
+            if self._command_active.is_set():
+                return None
+            if self._refresh is not None and not self._refresh.done():
+                return self._refresh
+            self._refresh = event_loop.submit(event_loop.to_thread(self.refresh, llm))
+            return self._refresh
+
+    def refresh(self, llm=None):
+        summary = self.summary()
+        # A long unsummarized backlog (e.g. history from before summaries existed) is skipped
+        # rather than replayed through the model; only its last few chunks are folded in
+        rows = get_conversation_since(summary["end_id"], limit=self.recent_rows + self.chunk_rows * MAX_FOLD_CHUNKS)
+        while len(rows) >= self.recent_rows + self.chunk_rows:
+            chunk, rows = rows[:self.chunk_rows], rows[self.chunk_rows:]
+            summary = self.summary()
+            text = self.summarize(summary["summary"], chunk, llm)
+            if text is None:
+                # A command arrived; the next schedule_refresh picks this chunk up again
+                self.counts["deferred"] += 1
+                return
+            store_summary(chunk[-1]["id"], text)
+            with self._lock:
+                self._summary = {"end_id": chunk[-1]["id"], "summary": text}
+            self.counts["summaries"] += 1
+            logging.info(f"Conversation summary extended to row {chunk[-1]['id']} ({estimate_tokens(text)} tokens)")
+
+    def summarize(self, previous, rows, llm=None):
+        # Returns None when a command started before the model finished
+        lines = "\n".join(clip_tokens(format_row(row), LINE_TOKENS) for row in rows)
+        if llm is not None:
+            if self._command_active.is_set():
+                return None
+            prompt = SUMMARY_PROMPT.format(words=self.summary_tokens * 3 // 4, summary=previous or "(none)",
+                                           lines=lines)
+            sentences = list(llm.generate_response(prompt, max_length=self.summary_tokens, use_cache=False,
+                                                   cancel=self._command_active))
+            if self._command_active.is_set():
+                return None
+            if sentences and not sentences[-1].startswith("Error generating response"):
+                return clip_tokens(" ".join(sentences), self.summary_tokens)
+            self.counts["llm_failures"] += 1
+        # Without the model: the user's requests, newest kept when the summary runs over
+        asked = "; ".join(row["command"] for row in rows if row["command"])
+        if not asked:
+            return previous
+        text = f"{previous} Then asked: {asked}." if previous else f"The user asked: {asked}."
+        return clip_tokens(text, self.summary_tokens, keep_end=True)
+
+    def stats(self):
+        return dict(self.counts, summary_end_id=self.summary()["end_id"])
+
+
+context_assembler = ContextAssembler()
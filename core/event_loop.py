@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config.settings import IO_WORKERS
+
+
+class EventLoopThread:
+    """One long-lived asyncio loop on a daemon thread that owns speech and network I/O.
+
+    Coroutines are handed over with submit() (returns a concurrent Future) or run()
+    (blocks the caller until the result is ready). Blocking clients such as requests
+    or ssh are wrapped with to_thread() and run on the loop's bounded I/O pool, so
+    independent calls can overlap instead of queueing behind each other.
+    """
+
+    def __init__(self, io_workers=IO_WORKERS):
+        self.io_workers = io_workers
+        self.loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.busy_s = 0.0
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self.loop
+            self._ready.clear()
+            self._thread = threading.Thread(target=self._run, name="jarvis-event-loop", daemon=True)
+            self._thread.start()
+        self._ready.wait()
+        return self.loop
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="jarvis-io"))
+        self.loop = loop
+        self._ready.set()
+        logging.info(f"Event loop started ({self.io_workers} I/O workers)")
+        try:
+            loop.run_forever()
+        finally:
+            loop.run_until_complete(loop.shutdown_default_executor())
+            loop.close()
+
+    def in_loop_thread(self):
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, coro):
+        loop = self.start()
+        self.submitted += 1
+        future = asyncio.run_coroutine_threadsafe(self._track(coro), loop)
+        return future
+
+    async def _track(self, coro):
+        start = time.perf_counter()
+        try:
+            result = await coro
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.busy_s += time.perf_counter() - start
+        self.completed += 1
+        return result
+
+    def run(self, coro, timeout=None):
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError("EventLoopThread.run() called from the event loop thread; await the coroutine instead")
+        return self.submit(coro).result(timeout)
+
+    async def to_thread(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def stats(self):
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "pending": self.submitted - self.completed - self.failed,
+            "busy_s": round(self.busy_s, 2),
+        }
+
+    def stop(self, timeout=5):
+        loop, thread = self.loop, self._thread
+        if loop is None or thread is None or not thread.is_alive():
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        logging.info(f"Event loop stopped: {self.stats()}")
+
+
+event_loop = EventLoopThread()
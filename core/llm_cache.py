@@ -0,0 +1,79 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from core.memory import MemoryStore, DB_PATH
+
+LLM_CACHE_DB_PATH = os.path.join(os.path.dirname(DB_PATH), "jarvis_llm_cache.db")
+
+
+def normalize_prompt(prompt):
+    return re.sub(r"\s+", " ", prompt).strip().lower()
+
+
+class LLMResponseCache:
+    """SQLite cache of generated sentences keyed on (normalized prompt, model, options)."""
+
+    def __init__(self, db_path=LLM_CACHE_DB_PATH, ttl_s=24 * 3600, max_entries=500):
+        self.store = MemoryStore(db_path)
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.store.execute('''CREATE TABLE IF NOT EXISTS llm_cache
+                     (key TEXT PRIMARY KEY, model TEXT, prompt TEXT, sentences TEXT,
+                      created_at REAL, last_used REAL)''')
+        self.store.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache (last_used)")
+
+    @staticmethod
+    def key(prompt, model, options):
+        material = json.dumps([normalize_prompt(prompt), model, options], sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, prompt, model, options):
+        key = self.key(prompt, model, options)
+        now = time.time()
+        try:
+            row = self.store.query_one("SELECT sentences, created_at FROM llm_cache WHERE key = ?", (key,))
+            if row is None or row[1] < now - self.ttl_s:
+                if row is not None:
+                    self.store.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self.store.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as e:
+            logging.error(f"LLM cache lookup failed: {str(e)}")
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, prompt, model, options, sentences):
+        now = time.time()
+        try:
+            with self.store.transaction() as conn:
+                conn.execute("INSERT OR REPLACE INTO llm_cache (key, model, prompt, sentences, created_at, last_used) "
+                             "VALUES (?, ?, ?, ?, ?, ?)",
+                             (self.key(prompt, model, options), model, normalize_prompt(prompt),
+                              json.dumps(sentences), now, now))
+                conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_s,))
+                conn.execute("DELETE FROM llm_cache WHERE key IN "
+                             "(SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                             (self.max_entries,))
+        except sqlite3.Error as e:
+            logging.error(f"LLM cache store failed: {str(e)}")
+
+    def purge_expired(self, batch_size=500):
+        try:
+            return self.store.execute("DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache "
+                                      "WHERE created_at < ? LIMIT ?)", (time.time() - self.ttl_s, batch_size)).rowcount
+        except sqlite3.Error as e:
+            logging.error(f"LLM cache purge failed: {str(e)}")
+            return 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0}
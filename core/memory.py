@@ -1,54 +1,433 @@
 import sqlite3
 import logging
 import json
+import copy
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from queue import Queue, Empty
 from datetime import datetime
 
+DB_PATH = 'jarvis_memory.db'
+# Conversation search ranks at most this many of the newest matches
+SEARCH_CANDIDATES = 1000
+
+
+class MemoryStore:
+    """SQLite engine keeping one open connection per thread for the life of the process."""
+
+    def __init__(self, db_path=DB_PATH, cache_kib=8192, cached_statements=256):
+        self.db_path = db_path
+        self.cache_kib = cache_kib
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False,
+                                   cached_statements=self.cached_statements)
+            if conn.execute("PRAGMA page_count").fetchone()[0] == 0:
+                # A new, empty file: the mode is fixed once the WAL header and first table are written
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA cache_size=-{self.cache_kib}")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def execute(self, sql, params=()):
+        conn = self.connection()
+        with conn:
+            return conn.execute(sql, params)
+
+    def executemany(self, sql, rows):
+        conn = self.connection()
+        with conn:
+            return conn.executemany(sql, rows)
+
+    @contextmanager
+    def transaction(self):
+        conn = self.connection()
+        with conn:
+            yield conn
+
+    def query(self, sql, params=()):
+        return self.connection().execute(sql, params).fetchall()
+
+    def query_one(self, sql, params=()):
+        return self.connection().execute(sql, params).fetchone()
+
+    def size_bytes(self):
+        page_count, = self.query_one("PRAGMA page_count")
+        page_size, = self.query_one("PRAGMA page_size")
+        return page_count * page_size
+
+    def free_pages(self):
+        return self.query_one("PRAGMA freelist_count")[0]
+
+    def incremental_vacuum_enabled(self):
+        return self.query_one("PRAGMA auto_vacuum")[0] == 2
+
+    def convert_to_incremental_vacuum(self):
+        # A database created before auto_vacuum was set needs one full VACUUM to switch modes. It
+        # rewrites the whole file under the write lock, so it is only run when explicitly enabled
+        conn = self.connection()
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+
+    def incremental_vacuum(self, pages):
+        # Returns up to `pages` free pages to the filesystem. The pragma frees one page per step and
+        # produces no rows, so execute() would stop after the first; executescript() runs it to completion
+        self.connection().executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logging.error(f"Failed to close database connection: {str(e)}")
+        self._local = threading.local()
+
+
+memory_store = MemoryStore()
+fts_enabled = False
+
+
+class ConversationLogger:
+    """Write-behind logger that batches conversation rows into one transaction.
+
+    Rows from a failed flush (e.g. "database is locked" during a VACUUM) are kept and
+    written first by the next one; they are dropped only after max_failures in a row.
+    """
+
+    def __init__(self, store, batch_size=32, flush_interval=1.0, max_failures=5):
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_failures = max_failures
+        self._queue = Queue()
+        self._retry = []
+        self._failures = 0
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._stopped = False
+        self.rows_written = 0
+        self.flush_count = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+        self.rows_dropped = 0
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="conversation-logger", daemon=True)
+            self._thread.start()
+
+    def log(self, command, response):
+        self._queue.put((command, response, datetime.now().isoformat()))
+        if self._stopped:
+            self.flush()
+            return
+        self.start()
+        if self._queue.qsize() >= self.batch_size:
+            self._wake.set()
+
+    def queue_depth(self):
+        return self._queue.qsize() + len(self._retry)
+
+    def _drain(self, limit):
+        rows = []
+        while len(rows) < limit:
+            try:
+                rows.append(self._queue.get_nowait())
+            except Empty:
+                break
+        return rows
+
+    def flush(self):
+        with self._flush_lock:
+            while True:
+                rows, self._retry = self._retry, []
+                rows += self._drain(self.batch_size * 8 - len(rows))
+                if not rows:
+                    return
+                start = time.perf_counter()
+                try:
+                    self.store.executemany(
+                        "INSERT INTO conversation (command, response, timestamp) VALUES (?, ?, ?)", rows)
+                except sqlite3.Error as e:
+                    self._failures += 1
+                    if self._failures < self.max_failures:
+                        logging.error(f"Failed to store {len(rows)} conversation rows, will retry: {str(e)}")
+                        self._retry = rows
+                    else:
+                        logging.error(f"Dropping {len(rows)} conversation rows after {self._failures} failed "
+                                      f"flushes: {str(e)}")
+                        self.rows_dropped += len(rows)
+                        self._failures = 0
+                    return
+                self._failures = 0
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                self.rows_written += len(rows)
+                self.flush_count += 1
+                self.last_flush_ms = elapsed_ms
+                self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+                self.total_flush_ms += elapsed_ms
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.flush_interval + 1)
+        self.flush()
+        logging.info(f"Conversation logger stopped: {self.stats()}")
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue_depth(),
+            "rows_written": self.rows_written,
+            "rows_dropped": self.rows_dropped,
+            "flush_count": self.flush_count,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "max_flush_ms": round(self.max_flush_ms, 2),
+            "avg_flush_ms": round(self.total_flush_ms / self.flush_count, 2) if self.flush_count else 0.0,
+        }
+
+
+conversation_logger = ConversationLogger(memory_store)
+
+_MISSING = object()
+
+
+class MemoryCache:
+    """Bounded LRU cache of decoded memory values, invalidated on every write."""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, version=None):
+        with self._lock:
+            # A write raced with the read that produced this value; drop it rather than cache stale data
+            if version is not None and version != self.version:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *keys):
+        with self._lock:
+            self.version += 1
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+memory_cache = MemoryCache()
 
 
 def init_memory_db():
     try:
-        conn = sqlite3.connect('jarvis_memory.db')
-        c = conn.cursor()
-        c.execute('''CREATE TABLE IF NOT EXISTS memory
+        memory_store.execute('''CREATE TABLE IF NOT EXISTS memory
                      (key TEXT PRIMARY KEY, value TEXT)''')
-        c.execute('''CREATE TABLE IF NOT EXISTS conversation
+        memory_store.execute('''CREATE TABLE IF NOT EXISTS conversation
                      (id INTEGER PRIMARY KEY AUTOINCREMENT, command TEXT, response TEXT, timestamp TEXT)''')
-        conn.commit()
-        conn.close()
+        memory_store.execute('''CREATE TABLE IF NOT EXISTS list_items
+                     (id INTEGER PRIMARY KEY AUTOINCREMENT, list_name TEXT NOT NULL, item TEXT NOT NULL,
+                      added_at TEXT, UNIQUE (list_name, item))''')
+        memory_store.execute('''CREATE TABLE IF NOT EXISTS reminders
+                     (id INTEGER PRIMARY KEY AUTOINCREMENT, task TEXT NOT NULL, fire_at TEXT NOT NULL,
+                      created_at TEXT, status TEXT NOT NULL DEFAULT 'pending', fired_at TEXT)''')
+        memory_store.execute('''CREATE TABLE IF NOT EXISTS geocode_cache
+                     (query TEXT PRIMARY KEY, name TEXT, latitude REAL NOT NULL, longitude REAL NOT NULL,
+                      resolved_at TEXT)''')
+        memory_store.execute('''CREATE TABLE IF NOT EXISTS conversation_summary
+                     (end_id INTEGER PRIMARY KEY, summary TEXT NOT NULL, created_at TEXT)''')
+        migrate_reminder_status()
+        memory_store.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_reminders_task_fire_at ON reminders (task, fire_at)")
+        memory_store.execute("CREATE INDEX IF NOT EXISTS idx_reminders_status_fire_at ON reminders (status, fire_at)")
+        migrate_json_blobs()
+        init_conversation_search()
         logging.info("Memory database initialized")
     except sqlite3.Error as e:
         logging.error(f"Database initialization failed: {str(e)}")
 
+def normalize_reminder_time(time_str):
+    # ISO strings only sort chronologically once they share one format
+    return datetime.fromisoformat(time_str).isoformat()
+
+def migrate_json_blobs():
+    # One-time move of the old "<name>_list" and "reminders" JSON blobs into list_items / reminders
+    if memory_store.query_one("PRAGMA user_version")[0] >= 1:
+        return
+    migrated_lists = 0
+    migrated_reminders = 0
+    with memory_store.transaction() as conn:
+        rows = conn.execute("SELECT key, value FROM memory "
+                            "WHERE key LIKE '%\\_list' ESCAPE '\\' OR key = 'reminders'").fetchall()
+        for key, value in rows:
+            try:
+                data = json.loads(value)
+            except json.JSONDecodeError:
+                logging.error(f"Skipping migration of unparseable memory {key}")
+                continue
+            if key == "reminders" and data.get("type") == "reminders":
+                for item in data.get("items", []):
+                    try:
+                        fire_at = normalize_reminder_time(item["time"])
+                    except (KeyError, ValueError):
+                        logging.error(f"Skipping migration of reminder with invalid time: {item}")
+                        continue
+                    conn.execute("INSERT OR IGNORE INTO reminders (task, fire_at, created_at) VALUES (?, ?, ?)",
+                                 (item.get("task", ""), fire_at, datetime.now().isoformat()))
+                    migrated_reminders += 1
+            elif data.get("type") == "list":
+                list_name = key[:-len("_list")]
+                conn.executemany("INSERT OR IGNORE INTO list_items (list_name, item, added_at) VALUES (?, ?, ?)",
+                                 [(list_name, item, data.get("timestamp")) for item in data.get("items", [])])
+                migrated_lists += 1
+            else:
+                continue
+            conn.execute("DELETE FROM memory WHERE key = ?", (key,))
+        conn.execute("PRAGMA user_version = 1")
+    memory_cache.clear()
+    if migrated_lists or migrated_reminders:
+        logging.info(f"Migrated {migrated_lists} lists and {migrated_reminders} reminders to dedicated tables")
+
+def init_conversation_search():
+    # External-content FTS5 index over conversation, kept in step by triggers. SQLite builds
+    # without FTS5 fall back to LIKE scans in search_conversation.
+    global fts_enabled
+    try:
+        exists = memory_store.query_one("SELECT 1 FROM sqlite_master WHERE name = 'conversation_fts'")
+        with memory_store.transaction() as conn:
+            conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS conversation_fts USING fts5
+                         (command, response, content='conversation', content_rowid='id',
+                          tokenize='porter unicode61')''')
+            conn.execute('''CREATE TRIGGER IF NOT EXISTS conversation_fts_insert AFTER INSERT ON conversation BEGIN
+                         INSERT INTO conversation_fts (rowid, command, response)
+                         VALUES (new.id, new.command, new.response); END''')
+            conn.execute('''CREATE TRIGGER IF NOT EXISTS conversation_fts_delete AFTER DELETE ON conversation BEGIN
+                         INSERT INTO conversation_fts (conversation_fts, rowid, command, response)
+                         VALUES ('delete', old.id, old.command, old.response); END''')
+            conn.execute('''CREATE TRIGGER IF NOT EXISTS conversation_fts_update AFTER UPDATE ON conversation BEGIN
+                         INSERT INTO conversation_fts (conversation_fts, rowid, command, response)
+                         VALUES ('delete', old.id, old.command, old.response);
+                         INSERT INTO conversation_fts (rowid, command, response)
+                         VALUES (new.id, new.command, new.response); END''')
+            if not exists:
+                # Index the history written before the index existed
+                conn.execute("INSERT INTO conversation_fts (conversation_fts) VALUES ('rebuild')")
+        fts_enabled = True
+    except sqlite3.OperationalError as e:
+        fts_enabled = False
+        logging.error(f"Full-text search unavailable, falling back to LIKE: {str(e)}")
+
+def migrate_reminder_status():
+    # Reminders gain a status so fired ones stay out of startup loading, and (task, fire_at) becomes unique
+    # so the copies left by replaying reminders on every restart collapse into one
+    columns = [r[1] for r in memory_store.query("PRAGMA table_info(reminders)")]
+    if "status" in columns:
+        return
+    with memory_store.transaction() as conn:
+        conn.execute("ALTER TABLE reminders ADD COLUMN status TEXT NOT NULL DEFAULT 'pending'")
+        conn.execute("ALTER TABLE reminders ADD COLUMN fired_at TEXT")
+        removed = conn.execute("DELETE FROM reminders WHERE id NOT IN "
+                               "(SELECT MIN(id) FROM reminders GROUP BY task, fire_at)").rowcount
+        conn.execute("DROP INDEX IF EXISTS idx_reminders_fire_at")
+    if removed:
+        logging.info(f"Removed {removed} duplicate reminders")
+
 def store_memory(key, value):
     try:
-        conn = sqlite3.connect('jarvis_memory.db')
-        c = conn.cursor()
-        c.execute("INSERT OR REPLACE INTO memory (key, value) VALUES (?, ?)", (key, value))
-        conn.commit()
-        conn.close()
+        memory_store.execute("INSERT OR REPLACE INTO memory (key, value) VALUES (?, ?)", (key, value))
         logging.info(f"Stored memory: {key}")
     except sqlite3.Error as e:
         logging.error(f"Failed to store memory {key}: {str(e)}")
+    finally:
+        memory_cache.invalidate(("raw", key), ("json", key))
 
 def retrieve_memory(key):
+    cached = memory_cache.get(("raw", key))
+    if cached is not _MISSING:
+        return cached
+    version = memory_cache.version
     try:
-        conn = sqlite3.connect('jarvis_memory.db')
-        c = conn.cursor()
-        c.execute("SELECT value FROM memory WHERE key = ?", (key,))
-        result = c.fetchone()
-        conn.close()
-        return result[0] if result else None
+        result = memory_store.query_one("SELECT value FROM memory WHERE key = ?", (key,))
     except sqlite3.Error as e:
         logging.error(f"Failed to retrieve memory {key}: {str(e)}")
         return None
+    value = result[0] if result else None
+    memory_cache.put(("raw", key), value, version)
+    return value
+
+def retrieve_memory_json(key):
+    # Returns the decoded value (None when missing); raises json.JSONDecodeError on corrupt data.
+    # Callers get their own copy, so editing it cannot change the cached value.
+    cached = memory_cache.get(("json", key))
+    if cached is not _MISSING:
+        return copy.deepcopy(cached)
+    version = memory_cache.version
+    raw = retrieve_memory(key)
+    value = json.loads(raw) if raw is not None else None
+    memory_cache.put(("json", key), value, version)
+    return copy.deepcopy(value)
 
 def retrieve_all_memories():
     try:
-        conn = sqlite3.connect('jarvis_memory.db')
-        c = conn.cursor()
-        c.execute("SELECT key, value FROM memory")
-        memories = c.fetchall()
-        conn.close()
+        memories = memory_store.query("SELECT key, value FROM memory")
         return dict(memories)  # Return as dictionary for consistency with list_memories
     except sqlite3.Error as e:
         logging.error(f"Failed to retrieve all memories from database: {str(e)}")
@@ -56,39 +435,312 @@ def retrieve_all_memories():
 
 def delete_memory(key):
     try:
-        conn = sqlite3.connect('jarvis_memory.db')
-        c = conn.cursor()
-        c.execute("DELETE FROM memory WHERE key = ?", (key,))
-        conn.commit()
-        conn.close()
+        memory_store.execute("DELETE FROM memory WHERE key = ?", (key,))
         logging.info(f"Deleted memory: {key}")
     except sqlite3.Error as e:
         logging.error(f"Failed to delete memory {key}: {str(e)}")
+    finally:
+        memory_cache.invalidate(("raw", key), ("json", key))
+
+def add_list_item(list_name, item):
+    # Returns True if the item was added, False if it was already on the list
+    try:
+        cursor = memory_store.execute(
+            "INSERT OR IGNORE INTO list_items (list_name, item, added_at) VALUES (?, ?, ?)",
+            (list_name, item, datetime.now().isoformat()))
+        if cursor.rowcount == 0:
+            return False
+        logging.info(f"Added {item} to list {list_name}")
+        return True
+    except sqlite3.Error as e:
+        logging.error(f"Failed to add {item} to list {list_name}: {str(e)}")
+        return False
+    finally:
+        memory_cache.invalidate(("list", list_name))
+
+def remove_list_item(list_name, item):
+    # Returns True if the item was on the list
+    try:
+        cursor = memory_store.execute("DELETE FROM list_items WHERE list_name = ? AND item = ?", (list_name, item))
+        if cursor.rowcount == 0:
+            return False
+        logging.info(f"Removed {item} from list {list_name}")
+        return True
+    except sqlite3.Error as e:
+        logging.error(f"Failed to remove {item} from list {list_name}: {str(e)}")
+        return False
+    finally:
+        memory_cache.invalidate(("list", list_name))
+
+def get_list_items(list_name):
+    cached = memory_cache.get(("list", list_name))
+    if cached is not _MISSING:
+        return cached
+    version = memory_cache.version
+    try:
+        rows = memory_store.query("SELECT item FROM list_items WHERE list_name = ? ORDER BY id", (list_name,))
+    except sqlite3.Error as e:
+        logging.error(f"Failed to retrieve list {list_name}: {str(e)}")
+        return ()
+    items = tuple(r[0] for r in rows)
+    memory_cache.put(("list", list_name), items, version)
+    return items
+
+def get_list_names():
+    try:
+        return [r[0] for r in memory_store.query("SELECT DISTINCT list_name FROM list_items ORDER BY list_name")]
+    except sqlite3.Error as e:
+        logging.error(f"Failed to retrieve list names: {str(e)}")
+        return []
+
+def add_reminder_entry(task, fire_at):
+    # Storing the same task for the same time again returns the existing reminder's id
+    try:
+        memory_store.execute("INSERT OR IGNORE INTO reminders (task, fire_at, created_at) VALUES (?, ?, ?)",
+                             (task, fire_at, datetime.now().isoformat()))
+        row = memory_store.query_one("SELECT id FROM reminders WHERE task = ? AND fire_at = ?", (task, fire_at))
+        logging.info(f"Stored reminder: task={task}, time={fire_at}")
+        return row[0]
+    except sqlite3.Error as e:
+        logging.error(f"Failed to store reminder {task}: {str(e)}")
+        return None
+
+def get_reminders():
+    try:
+        rows = memory_store.query("SELECT id, task, fire_at FROM reminders ORDER BY fire_at")
+        return [{"id": r[0], "task": r[1], "time": r[2]} for r in rows]
+    except sqlite3.Error as e:
+        logging.error(f"Failed to retrieve reminders: {str(e)}")
+        return []
+
+def get_pending_reminders(after=None, before=None):
+    after = after or datetime.now().isoformat()
+    try:
+        if before is None:
+            rows = memory_store.query("SELECT id, task, fire_at FROM reminders "
+                                      "WHERE status = 'pending' AND fire_at > ? ORDER BY fire_at", (after,))
+        else:
+            rows = memory_store.query("SELECT id, task, fire_at FROM reminders "
+                                      "WHERE status = 'pending' AND fire_at > ? AND fire_at < ? ORDER BY fire_at",
+                                      (after, before))
+        return [{"id": r[0], "task": r[1], "time": r[2]} for r in rows]
+    except sqlite3.Error as e:
+        logging.error(f"Failed to retrieve pending reminders: {str(e)}")
+        return []
+
+def get_reminders_due(start, end):
+    try:
+        rows = memory_store.query("SELECT id, task, fire_at FROM reminders "
+                                  "WHERE status = 'pending' AND fire_at >= ? AND fire_at < ? ORDER BY fire_at",
+                                  (start, end))
+        return [{"id": r[0], "task": r[1], "time": r[2]} for r in rows]
+    except sqlite3.Error as e:
+        logging.error(f"Failed to retrieve reminders due between {start} and {end}: {str(e)}")
+        return []
+
+def get_reminder(reminder_id):
+    try:
+        row = memory_store.query_one("SELECT id, task, fire_at, status FROM reminders WHERE id = ?", (reminder_id,))
+        return {"id": row[0], "task": row[1], "time": row[2], "status": row[3]} if row else None
+    except sqlite3.Error as e:
+        logging.error(f"Failed to retrieve reminder {reminder_id}: {str(e)}")
+        return None
+
+def mark_reminder_fired(reminder_id):
+    # True only for the first caller, so a reminder is never announced twice
+    try:
+        cursor = memory_store.execute("UPDATE reminders SET status = 'fired', fired_at = ? "
+                                      "WHERE id = ? AND status = 'pending'", (datetime.now().isoformat(), reminder_id))
+        return cursor.rowcount == 1
+    except sqlite3.Error as e:
+        logging.error(f"Failed to mark reminder {reminder_id} fired: {str(e)}")
+        return False
+
+def mark_missed_reminders(before):
+    try:
+        return memory_store.execute("UPDATE reminders SET status = 'missed' "
+                                    "WHERE status = 'pending' AND fire_at < ?", (before,)).rowcount
+    except sqlite3.Error as e:
+        logging.error(f"Failed to mark missed reminders: {str(e)}")
+        return 0
+
+def prune_conversation(before, batch_size):
+    # Ids grow with time, so the oldest rows are found by walking the primary key from the start
+    try:
+        return memory_store.execute("DELETE FROM conversation WHERE id IN (SELECT id FROM conversation "
+                                    "WHERE timestamp < ? ORDER BY id LIMIT ?)", (before, batch_size)).rowcount
+    except sqlite3.Error as e:
+        logging.error(f"Failed to prune conversation: {str(e)}")
+        return 0
+
+def prune_reminders(before, batch_size):
+    # Fired and missed reminders only; pending ones are kept however old they are
+    try:
+        return memory_store.execute("DELETE FROM reminders WHERE id IN (SELECT id FROM reminders "
+                                    "WHERE status IN ('fired', 'missed') AND fire_at < ? LIMIT ?)",
+                                    (before, batch_size)).rowcount
+    except sqlite3.Error as e:
+        logging.error(f"Failed to prune reminders: {str(e)}")
+        return 0
+
+def get_list_sizes():
+    try:
+        return dict(memory_store.query("SELECT list_name, COUNT(*) FROM list_items GROUP BY list_name ORDER BY list_name"))
+    except sqlite3.Error as e:
+        logging.error(f"Failed to count list items: {str(e)}")
+        return {}
+
+def get_command_timestamps(phrase, limit=14):
+    try:
+        rows = memory_store.query("SELECT timestamp FROM conversation WHERE command LIKE ? ORDER BY id DESC LIMIT ?",
+                                  (f"%{phrase}%", limit))
+        return [r[0] for r in rows if r[0]]
+    except sqlite3.Error as e:
+        logging.error(f"Failed to retrieve command timestamps for {phrase}: {str(e)}")
+        return []
+
+def get_geocode(query):
+    try:
+        row = memory_store.query_one("SELECT name, latitude, longitude FROM geocode_cache WHERE query = ?", (query,))
+        return {"name": row[0], "latitude": row[1], "longitude": row[2]} if row else None
+    except sqlite3.Error as e:
+        logging.error(f"Failed to read geocode for {query}: {str(e)}")
+        return None
+
+def store_geocode(query, name, latitude, longitude):
+    try:
+        memory_store.execute("INSERT OR REPLACE INTO geocode_cache (query, name, latitude, longitude, resolved_at) "
+                             "VALUES (?, ?, ?, ?, ?)", (query, name, latitude, longitude, datetime.now().isoformat()))
+    except sqlite3.Error as e:
+        logging.error(f"Failed to store geocode for {query}: {str(e)}")
 
 def get_conversation_history(limit=10):
+    conversation_logger.flush()
     try:
-        conn = sqlite3.connect('jarvis_memory.db')
-        c = conn.cursor()
-        c.execute("SELECT command, response, timestamp FROM conversation ORDER BY id DESC LIMIT ?", (limit,))
-        results = c.fetchall()
-        conn.close()
+        results = memory_store.query(
+            "SELECT command, response, timestamp FROM conversation ORDER BY id DESC LIMIT ?", (limit,))
         return [{"command": r[0], "response": r[1], "timestamp": r[2]} for r in results]
     except sqlite3.Error as e:
         logging.error(f"Failed to retrieve conversation history: {str(e)}")
         return []
 
-def store_conversation(command, response):
+SEARCH_STOPWORDS = {"a", "an", "the", "and", "or", "of", "to", "in", "on", "at", "for", "is", "it", "we", "i",
+                    "you", "my", "me", "about", "what", "did", "say", "said"}
+
+def search_terms(text):
+    words = re.findall(r"\w+", text.lower())
+    return [w for w in words if w not in SEARCH_STOPWORDS] or words
+
+def search_snippet(text, terms, width=120):
+    # The sentence of `text` that mentions a search term, clipped for speaking
+    sentences = re.split(r"(?<=[.!?])\s+", text or "")
+    sentence = next((x for x in sentences if any(t in x.lower() for t in terms)), sentences[0])
+    return sentence if len(sentence) <= width else sentence[:width].rsplit(" ", 1)[0] + "..."
+
+def conversation_exchange(row_id, max_rows=20):
+    # The command at or before `row_id` and the responses spoken after it, up to the next command
+    anchor = memory_store.query_one("SELECT id, command, timestamp FROM conversation "
+                                    "WHERE id <= ? AND command IS NOT NULL ORDER BY id DESC LIMIT 1", (row_id,))
+    if anchor is None:
+        # Spoken before any command, e.g. the startup greeting
+        row = memory_store.query_one("SELECT id, response, timestamp FROM conversation WHERE id = ?", (row_id,))
+        return row and {"id": row[0], "command": None, "responses": [row[1]], "timestamp": row[2]}
+    responses = []
+    for command, response in memory_store.query("SELECT command, response FROM conversation WHERE id > ? "
+                                                 "ORDER BY id LIMIT ?", (anchor[0], max_rows)):
+        if command is not None:
+            break
+        if response:
+            responses.append(response)
+    return {"id": anchor[0], "command": anchor[1], "responses": responses, "timestamp": anchor[2]}
+
+def search_conversation(text, limit=5, offset=0, candidates=SEARCH_CANDIDATES, exclude_phrases=()):
+    """Exchanges matching the words of `text`, best first, as (exchanges, has_more).
+
+    An exchange is a command with the responses spoken after it; a matching response row
+    stands for the command before it. The newest `candidates` FTS matches are ranked by bm25,
+    with the command weighted above the response, which keeps a common word from ranking a
+    year of history. Without FTS5, a LIKE scan returns the newest matches first. Exchanges
+    whose command contains one of `exclude_phrases` (the searches themselves) are skipped.
+    """
+    conversation_logger.flush()
+    terms = search_terms(text)
+    if not terms:
+        return [], False
     try:
-        conn = sqlite3.connect('jarvis_memory.db')
-        c = conn.cursor()
-        timestamp = datetime.now().isoformat()
-        c.execute("INSERT INTO conversation (command, response, timestamp) VALUES (?, ?, ?)",
-                  (command, response, timestamp))
-        conn.commit()
-        conn.close()
-        logging.info(f"Stored conversation: {command}")
+        if fts_enabled:
+            # Quoted terms are matched literally; any term may match, rows matching more rank higher
+            match = " OR ".join('"' + t.replace('"', '""') + '"' for t in terms)
+            cursor = memory_store.connection().execute(
+                "SELECT rowid FROM (SELECT rowid, bm25(conversation_fts, 2.0, 1.0) AS score FROM conversation_fts "
+                "WHERE conversation_fts MATCH ? ORDER BY rowid DESC LIMIT ?) ORDER BY score", (match, candidates))
+        else:
+            pattern = "%" + " ".join(terms) + "%"
+            cursor = memory_store.connection().execute(
+                "SELECT id FROM conversation WHERE command LIKE ? OR response LIKE ? ORDER BY id DESC",
+                (pattern, pattern))
+        exchanges = []
+        seen = set()
+        # Matches are mapped to exchanges lazily, only as far as the requested page needs
+        for row_id, in cursor:
+            exchange = conversation_exchange(row_id)
+            if exchange is None or exchange["id"] in seen:
+                continue
+            seen.add(exchange["id"])
+            if exchange["command"] and any(p in exchange["command"].lower() for p in exclude_phrases):
+                continue
+            exchanges.append(exchange)
+            if len(exchanges) > offset + limit:
+                break
+        cursor.close()
+        results = [{"command": e["command"], "response": " ".join(e["responses"]) or None,
+                    "timestamp": e["timestamp"],
+                    "snippet": search_snippet(" ".join(e["responses"]), terms) if e["responses"] else None}
+                   for e in exchanges[offset:offset + limit]]
+        return results, len(exchanges) > offset + limit
     except sqlite3.Error as e:
-        logging.error(f"Failed to store conversation: {str(e)}")
+        logging.error(f"Conversation search failed for {text}: {str(e)}")
+        return [], False
+
+def get_conversation_since(after_id, limit=None):
+    # The newest `limit` rows after `after_id`, oldest first
+    conversation_logger.flush()
+    try:
+        if limit is None:
+            rows = memory_store.query("SELECT id, command, response FROM conversation WHERE id > ? ORDER BY id",
+                                      (after_id,))
+        else:
+            rows = memory_store.query("SELECT id, command, response FROM conversation WHERE id > ? "
+                                      "ORDER BY id DESC LIMIT ?", (after_id, limit))[::-1]
+        return [{"id": r[0], "command": r[1], "response": r[2]} for r in rows]
+    except sqlite3.Error as e:
+        logging.error(f"Failed to retrieve conversation after {after_id}: {str(e)}")
+        return []
+
+def get_latest_summary():
+    try:
+        row = memory_store.query_one("SELECT end_id, summary FROM conversation_summary ORDER BY end_id DESC LIMIT 1")
+        return {"end_id": row[0], "summary": row[1]} if row else None
+    except sqlite3.Error as e:
+        logging.error(f"Failed to retrieve conversation summary: {str(e)}")
+        return None
+
+def store_summary(end_id, summary, keep=10):
+    try:
+        with memory_store.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO conversation_summary (end_id, summary, created_at) VALUES (?, ?, ?)",
+                         (end_id, summary, datetime.now().isoformat()))
+            conn.execute("DELETE FROM conversation_summary WHERE end_id NOT IN "
+                         "(SELECT end_id FROM conversation_summary ORDER BY end_id DESC LIMIT ?)", (keep,))
+    except sqlite3.Error as e:
+        logging.error(f"Failed to store conversation summary up to {end_id}: {str(e)}")
+
+def store_conversation(command, response):
+    conversation_logger.log(command, response)
+    logging.info(f"Queued conversation: {command}")
+
+def flush_conversations():
+    conversation_logger.stop()
 
 def set_preference(key, value):
     data = {"type": "preference", "value": value, "timestamp": datetime.now().isoformat()}
@@ -96,26 +748,9 @@ def set_preference(key, value):
     logging.info(f"Set preference {key} to {value}")
 
 def get_preference(key):
-    data = retrieve_memory(f"preference_{key}")
-    if data:
-        try:
-            return json.loads(data)["value"]
-        except json.JSONDecodeError:
-            logging.error(f"Failed to parse preference JSON for key={key}")
-            return None
-    return None
-
-def load_reminders():
-    try:
-        from core.scheduler import add_reminder  # Import here
-        reminders = retrieve_memory("reminders")
-        if reminders:
-            reminder_data = json.loads(reminders)
-            if reminder_data["type"] == "reminders":
-                for item in reminder_data["items"]:
-                    task = item["task"]
-                    time_str = item["time"]
-                    add_reminder(task, time_str)
-                logging.info("Reminders loaded from database")
-    except (sqlite3.Error, json.JSONDecodeError, KeyError) as e:
-        logging.error(f"Failed to load reminders: {str(e)}")
\ No newline at end of file
+    try:
+        data = retrieve_memory_json(f"preference_{key}")
+    except json.JSONDecodeError:
+        logging.error(f"Failed to parse preference JSON for key={key}")
+        return None
+    return data["value"] if data else None
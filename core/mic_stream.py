@@ -0,0 +1,182 @@
+import logging
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import speech_recognition as sr
+
+
+class MicrophoneStream:
+    """Keeps one microphone capture open and buffers the last buffer_s seconds of audio.
+
+    A reader thread appends every chunk to a ring buffer together with its RMS energy,
+    and the noise floor is recalibrated in the background from the quiet chunks. listen()
+    cuts phrases out of the buffer starting where the previous listen() stopped, so no
+    audio is lost between the wake word and the command. Chunks captured while the
+    assistant itself is speaking (muted() returns True) cannot start a phrase.
+    """
+
+    def __init__(self, microphone, buffer_s=30, calibration_s=0.5, energy_ratio=1.5, min_energy=100,
+                 pause_s=0.8, pre_roll_s=0.5, muted=None):
+        self.microphone = microphone
+        self.buffer_s = buffer_s
+        self.calibration_s = calibration_s
+        self.energy_ratio = energy_ratio
+        self.min_energy = min_energy
+        self.pause_s = pause_s
+        self.pre_roll_s = pre_roll_s
+        self.muted = muted
+        self.sample_rate = None
+        self.sample_width = None
+        self.chunk_s = None
+        self.energy_threshold = 300
+        self.noise_floor = None
+        self._calibration_chunks = 0
+        self._chunks = None
+        self._seq = 0
+        self._cursor = 0
+        self._cond = threading.Condition()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.error = None
+        self.started_at = None
+        self.dead_s = 0.0
+        self.phrases = 0
+        self.last_phrase_end_at = None
+
+    def start(self, timeout=5):
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, name="mic-stream", daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout):
+            raise RuntimeError("Microphone stream did not start")
+        if self.error is not None:
+            raise self.error
+        return self
+
+    def _run(self):
+        try:
+            with self.microphone as source:
+                self.sample_rate = source.SAMPLE_RATE
+                self.sample_width = source.SAMPLE_WIDTH
+                chunk = source.CHUNK
+                self.chunk_s = chunk / self.sample_rate
+                self._chunks = deque(maxlen=max(1, int(self.buffer_s / self.chunk_s)))
+                self.started_at = time.perf_counter()
+                self._ready.set()
+                logging.info(f"Microphone stream open: {self.sample_rate} Hz, {chunk} frames per chunk, "
+                             f"{self.buffer_s} s ring buffer")
+                while not self._stop.is_set():
+                    data = source.stream.read(chunk)
+                    # sr.Microphone always captures 16-bit samples
+                    samples = np.frombuffer(data, dtype="<i2").astype(np.float32)
+                    energy = float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+                    muted = bool(self.muted()) if self.muted else False
+                    with self._cond:
+                        self._chunks.append((data, energy, muted))
+                        self._seq += 1
+                        self._calibrate(energy, muted)
+                        self._cond.notify_all()
+        except Exception as e:
+            logging.error(f"Microphone stream failed: {e}")
+            self.error = e
+        finally:
+            self._ready.set()
+            with self._cond:
+                self._cond.notify_all()
+
+    def _calibrate(self, energy, muted):
+        if muted:
+            return
+        if self._calibration_chunks * self.chunk_s < self.calibration_s:
+            # Initial calibration: plain average over the first calibration_s of audio
+            self._calibration_chunks += 1
+            previous = self.noise_floor or 0.0
+            self.noise_floor = previous + (energy - previous) / self._calibration_chunks
+        elif energy < self.energy_threshold:
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * energy
+        else:
+            return
+        self.energy_threshold = max(self.min_energy, self.noise_floor * self.energy_ratio)
+
+    def _wait_chunk(self, pos, deadline):
+        # Returns (pos, chunk), moving pos forward if it already fell out of the ring buffer
+        with self._cond:
+            while pos >= self._seq:
+                if self.error is not None:
+                    raise RuntimeError(f"Microphone stream failed: {self.error}")
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return pos, None
+                self._cond.wait(remaining)
+            first = self._seq - len(self._chunks)
+            if pos < first:
+                self.dead_s += (first - pos) * self.chunk_s
+                logging.warning(f"Microphone buffer overrun: {(first - pos) * self.chunk_s:.2f} s not examined")
+                pos = first
+            return pos, self._chunks[pos - first]
+
+    def _slice(self, start, end):
+        with self._cond:
+            first = self._seq - len(self._chunks)
+            return b"".join(data for data, _, _ in list(self._chunks)[max(start, first) - first:end - first])
+
+    def listen(self, timeout=None, phrase_time_limit=None):
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        scan_start = pos = self._cursor
+        pre_roll = int(self.pre_roll_s / self.chunk_s)
+        pause_chunks = max(1, int(self.pause_s / self.chunk_s))
+        limit = int(phrase_time_limit / self.chunk_s) if phrase_time_limit else None
+        start = None
+        silent = 0
+        while True:
+            pos, chunk = self._wait_chunk(pos, deadline if start is None else None)
+            if chunk is None:
+                self._cursor = pos
+                raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+            _, energy, muted = chunk
+            pos += 1
+            if start is None:
+                if energy > self.energy_threshold and not muted:
+                    start = max(pos - 1 - pre_roll, scan_start)
+                continue
+            silent = 0 if energy > self.energy_threshold else silent + 1
+            if silent >= pause_chunks or (limit is not None and pos - start >= limit):
+                break
+        self._cursor = pos
+        self.phrases += 1
+        # perf_counter time at which the speaker stopped, derived from the chunk position
+        self.last_phrase_end_at = self.started_at + (pos - silent) * self.chunk_s
+        return sr.AudioData(self._slice(start, pos), self.sample_rate, self.sample_width)
+
+    def dead_time(self):
+        stats = self.stats()
+        return stats["capture_gap_s"] + stats["dead_s"]
+
+    def stats(self):
+        wall_s = time.perf_counter() - self.started_at if self.started_at else 0.0
+        captured_s = self._seq * self.chunk_s if self.chunk_s else 0.0
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "captured_s": round(captured_s, 2),
+            # Wall time the reader was not capturing
+            "capture_gap_s": round(max(0.0, wall_s - captured_s), 2),
+            # Captured audio that fell out of the ring buffer before any listener examined it
+            "dead_s": round(self.dead_s, 2),
+            "phrases": self.phrases,
+            "noise_floor": round(self.noise_floor, 1) if self.noise_floor is not None else None,
+            "energy_threshold": round(self.energy_threshold, 1),
+        }
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        logging.info(f"Microphone stream stopped: {self.stats()}")
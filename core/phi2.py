@@ -1,52 +1,143 @@
 import logging
 import requests
 import json
+import time
+from requests.adapters import HTTPAdapter
+from config.settings import (OLLAMA_URL, OLLAMA_KEEP_ALIVE, OLLAMA_CONNECT_TIMEOUT, OLLAMA_READ_TIMEOUT,
+                             SEGMENT_MIN_CHARS, SEGMENT_MAX_CHARS)
+from core.segmenter import SentenceSegmenter
+from core.event_loop import event_loop
+
+# Ollama reports how long it spent loading the model; anything above this was a cold start
+COLD_LOAD_THRESHOLD_S = 0.5
 
 class Phi2Service:
-    def __init__(self, model_name="phi"):
+    def __init__(self, model_name="phi", base_url=OLLAMA_URL, keep_alive=OLLAMA_KEEP_ALIVE,
+                 connect_timeout=OLLAMA_CONNECT_TIMEOUT, read_timeout=OLLAMA_READ_TIMEOUT, warm_up=True,
+                 response_cache=None):
         self.model_name = model_name
-        self.api_url = "http://localhost:11434/api/generate"
+        self.base_url = base_url.rstrip("/")
+        self.api_url = f"{self.base_url}/api/generate"
+        self.keep_alive = keep_alive
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.latency = {"cold": [], "warm": []}
+        self.model_load_s = None
+        self.response_cache = response_cache
         logging.info(f"Initializing Phi-2 service with Ollama model: {model_name}")
         try:
-            response = requests.post(self.api_url, json={"model": model_name, "prompt": "Test", "stream": False})
-            if response.status_code == 200:
-                logging.info("Phi-2 Ollama service initialized successfully")
-            else:
-                raise Exception(f"Ollama server responded with status {response.status_code}")
+            self.check_alive()
+            logging.info("Phi-2 Ollama service initialized successfully")
         except Exception as e:
             logging.error(f"Failed to connect to Ollama server: {str(e)}")
             raise
+        self.warm_up_future = event_loop.submit(event_loop.to_thread(self.warm_up)) if warm_up else None
+
+    def check_alive(self):
+        response = self.session.get(f"{self.base_url}/api/tags", timeout=self.timeout)
+        if response.status_code != 200:
+            raise Exception(f"Ollama server responded with status {response.status_code}")
+        models = {m.get("name", "") for m in response.json().get("models", [])}
+        if models and self.model_name not in models and f"{self.model_name}:latest" not in models:
+            raise Exception(f"Ollama model {self.model_name} is not installed")
+        return True
+
+    def warm_up(self):
+        # A generate request without a prompt only loads the model and pins it for keep_alive
+        start = time.perf_counter()
+        try:
+            response = self.session.post(self.api_url, json={"model": self.model_name, "keep_alive": self.keep_alive},
+                                         timeout=self.timeout)
+            response.raise_for_status()
+            self.model_load_s = time.perf_counter() - start
+            logging.info(f"Phi-2 model loaded in {self.model_load_s * 1000:.0f} ms "
+                         f"(keep_alive={self.keep_alive})")
+        except Exception as e:
+            logging.error(f"Phi-2 warm-up failed: {str(e)}")
 
-    def generate_response(self, prompt, max_length=200):
+    def record_latency(self, first_token_s, load_duration_s):
+        kind = "cold" if load_duration_s > COLD_LOAD_THRESHOLD_S else "warm"
+        self.latency[kind].append(first_token_s)
+        logging.info(f"Phi-2 first token after {first_token_s * 1000:.0f} ms "
+                     f"({kind} model, load {load_duration_s * 1000:.0f} ms)")
+
+    def latency_stats(self):
+        stats = {}
+        if self.model_load_s is not None:
+            stats["warm_up_ms"] = round(self.model_load_s * 1000, 1)
+        for kind, samples in self.latency.items():
+            if samples:
+                stats[kind] = {"calls": len(samples),
+                               "avg_first_token_ms": round(sum(samples) / len(samples) * 1000, 1),
+                               "max_first_token_ms": round(max(samples) * 1000, 1)}
+        return stats
+
+    async def generate_async(self, prompt, max_length=200, use_cache=True):
+        # Collects the whole answer on the I/O pool, for callers that overlap it with other requests
+        return await event_loop.to_thread(lambda: list(self.generate_response(prompt, max_length, use_cache)))
+
+    def generate_response(self, prompt, max_length=200, use_cache=True, cache_key=None, cancel=None):
+        # cache_key lets callers key the cache on less than the full prompt (the question plus a
+        # fingerprint of its context); cancel is an Event that abandons the request between tokens
+        options = {"max_tokens": max_length, "temperature": 0.7, "top_p": 0.9}
+        cache = self.response_cache if use_cache else None
+        key = cache_key or prompt
+        if cache is not None:
+            cached = cache.get(key, self.model_name, options)
+            if cached is not None:
+                logging.info(f"Phi-2 response served from cache ({len(cached)} sentences)")
+                yield from cached
+                return
+        sentences = []
+        failed = False
+        for sentence in self._stream_sentences(prompt, options, cancel):
+            if sentence is None:
+                failed = True
+                continue
+            sentences.append(sentence)
+            yield sentence
+        if cache is not None and sentences and not failed:
+            cache.put(key, self.model_name, options, sentences)
+
+    def _stream_sentences(self, prompt, options, cancel=None):
+        # Yields None before the error sentence so callers can tell a failure from a real answer;
+        # a cancelled request yields None alone and closes the stream, which stops Ollama generating
         try:
             payload = {
                 "model": self.model_name,
                 "prompt": prompt,
-                "max_tokens": max_length,
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "stream": True
+                **options,
+                "stream": True,
+                "keep_alive": self.keep_alive
             }
-            with requests.post(self.api_url, json=payload, stream=True) as response:
+            start = time.perf_counter()
+            first_token_s = None
+            with self.session.post(self.api_url, json=payload, stream=True, timeout=self.timeout) as response:
                 response.raise_for_status()
-                buffer = ""
+                segmenter = SentenceSegmenter(SEGMENT_MIN_CHARS, SEGMENT_MAX_CHARS)
                 for line in response.iter_lines():
+                    if cancel is not None and cancel.is_set():
+                        logging.info("Phi-2 generation cancelled")
+                        yield None
+                        return
                     if line:
                         data = json.loads(line.decode('utf-8'))
+                        if first_token_s is None and data.get("response"):
+                            first_token_s = time.perf_counter() - start
+                        if data.get("done") and first_token_s is not None:
+                            self.record_latency(first_token_s, data.get("load_duration", 0) / 1e9)
                         if "response" in data:
-                            buffer += data["response"]
-                            while '.' in buffer or '!' in buffer or '?' in buffer:
-                                end_idx = min(
-                                    buffer.find('.') if '.' in buffer else len(buffer),
-                                    buffer.find('!') if '!' in buffer else len(buffer),
-                                    buffer.find('?') if '?' in buffer else len(buffer)
-                                )
-                                if end_idx < len(buffer):
-                                    sentence = buffer[:end_idx + 1].strip()
-                                    buffer = buffer[end_idx + 1:].strip()
-                                    yield sentence
-                if buffer:
-                    yield buffer.strip()
+                            yield from segmenter.feed(data["response"])
+                yield from segmenter.flush()
         except Exception as e:
             logging.error(f"Phi-2 generation failed: {str(e)}")
-            yield f"Error generating response: {str(e)}"
\ No newline at end of file
+            yield None
+            yield f"Error generating response: {str(e)}"
+
+    def close(self):
+        logging.info(f"Phi-2 latency: {self.latency_stats()}")
+        if self.response_cache is not None:
+            logging.info(f"Phi-2 response cache: {self.response_cache.stats()}")
+            self.response_cache.store.close()
+        self.session.close()
@@ -0,0 +1,82 @@
+import datetime
+import logging
+import sqlite3
+import threading
+import time
+from core.scheduler import scheduler
+from core.memory import memory_store, prune_conversation, prune_reminders, conversation_logger
+from config.settings import (RETENTION_TIME, CONVERSATION_RETENTION_DAYS, REMINDER_RETENTION_DAYS,
+                             RETENTION_BATCH_ROWS, RETENTION_VACUUM_PAGES, RETENTION_CONVERT_AUTO_VACUUM)
+
+RETENTION_JOB_ID = "memory-retention"
+# Between batches the write lock is released so the conversation logger never waits long
+BATCH_PAUSE_S = 0.01
+
+_last_report = None
+_lock = threading.Lock()
+
+
+def prune_in_batches(prune, *args):
+    removed = 0
+    while True:
+        count = prune(*args, RETENTION_BATCH_ROWS)
+        removed += count
+        if count < RETENTION_BATCH_ROWS:
+            return removed
+        time.sleep(BATCH_PAUSE_S)
+
+
+def vacuum_store(store):
+    # Returns the bytes given back to the filesystem
+    before = store.size_bytes()
+    if not store.incremental_vacuum_enabled():
+        if not RETENTION_CONVERT_AUTO_VACUUM:
+            # Pruned pages stay in the file and are reused by later writes
+            logging.info(f"{store.db_path} predates incremental auto-vacuum; "
+                         f"set RETENTION_CONVERT_AUTO_VACUUM to convert it once")
+            return 0
+        store.convert_to_incremental_vacuum()
+        logging.info(f"Converted {store.db_path} to incremental auto-vacuum")
+    while store.free_pages() > 0:
+        store.incremental_vacuum(RETENTION_VACUUM_PAGES)
+        time.sleep(BATCH_PAUSE_S)
+    return before - store.size_bytes()
+
+
+def compact(llm_cache=None, now=None):
+    global _last_report
+    now = now or datetime.datetime.now()
+    start = time.perf_counter()
+    report = {"conversation_rows": 0, "reminder_rows": 0, "llm_cache_rows": 0, "bytes_reclaimed": 0}
+    try:
+        # Rows still queued in the write-behind logger are written first so the prune sees them
+        conversation_logger.flush()
+        report["conversation_rows"] = prune_in_batches(
+            prune_conversation, (now - datetime.timedelta(days=CONVERSATION_RETENTION_DAYS)).isoformat())
+        report["reminder_rows"] = prune_in_batches(
+            prune_reminders, (now - datetime.timedelta(days=REMINDER_RETENTION_DAYS)).isoformat())
+        report["bytes_reclaimed"] += vacuum_store(memory_store)
+        if llm_cache is not None:
+            report["llm_cache_rows"] = prune_in_batches(llm_cache.purge_expired)
+            report["bytes_reclaimed"] += vacuum_store(llm_cache.store)
+    except sqlite3.Error as e:
+        logging.error(f"Memory compaction failed: {str(e)}")
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    report["finished_at"] = datetime.datetime.now().isoformat(timespec="seconds")
+    with _lock:
+        _last_report = report
+    logging.info(f"Memory compaction: {report}")
+    return report
+
+
+def last_report():
+    with _lock:
+        return _last_report
+
+
+def schedule_retention(llm_cache=None):
+    # Runs on the scheduler's worker threads, never on the voice loop
+    hour, minute = map(int, RETENTION_TIME.split(":"))
+    scheduler.add_job(compact, "cron", hour=hour, minute=minute, args=[llm_cache], id=RETENTION_JOB_ID,
+                      replace_existing=True, misfire_grace_time=3600, coalesce=True)
+    logging.info(f"Memory retention scheduled daily at {RETENTION_TIME}")
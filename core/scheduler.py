@@ -1,45 +1,76 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 import datetime
-import json
 import logging
-from core.memory import retrieve_memory, store_memory
+from core.memory import (add_reminder_entry, get_pending_reminders, get_reminder, mark_reminder_fired,
+                         mark_missed_reminders, normalize_reminder_time)
 from core.speech import speak
+from config.settings import REMINDER_WINDOW_S, REMINDER_GRACE_S
 
+# Jobs added before start_scheduler() are held by APScheduler and run once it starts
 scheduler = BackgroundScheduler()
-scheduler.start()
+
+REMINDER_WINDOW_JOB_ID = "reminder-window"
+
+
+def start_scheduler():
+    if not scheduler.running:
+        scheduler.start()
+
+
+def reminder_job_id(reminder_id):
+    return f"reminder-{reminder_id}"
+
+
+def fire_reminder(reminder_id):
+    # Marking the row first means a reminder that was scheduled twice is still spoken once
+    reminder = get_reminder(reminder_id)
+    if reminder is None or not mark_reminder_fired(reminder_id):
+        return
+    speak(f"It's time to {reminder['task']}")
+    logging.info(f"Fired reminder {reminder_id}: {reminder['task']}")
+
+
+def schedule_reminder(reminder_id, fire_at):
+    scheduler.add_job(fire_reminder, 'date', run_date=datetime.datetime.fromisoformat(fire_at), args=[reminder_id],
+                      id=reminder_job_id(reminder_id), replace_existing=True, misfire_grace_time=REMINDER_GRACE_S)
+
+
+def schedule_reminder_window():
+    """Gives the pending reminders of the next REMINDER_WINDOW_S a scheduler job each.
+
+    The reminders table is the durable store; only its near end is held as jobs, and
+    this runs again every half window so nothing comes due unscheduled. Loading is
+    one indexed range query, however many reminders have fired before.
+    """
+    now = datetime.datetime.now()
+    after = (now - datetime.timedelta(seconds=REMINDER_GRACE_S)).isoformat()
+    before = (now + datetime.timedelta(seconds=REMINDER_WINDOW_S)).isoformat()
+    reminders = get_pending_reminders(after, before)
+    for reminder in reminders:
+        if scheduler.get_job(reminder_job_id(reminder["id"])) is None:
+            schedule_reminder(reminder["id"], reminder["time"])
+    return len(reminders)
+
 
 def load_reminders():
-    reminders = retrieve_memory("reminders")
-    if reminders:
-        try:
-            reminders = json.loads(reminders)
-            for reminder in reminders["items"]:
-                try:
-                    reminder_time = datetime.datetime.fromisoformat(reminder["time"])
-                    if reminder_time > datetime.datetime.now():
-                        scheduler.add_job(lambda: speak(f"It's time to {reminder['task']}"), 'date', run_date=reminder_time)
-                        logging.info(f"Scheduled reminder: task={reminder['task']}, time={reminder['time']}")
-                except ValueError:
-                    logging.error(f"Invalid time format for reminder: {reminder['time']}")
-                    continue
-        except json.JSONDecodeError:
-            logging.error("Failed to parse reminders JSON")
-            return
+    # Reminders that came due while JARVIS was off, beyond the grace period, are not announced late
+    missed = mark_missed_reminders((datetime.datetime.now() - datetime.timedelta(seconds=REMINDER_GRACE_S)).isoformat())
+    if missed:
+        logging.info(f"Marked {missed} reminders as missed")
+    count = schedule_reminder_window()
+    scheduler.add_job(schedule_reminder_window, 'interval', seconds=REMINDER_WINDOW_S / 2, id=REMINDER_WINDOW_JOB_ID,
+                      replace_existing=True, coalesce=True)
+    logging.info(f"Scheduled {count} reminders due in the next {REMINDER_WINDOW_S // 3600} hours")
+
 
 def add_reminder(task, time_str):
     try:
-        reminder_time = datetime.datetime.fromisoformat(time_str)
-        reminders = retrieve_memory("reminders")
-        if not reminders:
-            reminders = {"type": "reminders", "items": [], "next_id": 1}
-        else:
-            reminders = json.loads(reminders)
-        new_id = reminders["next_id"]
-        reminders["items"].append({"id": new_id, "task": task, "time": time_str})
-        reminders["next_id"] = new_id + 1
-        store_memory("reminders", json.dumps(reminders))
-        if reminder_time > datetime.datetime.now():
-            scheduler.add_job(lambda: speak(f"It's time to {task}"), 'date', run_date=reminder_time)
+        fire_at = normalize_reminder_time(time_str)
+        reminder_id = add_reminder_entry(task, fire_at)
+        reminder_time = datetime.datetime.fromisoformat(fire_at)
+        horizon = datetime.datetime.now() + datetime.timedelta(seconds=REMINDER_WINDOW_S)
+        if reminder_id is not None and datetime.datetime.now() < reminder_time < horizon:
+            schedule_reminder(reminder_id, fire_at)
             logging.info(f"Added reminder: task={task}, time={time_str}")
         from core.speech import jarvis_speak
         jarvis_speak(f"I'll remind you to {task} at {time_str}.", "confirmation")
@@ -0,0 +1,207 @@
+import re
+
+# Followed by a capital these still end a sentence ("... and so on, etc. Next")
+ABBREVIATIONS = {"e.g", "i.e", "etc", "vs", "approx", "cf", "al", "incl", "esp", "fig", "no", "vol"}
+# These are always followed by a name, so they never end a sentence
+TITLES = {"mr", "mrs", "ms", "dr", "prof", "st", "sr", "jr", "mt", "gen", "capt", "sgt", "lt", "col"}
+CLOSERS = "\"')]}”’"
+FENCE = "```"
+
+_CANDIDATES = re.compile(r"[.!?\n]|```")
+# A chunk without any of these cannot complete a boundary or a fence
+_has_trigger = re.compile(r"[.!?\n`]").search
+
+
+class SentenceSegmenter:
+    """Incremental sentence splitter for streamed LLM text.
+
+    Every character is scanned once: chunks are buffered as pieces and only joined
+    and scanned when one could end a sentence, the scan position only moves forward,
+    and a boundary that needs more lookahead resumes from where it stopped. Decimals,
+    abbreviations and fenced code blocks are not split, fragments shorter than
+    min_chars are merged with the next sentence, and text without a boundary is
+    cut at a clause or word break once it reaches max_chars.
+    """
+
+    def __init__(self, min_chars=12, max_chars=300):
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._text = ""
+        self._pieces = []
+        self._size = 0
+        self._scan = 0
+        self._code_scan = 0
+        self._in_code = False
+        self._waiting = False
+        self._code_newline = False
+
+    def feed(self, chunk):
+        self._pieces.append(chunk)
+        self._size += len(chunk)
+        if self._in_code:
+            # Code ends at a fence and long code is released at a newline; nothing else needs a scan
+            if "\n" in chunk:
+                self._code_newline = True
+            if "`" in chunk or (self._size > self.max_chars and self._code_newline):
+                return self._drain(final=False)
+        elif self._waiting or self._size > self.max_chars or _has_trigger(chunk):
+            return self._drain(final=False)
+        return []
+
+    def flush(self):
+        segments = self._drain(final=True)
+        rest = self._text.strip()
+        if rest:
+            segments.append(rest)
+        self._text = ""
+        self._size = 0
+        self._scan = 0
+        self._code_scan = 0
+        self._in_code = False
+        self._waiting = False
+        self._code_newline = False
+        return segments
+
+    def _emit(self, segments, cut):
+        segment = self._text[:cut].strip()
+        if segment:
+            segments.append(segment)
+        self._text = self._text[cut:]
+        self._scan = 0
+        self._code_scan = 0
+
+    def _drain(self, final):
+        if self._pieces:
+            self._text += "".join(self._pieces)
+            self._pieces = []
+        segments = []
+        while True:
+            if self._in_code:
+                if not self._scan_code(segments, final):
+                    break
+                continue
+            cut = self._next_boundary(segments, final)
+            if cut is None:
+                break
+            if cut == -1:
+                # Prose ends at an opening fence; the fence starts a code block
+                continue
+            if len(self._text[:cut].strip()) < self.min_chars and not final:
+                self._scan = cut
+                continue
+            self._emit(segments, cut)
+        text = self._text
+        if self._in_code:
+            self._waiting = False
+            self._code_newline = text.find("\n", 1) != -1
+        else:
+            if len(text) > self.max_chars:
+                self._split_long(segments)
+                text = self._text
+            # Stopped on a candidate that needs more lookahead: the next chunk decides it, trigger or not
+            self._waiting = self._scan < len(text) and text[self._scan] in ".!?\n"
+        self._size = len(text)
+        return segments
+
+    def _next_boundary(self, segments, final):
+        text = self._text
+        pos = self._scan
+        while True:
+            match = _CANDIDATES.search(text, pos)
+            if match is None:
+                # Leave room for a fence split across chunks
+                self._scan = max(pos, len(text) - 2)
+                return None
+            i = match.start()
+            token = match.group()
+            if token == FENCE:
+                self._emit(segments, i)
+                self._in_code = True
+                self._scan = len(FENCE)
+                return -1
+            if token == "\n":
+                if i + 1 >= len(text):
+                    if final:
+                        return i + 1
+                    self._scan = i
+                    return None
+                if text[i + 1] == "\n":
+                    return i + 2
+                pos = i + 1
+                continue
+            j = i + 1
+            while j < len(text) and text[j] in ".!?":
+                j += 1
+            while j < len(text) and text[j] in CLOSERS:
+                j += 1
+            if j >= len(text):
+                if final:
+                    return j
+                self._scan = i
+                return None
+            if not text[j].isspace():
+                # Decimal point, version number, URL or an abbreviation like "e.g."
+                pos = j
+                continue
+            if token == "." and j == i + 1:
+                verdict = self._abbreviation_verdict(text, i, j, final)
+                if verdict is None:
+                    self._scan = i
+                    return None
+                if not verdict:
+                    pos = j
+                    continue
+            return j
+
+    def _abbreviation_verdict(self, text, i, j, final):
+        # True: sentence ends here. False: abbreviation. None: need more text to decide.
+        k = i
+        while k > 0 and i - k < 12 and (text[k - 1].isalpha() or text[k - 1] == "."):
+            k -= 1
+        word = text[k:i].lower()
+        d = i
+        while d > 0 and i - d < 4 and text[d - 1].isdigit():
+            d -= 1
+        if d < i and (d == 0 or text[d - 1] == "\n"):
+            # Numbered list marker at the start of a line
+            return False
+        if word in TITLES:
+            return False
+        is_initial = len(word) == 1 and text[k].isupper()
+        if word not in ABBREVIATIONS and not is_initial:
+            return True
+        n = j
+        while n < len(text) and text[n].isspace():
+            n += 1
+        if n >= len(text):
+            return True if final else None
+        if is_initial:
+            return not text[n].isupper()
+        return text[n].isupper()
+
+    def _scan_code(self, segments, final):
+        end = self._text.find(FENCE, self._scan)
+        if end != -1:
+            self._in_code = False
+            self._emit(segments, end + len(FENCE))
+            return True
+        self._scan = max(self._scan, len(self._text) - 2)
+        if len(self._text) > self.max_chars:
+            # Long code is released a line at a time so it can still be printed as it streams;
+            # the newline search resumes after text already known to have none
+            end = len(self._text) - 2
+            newline = self._text.rfind("\n", self._code_scan, end)
+            if newline > 0:
+                self._emit(segments, newline + 1)
+                return True
+            self._code_scan = max(self._code_scan, end)
+        return False
+
+    def _split_long(self, segments):
+        while len(self._text) > self.max_chars:
+            window = self._text[:self.max_chars]
+            cut = max(window.rfind(", "), window.rfind("; "), window.rfind(": "))
+            if cut < self.min_chars:
+                cut = window.rfind(" ")
+            cut = cut + 1 if cut >= self.min_chars else self.max_chars
+            self._emit(segments, cut)
@@ -1,13 +1,28 @@
 import speech_recognition as sr
 import asyncio
-import edge_tts
-import tempfile
-import platform
 import os
 import random
 import logging
+import time
+from config.settings import TTS_VOICE, TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES, TTS_STREAMING, TTS_PREWARM_CONCURRENCY
+from config.settings import (VAD_ENABLED, VAD_ENERGY_RATIO, VAD_MIN_ENERGY, VAD_MAX_ZCR, VAD_MIN_SPEECH_MS,
+                             WAKE_TEMPLATE_DIR, WAKE_MAX_DISTANCE)
+from config.settings import WAKE_WORD, WAKE_FILLERS, WAKE_PHRASE_LIMIT_S
+from config.settings import (MIC_BUFFER_S, MIC_CALIBRATION_S, MIC_ENERGY_RATIO, MIC_MIN_ENERGY, MIC_PAUSE_S,
+                             MIC_PRE_ROLL_S)
+from core.tts_cache import TTSCache
+from core.audio import AudioSink
+from core.event_loop import event_loop
+from core.vad import VoiceActivityGate, load_keyword_templates
+from core.mic_stream import MicrophoneStream
 
 recognizer = sr.Recognizer()
+tts_cache = TTSCache(TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES)
+audio_sink = AudioSink()
+wake_gate = VoiceActivityGate(VAD_ENERGY_RATIO, VAD_MIN_ENERGY, VAD_MAX_ZCR, VAD_MIN_SPEECH_MS,
+                              load_keyword_templates(WAKE_TEMPLATE_DIR) if WAKE_TEMPLATE_DIR else None,
+                              WAKE_MAX_DISTANCE)
+mic_stream = None
 
 JARVIS_GREETINGS = [
     "At your service, sir.",
@@ -87,36 +102,100 @@ JARVIS_WEATHER_RESPONSES = [
     "Environmental sensors report"
 ]
 
-def play_audio(file_path):
-    system = platform.system()
-    if system == "Windows":
-        os.system(f'start /min wmplayer "{file_path}"')
-    elif system == "Darwin":
-        os.system(f"afplay '{file_path}'")
-    else:
-        if os.system("which mpg123 > /dev/null 2>&1") == 0:
-            os.system(f"mpg123 -q '{file_path}'")
-        elif os.system("which cvlc > /dev/null 2>&1") == 0:
-            os.system(f"cvlc --play-and-exit '{file_path}' > /dev/null 2>&1")
-        elif os.system("which mpv > /dev/null 2>&1") == 0:
-            os.system(f"mpv '{file_path}' > /dev/null 2>&1")
-        else:
-            logging.error("No audio player found to play TTS audio.")
-            print("No audio player found to play TTS audio.")
+async def synthesize_to_cache(text, voice=TTS_VOICE):
+    import edge_tts  # Imported on the first cache miss; it pulls in aiohttp, the slowest import at startup
+    temp_audio_path = tts_cache.temp_path()
+    try:
+        await edge_tts.Communicate(text, voice).save(temp_audio_path)
+        return tts_cache.store_file(text, voice, temp_audio_path)
+    except Exception:
+        if os.path.exists(temp_audio_path):
+            os.remove(temp_audio_path)
+        raise
+
+async def synthesize(text, voice=TTS_VOICE):
+    return tts_cache.lookup(text, voice) or await synthesize_to_cache(text, voice)
+
+async def stream_to_clip(text, voice=TTS_VOICE, on_done=None):
+    # Chunks go to the player as edge-tts produces them; the finished clip is cached afterwards
+    import edge_tts
+    clip = audio_sink.open_stream(on_done)
+    audio = bytearray()
+    try:
+        async for chunk in edge_tts.Communicate(text, voice).stream():
+            if chunk["type"] == "audio":
+                clip.write(chunk["data"])
+                audio.extend(chunk["data"])
+    except Exception as e:
+        # The clip is already queued, so it is finished (possibly empty) rather than abandoned
+        logging.error(f"edge-tts stream error: {e}")
+        print(f"edge-tts error: {e}")
+        audio = None
+    finally:
+        clip.close()
+    if audio:
+        tts_cache.store(text, voice, bytes(audio))
+    return clip
+
+async def synthesize_clip(text, voice=TTS_VOICE, on_done=None):
+    # Queues the utterance on the audio sink and returns once synthesis has finished;
+    # playback may still be running when this returns
+    start = time.perf_counter()
+    mode = "cached"
 
-async def edge_tts_speak(text, voice="en-US-GuyNeural"):
-    communicate = edge_tts.Communicate(text, voice)
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_audio:
-        await communicate.save(temp_audio.name)
-        temp_audio_path = temp_audio.name
-    play_audio(temp_audio_path)
-    os.remove(temp_audio_path)
+    def finished(clip):
+        if clip.first_audio_at is not None:
+            logging.info(f"TTS time-to-first-audio: {(clip.first_audio_at - start) * 1000:.0f} ms "
+                         f"(mode={mode}, chars={len(text)})")
+        if on_done:
+            on_done(clip)
+
+    cached_path = tts_cache.lookup(text, voice)
+    if cached_path:
+        return audio_sink.play(cached_path, wait=False, on_done=finished)
+    if TTS_STREAMING:
+        mode = "stream"
+        return await stream_to_clip(text, voice, finished)
+    mode = "file"
+    return audio_sink.play(await synthesize_to_cache(text, voice), wait=False, on_done=finished)
+
+async def edge_tts_speak(text, voice=TTS_VOICE):
+    # Resolved from the audio thread, so waiting for playback does not hold an I/O worker
+    loop = asyncio.get_running_loop()
+    played = loop.create_future()
+
+    def on_done(clip):
+        loop.call_soon_threadsafe(lambda: played.done() or played.set_result(clip))
+
+    await synthesize_clip(text, voice, on_done)
+    await played
+
+def canned_phrases():
+    # Confirmations are spoken joined with their text; the only fixed one is the two-step "Yes, sir?"
+    # prompt. "Good morning, sir." opens the briefing when none was precomputed
+    return (JARVIS_GREETINGS + [f"{prefix} Yes, sir?" for prefix in JARVIS_CONFIRMATIONS] + JARVIS_ERRORS
+            + ["Good morning, sir."])
+
+def prewarm_tts_cache(phrases=None, voice=TTS_VOICE, concurrency=TTS_PREWARM_CONCURRENCY):
+    async def warm(phrase, limit):
+        async with limit:
+            try:
+                await synthesize(phrase, voice)
+            except Exception as e:
+                logging.error(f"TTS pre-warm failed for '{phrase}': {e}")
+
+    async def run():
+        limit = asyncio.Semaphore(concurrency)
+        await asyncio.gather(*(warm(phrase, limit) for phrase in phrases or canned_phrases()))
+        logging.info(f"TTS cache pre-warm finished: {tts_cache.stats()}")
+
+    return event_loop.submit(run())
 
 def speak(text):
     print(f"JARVIS: {text}")
     logging.info(f"JARVIS Response: {text}")
     try:
-        asyncio.run(edge_tts_speak(text))
+        event_loop.run(edge_tts_speak(text))
         from core.memory import store_conversation
         store_conversation(None, text)
     except Exception as e:
@@ -129,7 +208,7 @@ def jarvis_speak(text, response_type="normal"):
         speak(prefix)
     elif response_type == "confirmation":
         prefix = random.choice(JARVIS_CONFIRMATIONS)
-        speak(f"{prefix} {text}")
+        speak(f"{prefix} {text}".strip())
     elif response_type == "error":
         error_msg = random.choice(JARVIS_ERRORS)
         speak(error_msg)
@@ -194,48 +273,76 @@ def find_working_microphone():
     print("No working microphone found!")
     return -1
 
+def get_microphone_stream(device_index=None):
+    # One capture stream stays open for the whole session; calibration runs in its reader thread
+    global mic_stream
+    if mic_stream is None:
+        mic = sr.Microphone() if device_index is None else sr.Microphone(device_index=device_index)
+        mic_stream = MicrophoneStream(mic, MIC_BUFFER_S, MIC_CALIBRATION_S, MIC_ENERGY_RATIO, MIC_MIN_ENERGY,
+                                      MIC_PAUSE_S, MIC_PRE_ROLL_S, muted=audio_sink.is_busy)
+    return mic_stream.start()
+
+def active_microphone_stream():
+    return mic_stream
+
+def parse_wake_transcript(text, wake_word=WAKE_WORD):
+    # Returns None without the wake word, otherwise whatever command was spoken with it
+    # ("jarvis what's the weather", "what time is it jarvis"), or "" for the wake word alone
+    if wake_word not in text:
+        return None
+    before, _, after = text.partition(wake_word)
+    command = after.strip(" ,.!?")
+    if not command:
+        words = before.strip(" ,.!?").split()
+        while words and words[0] in WAKE_FILLERS:
+            words.pop(0)
+        command = " ".join(words)
+    return command
+
 def listen_for_wake_word(device_index=None):
     try:
-        if device_index is None:
-            mic = sr.Microphone()
-        elif device_index == -1:
-            return False
-        else:
-            mic = sr.Microphone(device_index=device_index)
-        with mic as source:
-            print("Listening for 'JARVIS'...")
-            logging.info("Listening for wake word 'JARVIS'")
-            recognizer.energy_threshold = 300
-            recognizer.adjust_for_ambient_noise(source, duration=0.2)
-            audio = recognizer.listen(source, timeout=3, phrase_time_limit=2)
+        if device_index == -1:
+            return None
+        stream = get_microphone_stream(device_index)
+        print("Listening for 'JARVIS'...")
+        logging.info("Listening for wake word 'JARVIS'")
+        # Long enough to hold a command spoken in the same breath as the wake word
+        audio = stream.listen(timeout=3, phrase_time_limit=WAKE_PHRASE_LIMIT_S)
+        if VAD_ENABLED:
+            forward, result = wake_gate.should_forward_audio(audio)
+            if not forward:
+                logging.debug(f"Wake clip dropped locally: {result}")
+                return None
         text = recognizer.recognize_google(audio).lower()
         print(f"Detected: {text}")
         logging.info(f"Wake word detection: {text}")
-        return "jarvis" in text
+        command = parse_wake_transcript(text)
+        if command:
+            print(f"Command received: {command}")
+            logging.info(f"One-shot command received: {command}")
+            from core.memory import store_conversation
+            store_conversation(command, None)
+        return command
     except (sr.UnknownValueError, sr.WaitTimeoutError):
-        return False
+        return None
     except sr.RequestError as e:
         logging.error(f"Network connectivity issue: {e}")
         print(f"Network connectivity issue: {e}")
-        return False
+        return None
     except Exception as e:
         logging.error(f"Audio input error: {e}")
         print(f"Audio input error: {e}")
-        return False
+        return None
 
 def listen_for_command(device_index=None):
     try:
-        if device_index is None:
-            mic = sr.Microphone()
-        elif device_index == -1:
+        if device_index == -1:
             return ""
-        else:
-            mic = sr.Microphone(device_index=device_index)
-        with mic as source:
-            print("Awaiting your command, sir...")
-            logging.info("Listening for command")
-            recognizer.adjust_for_ambient_noise(source, duration=0.5)
-            audio = recognizer.listen(source, timeout=10, phrase_time_limit=5)
+        stream = get_microphone_stream(device_index)
+        print("Awaiting your command, sir...")
+        logging.info("Listening for command")
+        # Picks up from the end of the wake phrase, so a command spoken straight after it is kept
+        audio = stream.listen(timeout=10, phrase_time_limit=5)
         command = recognizer.recognize_google(audio).lower()
         print(f"Command received: {command}")
         logging.info(f"Command received: {command}")
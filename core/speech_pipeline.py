@@ -0,0 +1,118 @@
+import logging
+import threading
+import time
+from queue import Queue
+
+from core.speech import synthesize_clip
+from core.event_loop import event_loop
+from core.memory import store_conversation
+
+
+class StageStats:
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, seconds):
+        ms = seconds * 1000
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def summary(self):
+        avg = self.total_ms / self.count if self.count else 0.0
+        return {"count": self.count, "avg_ms": round(avg, 1), "max_ms": round(self.max_ms, 1)}
+
+
+class SpeechPipeline:
+    """generate -> synthesize -> play, with bounded hand-offs between the stages.
+
+    put() blocks once max_pending_text sentences are waiting, which stalls the LLM
+    stream instead of buffering it without limit. Synthesis runs ahead of playback
+    by at most prefetch_depth clips; a clip's slot is released when it finishes playing.
+    """
+
+    def __init__(self, prefetch_depth=2, max_pending_text=4):
+        self.prefetch_depth = prefetch_depth
+        self.text_queue = Queue(maxsize=max_pending_text)
+        self._slots = threading.BoundedSemaphore(prefetch_depth)
+        self._thread = None
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._last_done_at = None
+        self.queue_wait = StageStats()
+        self.synthesis = StageStats()
+        self.playback = StageStats()
+        self.gaps = StageStats()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="speech-pipeline", daemon=True)
+            self._thread.start()
+
+    def put(self, text):
+        if not text:
+            return
+        with self._idle:
+            self._pending += 1
+        self.start()
+        self.text_queue.put((text, time.perf_counter()))
+
+    def wait_idle(self, timeout=None):
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def stop(self):
+        self.text_queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        logging.info(f"Speech pipeline stopped: {self.stats()}")
+
+    def _finish_one(self):
+        with self._idle:
+            self._pending -= 1
+            self._idle.notify_all()
+
+    def _on_played(self, clip):
+        now = time.perf_counter()
+        if clip.first_audio_at is not None:
+            self.playback.record(now - clip.first_audio_at)
+            # Only count the silence between clips that were already queued back-to-back
+            if self._last_done_at is not None and clip.queued_at <= self._last_done_at:
+                self.gaps.record(max(0.0, clip.first_audio_at - self._last_done_at))
+        self._last_done_at = now
+        self._slots.release()
+        self._finish_one()
+
+    def _run(self):
+        while True:
+            item = self.text_queue.get()
+            if item is None:
+                break
+            text, queued_at = item
+            self._slots.acquire()
+            started = time.perf_counter()
+            self.queue_wait.record(started - queued_at)
+            print(f"JARVIS: {text}")
+            logging.info(f"JARVIS Response: {text}")
+            try:
+                event_loop.run(synthesize_clip(text, on_done=self._on_played))
+            except Exception as e:
+                logging.error(f"edge-tts error: {e}")
+                print(f"edge-tts error: {e}")
+                self._slots.release()
+                self._finish_one()
+                continue
+            self.synthesis.record(time.perf_counter() - started)
+            store_conversation(None, text)
+
+    def stats(self):
+        return {
+            "prefetch_depth": self.prefetch_depth,
+            "pending": self._pending,
+            "queue_wait": self.queue_wait.summary(),
+            "synthesis": self.synthesis.summary(),
+            "playback": self.playback.summary(),
+            "gap": self.gaps.summary(),
+        }
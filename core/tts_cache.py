@@ -0,0 +1,109 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+class TTSCache:
+    """On-disk MP3 cache keyed by a hash of (voice, text) with size-bounded LRU eviction."""
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = None
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(text, voice):
+        return hashlib.sha256(f"{voice}\n{text}".encode("utf-8")).hexdigest()
+
+    def path_for(self, text, voice):
+        return os.path.join(self.cache_dir, f"{self.key(text, voice)}.mp3")
+
+    def _load_index(self):
+        # Rebuild LRU order from file mtimes, which lookup() refreshes on every hit
+        if self._entries is not None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".mp3"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.path, stat.st_size))
+        self._entries = OrderedDict((path, size) for _, path, size in sorted(files))
+        self._total_bytes = sum(self._entries.values())
+
+    def lookup(self, text, voice):
+        path = self.path_for(text, voice)
+        with self._lock:
+            self._load_index()
+            size = self._entries.get(path)
+            if size is None or not os.path.exists(path):
+                self._entries.pop(path, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            self.bytes_saved += size
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def store_file(self, text, voice, source_path):
+        path = self.path_for(text, voice)
+        os.replace(source_path, path)
+        self._add(path)
+        return path
+
+    def store(self, text, voice, data):
+        with self._lock:
+            self._load_index()
+        fd, temp_path = tempfile.mkstemp(suffix=".part", dir=self.cache_dir)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return self.store_file(text, voice, temp_path)
+
+    def temp_path(self):
+        with self._lock:
+            self._load_index()
+        fd, temp_path = tempfile.mkstemp(suffix=".part", dir=self.cache_dir)
+        os.close(fd)
+        return temp_path
+
+    def _add(self, path):
+        size = os.path.getsize(path)
+        with self._lock:
+            self._load_index()
+            self._total_bytes += size - self._entries.get(path, 0)
+            self._entries[path] = size
+            self._entries.move_to_end(path)
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                old_path, old_size = self._entries.popitem(last=False)
+                self._total_bytes -= old_size
+                self.evictions += 1
+                try:
+                    os.remove(old_path)
+                except OSError as e:
+                    logging.error(f"Failed to evict cached audio {old_path}: {e}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries or ()),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "bytes_saved": self.bytes_saved,
+                "evictions": self.evictions,
+            }
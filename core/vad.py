@@ -0,0 +1,158 @@
+import logging
+import os
+import wave
+
+import numpy as np
+
+FRAME_MS = 20
+KEYWORD_BANDS = 12
+
+
+def pcm_to_float(pcm, sample_width, signed_8bit=True):
+    # speech_recognition hands out signed 8-bit samples; WAV files store them unsigned
+    if sample_width == 1 and signed_8bit:
+        return np.frombuffer(pcm, dtype=np.int8).astype(np.float32) / 128.0
+    if sample_width == 1:
+        return (np.frombuffer(pcm, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    if sample_width == 2:
+        return np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+    if sample_width == 4:
+        return np.frombuffer(pcm, dtype="<i4").astype(np.float32) / 2147483648.0
+    raise ValueError(f"Unsupported sample width: {sample_width}")
+
+
+def read_wav(path):
+    with wave.open(path, "rb") as f:
+        samples = pcm_to_float(f.readframes(f.getnframes()), f.getsampwidth(), signed_8bit=False)
+        if f.getnchannels() > 1:
+            samples = samples.reshape(-1, f.getnchannels()).mean(axis=1)
+        return samples, f.getframerate()
+
+
+def split_frames(samples, sample_rate, frame_ms=FRAME_MS):
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    count = len(samples) // frame_len
+    return samples[:count * frame_len].reshape(count, frame_len)
+
+
+def frame_energy(frames):
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+
+def frame_zcr(frames):
+    # Fraction of adjacent samples that change sign: low for voiced speech, high for hiss
+    return np.mean(np.signbit(frames[:, 1:]) != np.signbit(frames[:, :-1]), axis=1)
+
+
+def band_features(frames, bands=KEYWORD_BANDS):
+    # Log energies in log-spaced frequency bands relative to the frame's own level, so the
+    # spectral shape is compared rather than loudness
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(frames.shape[1]), axis=1)) ** 2
+    edges = np.unique(np.geomspace(2, spectrum.shape[1], bands + 1).astype(int))
+    features = np.log(np.add.reduceat(spectrum, edges[:-1], axis=1) + 1e-10)
+    return features - features.mean(axis=1, keepdims=True)
+
+
+def subsequence_dtw(template, clip):
+    # Best alignment of the whole template against any stretch of the clip, per template frame
+    cost = np.sqrt(((template[:, None, :] - clip[None, :, :]) ** 2).sum(axis=2))
+    previous = np.zeros(clip.shape[0] + 1)
+    for i in range(template.shape[0]):
+        current = np.full(clip.shape[0] + 1, np.inf)
+        # Diagonal and vertical steps are vectorised; the horizontal step is a running minimum
+        vertical = np.minimum(previous[1:], previous[:-1]) + cost[i]
+        for j in range(1, clip.shape[0] + 1):
+            current[j] = min(vertical[j - 1], current[j - 1] + cost[i, j - 1])
+        previous = current
+    return float(previous[1:].min()) / template.shape[0]
+
+
+def load_keyword_templates(directory):
+    templates = []
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith(".wav"):
+            samples, sample_rate = read_wav(os.path.join(directory, name))
+            frames = split_frames(samples, sample_rate)
+            # Recordings are trimmed to the loud part so leading silence does not count against a match
+            loud = np.flatnonzero(frame_energy(frames) > 0.1 * frame_energy(frames).max())
+            templates.append(band_features(frames[loud[0]:loud[-1] + 1]))
+    logging.info(f"Loaded {len(templates)} wake-word templates from {directory}")
+    return templates
+
+
+def calibrate_keyword_distance(templates, margin=1.5):
+    # Distances depend on the microphone and room, so the cut-off is scaled from how far
+    # the recorded wake words are from each other
+    pairs = [subsequence_dtw(a, b) for i, a in enumerate(templates) for j, b in enumerate(templates) if i != j]
+    if not pairs:
+        return None
+    return max(pairs) * margin
+
+
+class VoiceActivityGate:
+    """Decides locally whether a captured clip is worth a remote recognition request.
+
+    A frame counts as speech when its energy is energy_ratio times above the noise
+    floor and its zero-crossing rate is low enough to rule out hiss. Clips with less
+    than min_speech_ms of speech are dropped. When wake-word templates are loaded,
+    the clip must also match one of them within keyword_max_distance, which is
+    calibrated from the templates themselves unless it is given.
+    """
+
+    def __init__(self, energy_ratio=3.0, min_energy=0.005, max_zcr=0.3, min_speech_ms=150,
+                 templates=None, keyword_max_distance=None):
+        self.energy_ratio = energy_ratio
+        self.min_energy = min_energy
+        self.max_zcr = max_zcr
+        self.min_speech_ms = min_speech_ms
+        self.templates = templates or []
+        if self.templates and keyword_max_distance is None:
+            keyword_max_distance = calibrate_keyword_distance(self.templates)
+            logging.info(f"Wake-word keyword distance calibrated to {keyword_max_distance}")
+        self.keyword_max_distance = keyword_max_distance
+        self.noise_floor = None
+        self.clips_seen = 0
+        self.clips_forwarded = 0
+
+    def analyze(self, samples, sample_rate):
+        frames = split_frames(samples, sample_rate)
+        if len(frames) == 0:
+            return {"speech_ms": 0, "noise_floor": self.noise_floor, "keyword_distance": None}
+        energy = frame_energy(frames)
+        clip_floor = float(np.percentile(energy, 10))
+        # The floor follows the room slowly; a clip full of speech cannot raise it past its quietest frames
+        if self.noise_floor is None:
+            self.noise_floor = clip_floor
+        else:
+            self.noise_floor = 0.8 * self.noise_floor + 0.2 * clip_floor
+        floor = min(self.noise_floor, clip_floor)
+        threshold = max(self.min_energy, floor * self.energy_ratio)
+        speech = (energy > threshold) & (frame_zcr(frames) <= self.max_zcr)
+        result = {"speech_ms": int(speech.sum()) * FRAME_MS, "noise_floor": floor, "keyword_distance": None}
+        if self.templates and speech.any():
+            first, last = np.flatnonzero(speech)[[0, -1]]
+            features = band_features(frames[first:last + 1])
+            result["keyword_distance"] = min(subsequence_dtw(t, features) for t in self.templates)
+        return result
+
+    def should_forward(self, samples, sample_rate):
+        self.clips_seen += 1
+        result = self.analyze(samples, sample_rate)
+        forward = result["speech_ms"] >= self.min_speech_ms
+        if forward and self.templates and self.keyword_max_distance is not None:
+            forward = result["keyword_distance"] <= self.keyword_max_distance
+        if forward:
+            self.clips_forwarded += 1
+        return forward, result
+
+    def should_forward_audio(self, audio):
+        # Accepts a speech_recognition AudioData
+        samples = pcm_to_float(audio.frame_data, audio.sample_width)
+        return self.should_forward(samples, audio.sample_rate)
+
+    def stats(self):
+        return {
+            "clips_seen": self.clips_seen,
+            "clips_forwarded": self.clips_forwarded,
+            "forwarded_ratio": round(self.clips_forwarded / self.clips_seen, 3) if self.clips_seen else 0.0,
+        }
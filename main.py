@@ -1,10 +1,18 @@
 import logging
 import speech_recognition as sr
 from core.phi2 import Phi2Service
-from core.speech import recognizer, find_working_microphone, jarvis_speak, listen_for_wake_word, listen_for_command
-from core.scheduler import scheduler, load_reminders
-from core.memory import init_memory_db, get_preference, set_preference
-from utils.helpers import process_command, speech_queue
+from core.speech import recognizer, find_working_microphone, jarvis_speak, listen_for_wake_word, listen_for_command, prewarm_tts_cache, tts_cache, audio_sink, wake_gate, active_microphone_stream, get_microphone_stream
+from core.scheduler import scheduler, load_reminders, start_scheduler
+from core.memory import init_memory_db, get_preference, set_preference, flush_conversations
+from utils.helpers import process_command, speech_pipeline, remote_jobs
+from core.speech_pipeline import StageStats
+from config.settings import BRIEFING_ENABLED, RETENTION_ENABLED, TTS_PREWARM, LLM_CACHE_ENABLED, LLM_CACHE_TTL_S, LLM_CACHE_MAX_ENTRIES
+from core.llm_cache import LLMResponseCache
+from core.event_loop import event_loop
+from services.briefing import start_briefings
+from services.system import close_remote_shells
+from services.weather import weather_client
+from core.retention import schedule_retention
 import time
 
 
@@ -15,54 +23,133 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-def main():
-    print("=" * 50)
-    print("    J.A.R.V.I.S. - Your Personal Assistant")
-    print("=" * 50)
-    logging.info("JARVIS started")
-    jarvis_speak("Good day, sir. JARVIS is online and ready for your command.", "greeting")
+startup_timings = {}
 
-    # Initialize memory database
+
+def timed_phase(name, func, *args):
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        startup_timings[name] = round(time.perf_counter() - start, 3)
+
+
+def init_memory():
     init_memory_db()
     if not get_preference("weather_city"):
         set_preference("weather_city", "Heraklion")
-
-    # Load reminders
+    weather_client.prefetch(get_preference("weather_city"))
     load_reminders()
+    if BRIEFING_ENABLED:
+        start_briefings()
+    start_scheduler()
+
 
-    # Initialize Phi-2 service
+def init_llm():
     try:
-        phi2_service = Phi2Service(model_name="phi")
+        response_cache = LLMResponseCache(ttl_s=LLM_CACHE_TTL_S, max_entries=LLM_CACHE_MAX_ENTRIES) if LLM_CACHE_ENABLED else None
+        # The model itself loads in the background (Phi2Service.warm_up_future)
+        phi2_service = Phi2Service(model_name="phi", response_cache=response_cache)
         logging.info("Phi-2 service initialized")
     except Exception as e:
         logging.error(f"Failed to initialize Phi-2 service: {str(e)}")
         jarvis_speak("Warning: Phi-2 language model failed to initialize.", "error")
         phi2_service = None
+    if RETENTION_ENABLED:
+        schedule_retention(phi2_service.response_cache if phi2_service else None)
+    return phi2_service
 
-    # Find working microphone
+
+def init_microphone():
     mic_index = find_working_microphone()
+    if mic_index != -1:
+        # Opening the capture stream now lets its noise calibration overlap the rest of startup
+        get_microphone_stream(mic_index)
+    return mic_index
+
+
+def initialize(prewarm=TTS_PREWARM):
+    """Starts the independent subsystems concurrently on the shared I/O pool.
+
+    Returns once the memory DB and the microphone are ready, with the microphone index
+    and a future for the Phi-2 service, which keeps starting in the background.
+    """
+    start = time.perf_counter()
+    event_loop.start()
+    speech_pipeline.start()
+    if prewarm:
+        prewarm_tts_cache()
+    memory = event_loop.submit(event_loop.to_thread(timed_phase, "memory", init_memory))
+    llm = event_loop.submit(event_loop.to_thread(timed_phase, "llm", init_llm))
+    microphone = event_loop.submit(event_loop.to_thread(timed_phase, "microphone", init_microphone))
+    memory.result()
+    mic_index = microphone.result()
+    startup_timings["ready"] = round(time.perf_counter() - start, 3)
+    llm.add_done_callback(lambda _: logging.info(f"Startup timings: {startup_timings}"))
+    return mic_index, llm
+
+
+def main():
+    print("=" * 50)
+    print("    J.A.R.V.I.S. - Your Personal Assistant")
+    print("=" * 50)
+    logging.info("JARVIS started")
+    mic_index, llm = initialize()
     if mic_index == -1:
         jarvis_speak("No working microphone found. Please check audio settings.", "error")
         logging.error("No working microphone found")
         return
+    jarvis_speak("Good day, sir. JARVIS is online and ready for your command.", "greeting")
 
+    # Wake phrase end -> first audio of the response, for commands spoken with the wake word
+    # ("one-shot") and for the "Yes, sir?" round trip ("two-step")
+    latency = {"one-shot": StageStats(), "two-step": StageStats()}
     while True:
         try:
-            if listen_for_wake_word(mic_index):
+            command = listen_for_wake_word(mic_index)
+            if command is None:
+                continue
+            stream = active_microphone_stream()
+            heard_at = stream.last_phrase_end_at if stream and stream.last_phrase_end_at else time.perf_counter()
+            dead_before = stream.dead_time() if stream else 0.0
+            path = "one-shot" if command else "two-step"
+            if not command:
                 jarvis_speak("Yes, sir?", "confirmation")
                 command = listen_for_command(mic_index)
-                if command:
-                    process_command(command, phi2_service)
-                    # Wait until the speech queue is empty
-                    while not speech_queue.empty():
-                        time.sleep(0.1)  # Small delay to prevent busy waiting
-                else:
-                    jarvis_speak("I didn't catch that, sir.", "error")
+            if command:
+                dispatched_at = time.perf_counter()
+                # Only waits if the Ollama connection check is still running
+                process_command(command, llm.result())
+                # Wait until every queued sentence has been spoken
+                speech_pipeline.wait_idle()
+                response_at = audio_sink.first_audio_since(dispatched_at)
+                if response_at is not None:
+                    latency[path].record(response_at - heard_at)
+                    logging.info(f"Wake-to-response latency ({path}): {(response_at - heard_at) * 1000:.0f} ms, "
+                                 f"dispatched after {(dispatched_at - heard_at) * 1000:.0f} ms")
+            else:
+                jarvis_speak("I didn't catch that, sir.", "error")
+            if stream:
+                logging.info(f"Microphone dead time this cycle: {stream.dead_time() - dead_before:.2f} s")
         except KeyboardInterrupt:
             jarvis_speak("Shutting down. Goodbye, sir.")
             logging.info("JARVIS shutting down via KeyboardInterrupt")
-            speech_queue.put(None)  # Signal speech worker to stop
+            # Let in-flight remote commands finish before the ssh connections close
+            remote_jobs.wait_idle(timeout=5)
+            speech_pipeline.stop()
             scheduler.shutdown()
+            flush_conversations()
+            logging.info(f"TTS cache stats: {tts_cache.stats()}")
+            logging.info(f"Wake-word gate stats: {wake_gate.stats()}")
+            logging.info(f"Remote jobs: {remote_jobs.jobs()}")
+            logging.info(f"Wake-to-response latency: { {path: stats.summary() for path, stats in latency.items()} }")
+            if active_microphone_stream():
+                active_microphone_stream().stop()
+            audio_sink.close()
+            close_remote_shells()
+            if llm.done() and llm.result():
+                llm.result().close()
+            event_loop.stop()
             break
         except Exception as e:
             logging.error(f"Unexpected error: {str(e)}")
@@ -0,0 +1,99 @@
+import datetime
+import logging
+import statistics
+import threading
+from core.scheduler import scheduler
+from core.speech import synthesize
+from core.event_loop import event_loop
+from core.memory import get_preference, get_reminders_due, get_list_sizes, get_command_timestamps
+from services.weather import get_weather
+from config.settings import BRIEFING_WAKE_TIME, BRIEFING_LEAD_MIN, BRIEFING_MAX_AGE_S
+
+BRIEFING_JOB_ID = "morning-briefing"
+
+_briefing = None
+_lock = threading.Lock()
+
+
+def usual_wake_time():
+    # Median time of the recent "good morning" commands, falling back to the configured time
+    minutes = []
+    for stamp in get_command_timestamps("good morning"):
+        try:
+            moment = datetime.datetime.fromisoformat(stamp)
+        except ValueError:
+            continue
+        minutes.append(moment.hour * 60 + moment.minute)
+    if len(minutes) < 3:
+        hour, minute = map(int, BRIEFING_WAKE_TIME.split(":"))
+        return datetime.time(hour, minute)
+    median = int(statistics.median(minutes))
+    return datetime.time(median // 60, median % 60)
+
+
+def briefing_time():
+    wake = datetime.datetime.combine(datetime.date.today(), usual_wake_time())
+    return (wake - datetime.timedelta(minutes=BRIEFING_LEAD_MIN)).time()
+
+
+def compose_briefing(now=None, greeting=True):
+    now = now or datetime.datetime.now()
+    city = get_preference("weather_city") or "Heraklion"
+    parts = ["Good morning, sir."] if greeting else []
+    parts.append(get_weather(city))
+    day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    reminders = get_reminders_due(now.isoformat(), (day_start + datetime.timedelta(days=1)).isoformat())
+    if reminders:
+        tasks = ", ".join(f"{r['task']} at {r['time'][11:16]}" for r in reminders)
+        parts.append(f"You have {len(reminders)} reminder{'s' if len(reminders) != 1 else ''} today: {tasks}.")
+    else:
+        parts.append("You have no reminders today.")
+    sizes = get_list_sizes()
+    if sizes:
+        counts = ", ".join(f"{name} has {count} item{'s' if count != 1 else ''}" for name, count in sizes.items())
+        parts.append(f"On your lists, {counts}.")
+    return " ".join(parts)
+
+
+def build_briefing():
+    global _briefing
+    try:
+        text = compose_briefing()
+        # Synthesizing puts the audio in the TTS cache, so speaking the same text later plays instantly
+        audio_path = event_loop.run(synthesize(text))
+        with _lock:
+            _briefing = {"text": text, "audio_path": audio_path, "built_at": datetime.datetime.now()}
+        logging.info(f"Morning briefing prepared: {text}")
+    except Exception as e:
+        logging.error(f"Morning briefing failed: {e}")
+    finally:
+        # The usual wake time is re-learned every day
+        schedule_briefing()
+
+
+def take_briefing():
+    # The precomputed briefing if it was built today and is still recent, else None
+    with _lock:
+        briefing = _briefing
+    if briefing is None:
+        return None
+    built_at = briefing["built_at"]
+    age = (datetime.datetime.now() - built_at).total_seconds()
+    if built_at.date() != datetime.date.today() or age > BRIEFING_MAX_AGE_S:
+        return None
+    return briefing
+
+
+def schedule_briefing():
+    at = briefing_time()
+    scheduler.add_job(build_briefing, "cron", hour=at.hour, minute=at.minute, id=BRIEFING_JOB_ID,
+                      replace_existing=True, misfire_grace_time=3600, coalesce=True)
+    logging.info(f"Morning briefing scheduled daily at {at.strftime('%H:%M')}")
+
+
+def start_briefings():
+    schedule_briefing()
+    # Started after today's build time but still in the morning: prepare one now
+    now = datetime.datetime.now()
+    if briefing_time() <= now.time() < datetime.time(12) and take_briefing() is None:
+        scheduler.add_job(build_briefing, id=f"{BRIEFING_JOB_ID}-now", replace_existing=True)
@@ -1,14 +1,219 @@
+import asyncio
+import itertools
+import os
+import platform
+import shlex
 import subprocess
-from core.speech import speak
+import threading
+import time
+from collections import OrderedDict
 import logging
+from core.event_loop import event_loop
+from config.settings import (MAIN_PC_USER, MAIN_PC_IP, SSH_BINARY, SSH_MULTIPLEX, SSH_CONTROL_DIR,
+                             SSH_CONTROL_PERSIST, SSH_CONNECT_TIMEOUT, SSH_COMMAND_TIMEOUT, SSH_PROBE_TTL_S,
+                             REMOTE_MAX_CONCURRENT, REMOTE_JOB_HISTORY)
 
-def run_remote_command(command, user, ip):
-    ssh_command = f"ssh {user}@{ip} '{command}'"
+
+class RemoteShell:
+    """Runs commands on one host over a multiplexed ssh connection.
+
+    The first call opens an OpenSSH ControlMaster socket that stays up for
+    control_persist, so later calls skip the handshake. Commands are given as
+    argument lists and quoted with shlex before they reach the remote shell. Probes
+    for installed programs are batched into one round trip and cached for probe_ttl_s.
+    """
+
+    def __init__(self, user, host, ssh_binary=SSH_BINARY, multiplex=SSH_MULTIPLEX, control_dir=SSH_CONTROL_DIR,
+                 control_persist=SSH_CONTROL_PERSIST, connect_timeout=SSH_CONNECT_TIMEOUT,
+                 command_timeout=SSH_COMMAND_TIMEOUT, probe_ttl_s=SSH_PROBE_TTL_S):
+        self.target = f"{user}@{host}"
+        self.ssh_binary = ssh_binary
+        # Windows builds of OpenSSH have no ControlMaster support
+        self.multiplex = multiplex and platform.system() != "Windows"
+        self.control_dir = os.path.expanduser(control_dir)
+        self.control_persist = control_persist
+        self.connect_timeout = connect_timeout
+        self.command_timeout = command_timeout
+        self.probe_ttl_s = probe_ttl_s
+        self._probes = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def ssh_args(self):
+        args = [self.ssh_binary, "-o", "BatchMode=yes", "-o", f"ConnectTimeout={self.connect_timeout}"]
+        if self.multiplex:
+            os.makedirs(self.control_dir, mode=0o700, exist_ok=True)
+            args += ["-o", "ControlMaster=auto", "-o", f"ControlPath={os.path.join(self.control_dir, '%C')}",
+                     "-o", f"ControlPersist={self.control_persist}"]
+        return args + [self.target]
+
+    def run(self, argv, background=False, timeout=None):
+        remote = shlex.join(argv)
+        if background:
+            # Detach GUI programs so the ssh session returns as soon as they are started
+            remote = f"nohup {remote} >/dev/null 2>&1 &"
+        self.calls += 1
+        return subprocess.run(self.ssh_args() + ["--", remote], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              timeout=timeout or self.command_timeout)
+
+    def probe(self, *programs):
+        # Which of the programs are installed, from cache where fresh and one ssh call for the rest
+        now = time.monotonic()
+        with self._lock:
+            known = {p: hit[1] for p, hit in ((p, self._probes.get(p)) for p in programs)
+                     if hit is not None and hit[0] > now}
+        missing = [p for p in programs if p not in known]
+        if missing:
+            script = "; ".join(f"command -v {shlex.quote(p)} >/dev/null 2>&1 && echo {shlex.quote(p)}"
+                               for p in missing)
+            result = self.run(["sh", "-c", script + "; true"])
+            if result.returncode != 0:
+                raise subprocess.CalledProcessError(result.returncode, "probe", result.stdout, result.stderr)
+            found = set(result.stdout.decode().split())
+            with self._lock:
+                for p in missing:
+                    known[p] = p in found
+                    self._probes[p] = (now + self.probe_ttl_s, known[p])
+        return known
+
+    def first_available(self, *programs):
+        installed = self.probe(*programs)
+        return next((p for p in programs if installed[p]), None)
+
+    def close(self):
+        if self.multiplex:
+            subprocess.run([self.ssh_binary, "-o", f"ControlPath={os.path.join(self.control_dir, '%C')}",
+                            "-O", "exit", self.target], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+_shells = {}
+_shells_lock = threading.Lock()
+
+
+def get_remote_shell(user=MAIN_PC_USER, ip=MAIN_PC_IP):
+    with _shells_lock:
+        shell = _shells.get((user, ip))
+        if shell is None:
+            shell = _shells[(user, ip)] = RemoteShell(user, ip)
+        return shell
+
+
+def execute_remote(argv, user=MAIN_PC_USER, ip=MAIN_PC_IP, background=False, timeout=None):
+    result = get_remote_shell(user, ip).run(argv, background=background, timeout=timeout)
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, argv, result.stdout, result.stderr)
+    logging.info(f"Remote command executed: {shlex.join(argv)}")
+    return result.stdout.decode()
+
+
+def find_remote_program(*programs, user=MAIN_PC_USER, ip=MAIN_PC_IP):
+    # None means none of the programs is installed; an unreachable PC raises instead
     try:
-        result = subprocess.run(ssh_command, shell=True, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        logging.info(f"Remote command executed: {command}")
-        return result.stdout.decode()
-    except subprocess.CalledProcessError as e:
-        speak("Failed to execute the command on the main PC.")
-        logging.error(f"Remote command failed: {command}, error: {e}")
-        return None
+        return get_remote_shell(user, ip).first_available(*programs)
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError) as e:
+        logging.error(f"Remote program probe failed for {programs}: {e}")
+        raise
+
+
+def close_remote_shells():
+    with _shells_lock:
+        shells = list(_shells.values())
+        _shells.clear()
+    for shell in shells:
+        shell.close()
+
+
+class RemoteJob:
+    def __init__(self, job_id, description, timeout):
+        self.id = job_id
+        self.description = description
+        self.timeout = timeout
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.queued_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def as_dict(self):
+        finished = self.finished_at or time.time()
+        return {"id": self.id, "description": self.description, "status": self.status,
+                "seconds": round(finished - (self.started_at or self.queued_at), 2), "error": self.error}
+
+
+class RemoteExecutor:
+    """Runs remote work on the shared event loop so the voice loop never waits for ssh.
+
+    At most max_concurrent jobs run at once; each one is cut off after its timeout.
+    Outcomes are reported through announce (the speech queue) and every job is kept
+    in a table of in-flight and recent work, trimmed to `history` finished entries.
+    """
+
+    def __init__(self, announce=None, max_concurrent=REMOTE_MAX_CONCURRENT, history=REMOTE_JOB_HISTORY,
+                 timeout=SSH_COMMAND_TIMEOUT):
+        self.announce = announce
+        self.max_concurrent = max_concurrent
+        self.history = history
+        self.timeout = timeout
+        self._jobs = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._limit = None
+
+    def submit(self, description, func, *args, timeout=None, success=None, failure=None):
+        # func runs on an I/O worker; a None result or an exception counts as a failure
+        job = RemoteJob(next(self._ids), description, timeout or self.timeout)
+        with self._lock:
+            self._jobs[job.id] = job
+        event_loop.submit(self._run(job, func, args, success, failure))
+        logging.info(f"Remote job {job.id} queued: {description}")
+        return job
+
+    def run(self, argv, description=None, background=False, **kwargs):
+        return self.submit(description or shlex.join(argv), execute_remote, argv, MAIN_PC_USER, MAIN_PC_IP,
+                           background, kwargs.pop("timeout", None) or self.timeout, **kwargs)
+
+    async def _run(self, job, func, args, success, failure):
+        if self._limit is None:
+            self._limit = asyncio.Semaphore(self.max_concurrent)
+        async with self._limit:
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                job.result = await asyncio.wait_for(event_loop.to_thread(func, *args), job.timeout)
+                job.status = "done" if job.result is not None else "failed"
+            except asyncio.TimeoutError:
+                job.status = "timeout"
+                job.error = f"timed out after {job.timeout} s"
+            except subprocess.TimeoutExpired as e:
+                job.status = "timeout"
+                job.error = str(e)
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+            job.finished_at = time.time()
+        logging.info(f"Remote job {job.id} {job.status}: {job.description}" + (f" ({job.error})" if job.error else ""))
+        message = success if job.status == "done" else failure
+        if callable(message):
+            message = message(job)
+        if message and self.announce:
+            # The speech queue may block when full, so it is fed from a worker rather than the loop
+            await event_loop.to_thread(self.announce, message)
+        self._finish(job)
+
+    def _finish(self, job):
+        with self._idle:
+            finished = [j for j in self._jobs.values() if j.finished_at is not None]
+            for old in finished[:max(0, len(finished) - self.history)]:
+                del self._jobs[old.id]
+            self._idle.notify_all()
+
+    def jobs(self, active_only=False):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [j.as_dict() for j in jobs if not active_only or j.finished_at is None]
+
+    def wait_idle(self, timeout=None):
+        with self._idle:
+            return self._idle.wait_for(lambda: all(j.finished_at is not None for j in self._jobs.values()), timeout)
@@ -1,30 +1,141 @@
 import requests
 import logging
+import threading
+import time
+from requests.adapters import HTTPAdapter
 from core.speech import jarvis_speak
+from core.event_loop import event_loop
+from core.memory import get_geocode, store_geocode
+from config.settings import WEATHER_GEOCODE_URL, WEATHER_FORECAST_URL, WEATHER_TTL_S, WEATHER_STALE_S, WEATHER_TIMEOUT
+
+WEATHER_CODES = {
+    0: "clear sky", 1: "mainly clear", 2: "partly cloudy", 3: "overcast",
+    45: "fog", 51: "light drizzle", 61: "light rain", 63: "moderate rain",
+    71: "light snow", 73: "moderate snow", 95: "thunderstorm"
+}
+
+
+class WeatherClient:
+    """Open-Meteo client with a persistent geocode cache and a stale-while-revalidate forecast cache.
+
+    City names are resolved once and kept in the memory DB. A forecast younger than
+    ttl_s is served as is; up to stale_s past that it is served immediately while a
+    background refresh runs. Concurrent fetches for the same place share one request.
+    """
+
+    def __init__(self, geocode_url=WEATHER_GEOCODE_URL, forecast_url=WEATHER_FORECAST_URL, ttl_s=WEATHER_TTL_S,
+                 stale_s=WEATHER_STALE_S, timeout=WEATHER_TIMEOUT):
+        self.geocode_url = geocode_url
+        self.forecast_url = forecast_url
+        self.ttl_s = ttl_s
+        self.stale_s = stale_s
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+        self.session.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+        self._forecasts = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.counts = {"fresh": 0, "stale": 0, "miss": 0, "coalesced": 0, "requests": 0}
+
+    def geocode(self, city):
+        query = city.strip().lower()
+        place = get_geocode(query)
+        if place:
+            return place
+        self.counts["requests"] += 1
+        response = self.session.get(self.geocode_url, params={"name": city, "count": 1}, timeout=self.timeout)
+        response.raise_for_status()
+        results = response.json().get("results")
+        if not results:
+            return None
+        place = {"name": results[0].get("name", city), "latitude": results[0]["latitude"],
+                 "longitude": results[0]["longitude"]}
+        store_geocode(query, place["name"], place["latitude"], place["longitude"])
+        return place
+
+    def _fetch_forecast(self, key):
+        self.counts["requests"] += 1
+        latitude, longitude = key
+        response = self.session.get(self.forecast_url, params={"latitude": latitude, "longitude": longitude,
+                                                               "current_weather": "true"}, timeout=self.timeout)
+        response.raise_for_status()
+        current = response.json()["current_weather"]
+        self._forecasts[key] = (time.monotonic(), current)
+        return current
+
+    def _refresh(self, key):
+        # Returns the in-flight fetch for this place, starting one if none is running
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.counts["coalesced"] += 1
+                return future
+            future = event_loop.submit(event_loop.to_thread(self._fetch_forecast, key))
+            self._inflight[key] = future
+        future.add_done_callback(lambda f: self._finish_refresh(key, f))
+        return future
+
+    def _finish_refresh(self, key, future):
+        with self._lock:
+            self._inflight.pop(key, None)
+        if future.exception() is not None:
+            logging.error(f"Weather refresh failed for {key}: {future.exception()}")
+
+    def forecast(self, latitude, longitude):
+        key = (round(latitude, 3), round(longitude, 3))
+        cached = self._forecasts.get(key)
+        if cached is not None:
+            age = time.monotonic() - cached[0]
+            if age < self.ttl_s:
+                self.counts["fresh"] += 1
+                return cached[1]
+            if age < self.ttl_s + self.stale_s:
+                self.counts["stale"] += 1
+                self._refresh(key)
+                return cached[1]
+        self.counts["miss"] += 1
+        return self._refresh(key).result(self.timeout * 2)
+
+    def current(self, city):
+        place = self.geocode(city)
+        if place is None:
+            return None
+        return self.forecast(place["latitude"], place["longitude"])
+
+    def prefetch(self, city):
+        # Warms both caches in the background, so the first weather command after startup answers at once
+        return event_loop.submit(event_loop.to_thread(self._prefetch, city))
+
+    def _prefetch(self, city):
+        try:
+            place = self.geocode(city)
+            if place is not None:
+                self.forecast(place["latitude"], place["longitude"])
+        except Exception as e:
+            logging.error(f"Weather prefetch failed for {city}: {e}")
+
+    def stats(self):
+        return dict(self.counts, cached_places=len(self._forecasts))
+
+
+weather_client = WeatherClient()
+
+
+def describe_weather(city, current):
+    desc = WEATHER_CODES.get(current["weathercode"], "unknown condition")
+    temp = current["temperature"]
+    logging.info(f"Weather retrieved for {city}: {desc}, {temp}°C")
+    return f"The weather in {city} is {desc} with a temperature of {temp} degrees Celsius."
+
 
 def get_weather(city):
     try:
-        geocode_url = f"https://geocoding-api.open-meteo.com/v1/search?name={city}"
-        response = requests.get(geocode_url, timeout=10)
-        data = response.json()
-        if not data.get("results"):
+        current = weather_client.current(city)
+        if current is None:
             logging.error(f"Weather lookup failed: City {city} not found")
             return f"Sorry, I couldn't find weather information for {city}."
-        latitude = data["results"][0]["latitude"]
-        longitude = data["results"][0]["longitude"]
-        weather_url = f"https://api.open-meteo.com/v1/forecast?latitude={latitude}&longitude={longitude}&current_weather=true&temperature_2m,weather_code"
-        response = requests.get(weather_url, timeout=10)
-        weather_data = response.json()
-        temp = weather_data["current_weather"]["temperature"]
-        weather_code = weather_data["current_weather"]["weathercode"]
-        weather_codes = {
-            0: "clear sky", 1: "mainly clear", 2: "partly cloudy", 3: "overcast",
-            45: "fog", 51: "light drizzle", 61: "light rain", 63: "moderate rain",
-            71: "light snow", 73: "moderate snow", 95: "thunderstorm"
-        }
-        desc = weather_codes.get(weather_code, "unknown condition")
-        logging.info(f"Weather retrieved for {city}: {desc}, {temp}°C")
-        return f"The weather in {city} is {desc} with a temperature of {temp} degrees Celsius."
+        return describe_weather(city, current)
     except Exception as e:
         logging.error(f"Weather error: {e}")
         print(f"Weather error: {e}")
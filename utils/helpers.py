@@ -1,41 +1,36 @@
 
-import threading
-from queue import Queue
 from core.speech import jarvis_speak 
 import random
 import json
 import logging
 import datetime
-from core.memory import retrieve_memory, store_memory, get_conversation_history, delete_memory, set_preference, get_preference, retrieve_all_memories
+from urllib.parse import quote_plus
+from core.memory import retrieve_memory, retrieve_memory_json, store_memory, get_conversation_history, search_conversation, delete_memory, set_preference, get_preference, retrieve_all_memories, memory_store, flush_conversations
+from core.memory import add_list_item, remove_list_item, get_list_items, get_list_names, get_pending_reminders
 from services.weather import get_weather
-from services.system import run_remote_command
-from config.settings import MAIN_PC_USER, MAIN_PC_IP
+from services.system import RemoteExecutor, execute_remote, find_remote_program
+from services.briefing import take_briefing, compose_briefing
+from core.retention import last_report
+from core.context import context_assembler
+from config.settings import SPEECH_PREFETCH_DEPTH, SPEECH_MAX_PENDING_TEXT, BRIEFING_ENABLED, CONTEXT_ENABLED
 from core.speech import get_available_microphones 
 import sys
-import subprocess
-import socket
 import sqlite3
-import time
 import speech_recognition as sr
-import asyncio
-import edge_tts
-import tempfile
 import os
-from core.speech import recognizer
+from core.speech import recognizer, tts_cache, active_microphone_stream
 from core.scheduler import scheduler
 from core.scheduler import add_reminder
+from core.speech_pipeline import SpeechPipeline
+from utils.intents import IntentRouter
+from core.event_loop import event_loop
 
-speech_queue = Queue()
-
-def speech_worker():
-    while True:
-        text = speech_queue.get()
-        if text is None:
-            break
-        jarvis_speak(text, "info")
-        speech_queue.task_done()
-
-threading.Thread(target=speech_worker, daemon=True).start()
+# The worker thread starts with main() or on the first queued sentence, not at import
+speech_pipeline = SpeechPipeline(SPEECH_PREFETCH_DEPTH, SPEECH_MAX_PENDING_TEXT)
+# Remote commands run in the background and report back through the speech queue
+remote_jobs = RemoteExecutor(announce=speech_pipeline.put)
+REMOTE_FAILED = "Failed to execute the command on the main PC."
+router = IntentRouter()
 
 def check_context(command):
     if not command or command in ["exit", "quit", "power down", "shut down jarvis"]:
@@ -48,55 +43,47 @@ def check_context(command):
     return None
 
 def add_to_list(list_name, item):
-    list_key = f"{list_name}_list"
-    current_list = retrieve_memory(list_key)
-    if current_list:
-        try:
-            current_list = json.loads(current_list)
-        except json.JSONDecodeError:
-            logging.error(f"Failed to parse list JSON for key={list_key}")
-            current_list = {"type": "list", "items": [], "timestamp": datetime.datetime.now().isoformat()}
-    else:
-        current_list = {"type": "list", "items": [], "timestamp": datetime.datetime.now().isoformat()}
-    if item not in current_list["items"]:
-        current_list["items"].append(item)
-        store_memory(list_key, json.dumps(current_list))
+    if add_list_item(list_name, item):
         jarvis_speak(f"{item} has been added to your {list_name} list.", "confirmation")
     else:
         jarvis_speak(f"{item} is already in your {list_name} list.", "info")
 
+def remove_from_list(list_name, item):
+    if remove_list_item(list_name, item):
+        jarvis_speak(f"{item} has been removed from your {list_name} list.", "confirmation")
+    elif get_list_items(list_name):
+        jarvis_speak(f"{item} is not in your {list_name} list.", "info")
+    else:
+        jarvis_speak(f"You don't have a {list_name} list yet.", "info")
+
 def read_list(list_name):
-    list_key = f"{list_name}_list"
-    current_list = retrieve_memory(list_key)
-    if current_list:
-        try:
-            current_list = json.loads(current_list)
-            items = ', '.join(current_list["items"])
-            jarvis_speak(f"Your {list_name} list includes {items}.", "info")
-        except json.JSONDecodeError:
-            logging.error(f"Failed to parse list JSON for key={list_key}")
-            jarvis_speak(f"I encountered an issue reading your {list_name} list, sir.", "error")
+    items = get_list_items(list_name)
+    if items:
+        jarvis_speak(f"Your {list_name} list includes {', '.join(items)}.", "info")
     else:
         jarvis_speak(f"You don't have a {list_name} list yet.", "info")
 
+def describe_reminders(reminders):
+    return ', '.join([f"{item['task']} at {item['time']}" for item in reminders])
+
 def list_memories():
     all_memories = retrieve_all_memories()
-    if all_memories:
+    list_names = get_list_names()
+    reminders = get_pending_reminders()
+    if all_memories or list_names or reminders:
         response = "I have stored: "
         for key, value in all_memories.items():
             try:
                 data = json.loads(value)
                 if data["type"] == "simple":
                     response += f"{key.replace('my', 'your')} is {data['value']}, "
-                elif data["type"] == "list":
-                    items = ', '.join(data["items"])
-                    response += f"your {key.replace('_list', '')} list includes {items}, "
-                elif data["type"] == "reminders":
-                    items = ', '.join([f"{item['task']} at {item['time']}" for item in data["items"]])
-                    response += f"your reminders include {items}, "
             except json.JSONDecodeError:
                 logging.error(f"Failed to parse memory JSON for key={key}")
                 continue
+        for list_name in list_names:
+            response += f"your {list_name} list includes {', '.join(get_list_items(list_name))}, "
+        if reminders:
+            response += f"your reminders include {describe_reminders(reminders)}, "
         jarvis_speak(response.rstrip(', '), "info")
     else:
         jarvis_speak("I don't have any memories stored yet.", "info")
@@ -108,14 +95,52 @@ def forget_memory(key):
     else:
         jarvis_speak(f"I don't have any memory of {key}.", "error")
 
+async def tts_self_test():
+    # Imported here so the status check, not startup, pays for edge-tts and aiohttp
+    import edge_tts
+    import tempfile
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_audio:
+        pass
+    try:
+        await edge_tts.Communicate("Test", "en-US-GuyNeural").save(temp_audio.name)
+    finally:
+        os.remove(temp_audio.name)
+
+def describe_remote_jobs():
+    running = remote_jobs.jobs(active_only=True)
+    if running:
+        names = ", ".join(job["description"] for job in running)
+        return f"{len(running)} remote command{'s' if len(running) != 1 else ''} in progress: {names}."
+    recent = remote_jobs.jobs()
+    if recent:
+        last = recent[-1]
+        outcome = {"done": "finished", "timeout": "timed out"}.get(last["status"], last["status"])
+        return f"No remote commands running. The last one, {last['description']}, {outcome}."
+    return "No remote commands running."
+
+def check_network():
+    import socket
+    socket.create_connection(("www.google.com", 80), timeout=5).close()
+
 def check_system_status(phi2_service=None):
     status = []
     issues = []
 
+    # The network-bound checks run concurrently on the event loop while the local ones proceed
+    tts_check = event_loop.submit(tts_self_test())
+    network_check = event_loop.submit(event_loop.to_thread(check_network))
+    phi2_check = None
+    if phi2_service:
+        phi2_check = event_loop.submit(phi2_service.generate_async("Test prompt", max_length=10, use_cache=False))
+
     # Check audio input (microphone)
     try:
         mic_list = get_available_microphones()
-        if mic_list:
+        stream = active_microphone_stream()
+        if stream is not None and stream.stats()["running"]:
+            # The capture stream already holds the device open
+            status.append("Audio input is operational.")
+        elif mic_list:
             mic = sr.Microphone()
             with mic as source:
                 recognizer.adjust_for_ambient_noise(source, duration=0.5)
@@ -128,18 +153,18 @@ def check_system_status(phi2_service=None):
 
     # Check audio output (TTS)
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_audio:
-            communicate = edge_tts.Communicate("Test", "en-US-GuyNeural")
-            asyncio.run(communicate.save(temp_audio.name))
-            os.remove(temp_audio.name)
+        tts_check.result()
         status.append("Audio output is operational.")
     except Exception as e:
         issues.append(f"Audio output failed: {str(e)}")
         logging.error(f"Audio output check failed: {str(e)}")
+    cache_stats = tts_cache.stats()
+    status.append(f"Speech cache hit rate is {cache_stats['hit_rate']:.0%}, "
+                  f"saving {cache_stats['bytes_saved'] // 1024} kilobytes of synthesis.")
 
     # Check network connectivity
     try:
-        socket.create_connection(("www.google.com", 80), timeout=5)
+        network_check.result()
         status.append("Network connectivity is established.")
     except OSError as e:
         issues.append(f"Network connectivity failed: {str(e)}")
@@ -147,10 +172,7 @@ def check_system_status(phi2_service=None):
 
     # Check database
     try:
-        conn = sqlite3.connect('jarvis_memory.db')
-        c = conn.cursor()
-        c.execute("SELECT 1")
-        conn.close()
+        memory_store.query_one("SELECT 1")
         status.append("Database is operational.")
     except sqlite3.Error as e:
         issues.append(f"Database failed: {str(e)}")
@@ -168,8 +190,8 @@ def check_system_status(phi2_service=None):
 
     # Check Phi-2 model
     try:
-        if phi2_service:
-            for sentence in phi2_service.generate_response("Test prompt", max_length=10):
+        if phi2_check:
+            for sentence in phi2_check.result():
                 if "Error" not in sentence:
                     status.append("Phi-2 language model is operational.")
                     break
@@ -181,6 +203,12 @@ def check_system_status(phi2_service=None):
         issues.append(f"Phi-2 model failed: {str(e)}")
         logging.error(f"Phi-2 model check failed: {str(e)}")
 
+    status.append(describe_remote_jobs())
+    compaction = last_report()
+    if compaction:
+        status.append(f"Last memory compaction removed {compaction['conversation_rows'] + compaction['reminder_rows']} "
+                      f"old records and reclaimed {compaction['bytes_reclaimed'] // 1024} kilobytes.")
+
     # Format response
     response = "System status report:\n"
     if status:
@@ -192,99 +220,176 @@ def check_system_status(phi2_service=None):
     
     return response
 
-def process_command(command, phi2_service=None):
-    #context = check_context(command)
-    #if context:
-    #    jarvis_speak(context, "info")
+LLM_PERSONA_PROMPT = "You are JARVIS, an AI assistant inspired by Iron Man. Respond to the following command or question concisely, in a helpful and witty tone: {command}"
 
-    if "open youtube" in command or "launch youtube" in command:
-        jarvis_speak("Accessing YouTube", "confirmation")
-        run_remote_command("xdg-open 'https://www.youtube.com'", MAIN_PC_USER, MAIN_PC_IP)
+def persona_response(phi2_service, command):
+    if CONTEXT_ENABLED:
+        prompt, cache_key = context_assembler.build_prompt(LLM_PERSONA_PROMPT, command)
+        return phi2_service.generate_response(prompt, cache_key=cache_key)
+    return phi2_service.generate_response(LLM_PERSONA_PROMPT.format(command=command))
 
-    elif "open google" in command or "launch google" in command:
-        jarvis_speak("Opening Google search interface", "confirmation")
-        run_remote_command("xdg-open 'https://www.google.com'", MAIN_PC_USER, MAIN_PC_IP)
+# Commands with an explicit template ("remind me to X at Y") outrank the single-word triggers
+# ("time", "date", "weather", "find") that would otherwise swallow them.
+TEMPLATE_PRIORITY = 10
 
-    elif "search for" in command or "look up" in command or "find" in command:
-        query = command.replace("search for", "").replace("look up", "").replace("find", "").strip()
-        if query:
-            jarvis_speak(f"Searching for {query}", "confirmation")
-            run_remote_command(f"xdg-open 'https://www.google.com/search?q={query}'", MAIN_PC_USER, MAIN_PC_IP)
-        else:
-            jarvis_speak("What would you like me to search for, sir?", "info")
-
-    elif "what time is it" in command or "current time" in command or "time" in command:
-        current_time = datetime.datetime.now().strftime("%I:%M %p")
-        jarvis_speak(f"The current time is {current_time}, sir.", "info")
-
-    elif "what's the date" in command or "current date" in command or "date" in command:
-        current_date = datetime.datetime.now().strftime("%A, %B %d, %Y")
-        jarvis_speak(f"Today is {current_date}, sir.", "info")
-
-    elif "open notepad" in command or "text editor" in command or "open editor" in command:
-        jarvis_speak("Launching text editor", "confirmation")
-        if run_remote_command("which gedit", MAIN_PC_USER, MAIN_PC_IP):
-            run_remote_command("gedit &", MAIN_PC_USER, MAIN_PC_IP)
-        elif run_remote_command("which nano", MAIN_PC_USER, MAIN_PC_IP):
-            run_remote_command("gnome-terminal -- nano &", MAIN_PC_USER, MAIN_PC_IP)
-        else:
-            jarvis_speak("I'm unable to locate a text editor on your main PC, sir.", "error")
-
-    elif "open calculator" in command or "calculator" in command:
-        jarvis_speak("Opening calculator", "confirmation")
-        if run_remote_command("which gnome-calculator", MAIN_PC_USER, MAIN_PC_IP):
-            run_remote_command("gnome-calculator &", MAIN_PC_USER, MAIN_PC_IP)
-        elif run_remote_command("which kcalc", MAIN_PC_USER, MAIN_PC_IP):
-            run_remote_command("kcalc &", MAIN_PC_USER, MAIN_PC_IP)
-        else:
-            jarvis_speak("Calculator application not found on main PC, sir.", "error")
-
-    elif "weather" in command:
-        city = ""
-        if "in" in command:
-            city = command.split("in")[-1].strip()
-        elif "for" in command:
-            city = command.split("for")[-1].strip()
-        if not city:
-            city = get_preference("weather_city") or "Heraklion"
-        weather_info = get_weather(city)
-        jarvis_speak(weather_info, "warning")
-
-    elif "set my preferred" in command:
-        parts = command.split("set my preferred")[1].split("to")
-        if len(parts) == 2:
-            key = parts[0].strip()
-            value = parts[1].strip()
-            set_preference(key, value)
-        else:
-            jarvis_speak("Please specify a preference and value, sir.", "error")
-
-    elif "system shutdown" in command or "shutdown computer" in command:
-        jarvis_speak("Initiating system shutdown sequence, sir.", "info")
-        time.sleep(2)
-        run_remote_command("gnome-terminal -- poweroff", MAIN_PC_USER, MAIN_PC_IP)
-
-    elif "restart system" in command or "restart computer" in command:
-        jarvis_speak("Initiating system restart sequence, sir.", "info")
-        time.sleep(2)
-        run_remote_command("gnome-terminal -- bash -c 'reboot; exec bash'", MAIN_PC_USER, MAIN_PC_IP)
-
-    elif "power down" in command or "shut down jarvis" in command:
-        jarvis_speak("Powering down all systems. Goodbye, sir.", "info")
-        logging.info("JARVIS shutting down")
-        sys.exit()
-
-    elif "exit" in command or "quit" in command:
-        jarvis_speak("Going offline, sir. Have a good day.", "info")
-        logging.info("JARVIS exiting")
-        sys.exit()
-
-    elif "status report" in command or "system status" in command:
-        status_report = check_system_status()
-        jarvis_speak(status_report, "info")
-
-    elif "help" in command or "what can you do" in command:
-        help_text = """I can assist with:
+
+@router.intent("remind_me", phrases=["remind me to"], priority=TEMPLATE_PRIORITY,
+               slots=r"remind me to\s+(?P<task>.+?)\s+at\s+(?P<time>\S+)\s*$")
+def handle_remind_me(command, slots, phi2_service):
+    if slots:
+        add_reminder(slots["task"], slots["time"])
+    else:
+        jarvis_speak("Please specify a task and time, sir.", "error")
+
+@router.intent("remember_that", phrases=["remember that"], priority=TEMPLATE_PRIORITY,
+               slots=r"remember that\s+(?P<key>.+?)\s+is\s+(?P<value>.+)$")
+def handle_remember_that(command, slots, phi2_service):
+    if not slots:
+        jarvis_speak("I'm not sure what to remember, sir.", "error")
+        return
+    key = slots["key"]
+    value = slots["value"]
+    data = {"type": "simple", "value": value, "timestamp": datetime.datetime.now().isoformat()}
+    try:
+        existing = retrieve_memory_json(key)
+        if existing:
+            old_value = existing["value"]
+            jarvis_speak(f"Updating {key} from {old_value} to {value}.", "info")
+    except json.JSONDecodeError:
+        logging.error(f"Failed to parse existing memory JSON for key={key}")
+    store_memory(key, json.dumps(data))
+    jarvis_speak(f"I have remembered that {key} is {value}", "confirmation")
+
+@router.intent("set_preference", phrases=["set my preferred"], priority=TEMPLATE_PRIORITY,
+               slots=r"set my preferred\s+(?P<key>.+?)\s+to\s+(?P<value>.+)$")
+def handle_set_preference(command, slots, phi2_service):
+    if slots:
+        set_preference(slots["key"], slots["value"])
+    else:
+        jarvis_speak("Please specify a preference and value, sir.", "error")
+
+@router.intent("add_to_list", all_of=[("add", "to my")], priority=TEMPLATE_PRIORITY,
+               slots=r"add\s+(?P<item>.+?)\s+to my\s+(?P<list_name>.+?)(?:\s+list)?\s*$")
+def handle_add_to_list(command, slots, phi2_service):
+    if slots:
+        add_to_list(slots["list_name"], slots["item"])
+    else:
+        jarvis_speak("I'm not sure what to add, sir.", "error")
+
+@router.intent("remove_from_list", all_of=[("remove", "from my")], priority=TEMPLATE_PRIORITY,
+               slots=r"remove\s+(?P<item>.+?)\s+from my\s+(?P<list_name>.+?)(?:\s+list)?\s*$")
+def handle_remove_from_list(command, slots, phi2_service):
+    if slots:
+        remove_from_list(slots["list_name"], slots["item"])
+    else:
+        jarvis_speak("I'm not sure what to remove, sir.", "error")
+
+@router.intent("open_youtube", phrases=["open youtube", "launch youtube"])
+def handle_open_youtube(command, slots, phi2_service):
+    remote_jobs.run(["xdg-open", "https://www.youtube.com"], "open YouTube", background=True, failure=REMOTE_FAILED)
+    jarvis_speak("Accessing YouTube", "confirmation")
+
+@router.intent("open_google", phrases=["open google", "launch google"])
+def handle_open_google(command, slots, phi2_service):
+    remote_jobs.run(["xdg-open", "https://www.google.com"], "open Google", background=True, failure=REMOTE_FAILED)
+    jarvis_speak("Opening Google search interface", "confirmation")
+
+@router.intent("search", phrases=["search for", "look up", "find"],
+               slots=r"(?:search for|look up|find)\s*(?P<query>.*)$")
+def handle_search(command, slots, phi2_service):
+    query = slots.get("query")
+    if query:
+        # The query travels as a URL-encoded argument, never through shell quoting
+        remote_jobs.run(["xdg-open", f"https://www.google.com/search?q={quote_plus(query)}"], f"search for {query}",
+                        background=True, failure=REMOTE_FAILED)
+        jarvis_speak(f"Searching for {query}", "confirmation")
+    else:
+        jarvis_speak("What would you like me to search for, sir?", "info")
+
+@router.intent("time", phrases=["what time is it", "current time", "time"])
+def handle_time(command, slots, phi2_service):
+    current_time = datetime.datetime.now().strftime("%I:%M %p")
+    jarvis_speak(f"The current time is {current_time}, sir.", "info")
+
+@router.intent("date", phrases=["what's the date", "current date", "date"])
+def handle_date(command, slots, phi2_service):
+    current_date = datetime.datetime.now().strftime("%A, %B %d, %Y")
+    jarvis_speak(f"Today is {current_date}, sir.", "info")
+
+def launch_first_available(candidates):
+    # candidates maps program name -> command that starts it; returns None when none is installed,
+    # and a failed probe raises so the job reports the PC as unreachable rather than the program missing
+    program = find_remote_program(*candidates)
+    if program is None:
+        return None
+    return execute_remote(candidates[program], background=True)
+
+
+def not_found_or_failed(message):
+    return lambda job: message if job.error is None else REMOTE_FAILED
+
+
+@router.intent("text_editor", phrases=["open notepad", "text editor", "open editor"])
+def handle_text_editor(command, slots, phi2_service):
+    # Probe and launch run as one background job while the confirmation is spoken
+    remote_jobs.submit("open text editor", launch_first_available,
+                       {"gedit": ["gedit"], "nano": ["gnome-terminal", "--", "nano"]},
+                       failure=not_found_or_failed("I'm unable to locate a text editor on your main PC, sir."))
+    jarvis_speak("Launching text editor", "confirmation")
+
+@router.intent("calculator", phrases=["open calculator", "calculator"])
+def handle_calculator(command, slots, phi2_service):
+    remote_jobs.submit("open calculator", launch_first_available,
+                       {"gnome-calculator": ["gnome-calculator"], "kcalc": ["kcalc"]},
+                       failure=not_found_or_failed("Calculator application not found on main PC, sir."))
+    jarvis_speak("Opening calculator", "confirmation")
+
+@router.intent("weather", phrases=["weather"],
+               slots=r"weather\b.*?\b(?:in|for)\s+(?P<city>.+?)\s*$")
+def handle_weather(command, slots, phi2_service):
+    city = slots.get("city") or get_preference("weather_city") or "Heraklion"
+    weather_info = get_weather(city)
+    jarvis_speak(weather_info, "warning")
+
+@router.intent("shutdown_computer", phrases=["system shutdown", "shutdown computer"])
+def handle_shutdown_computer(command, slots, phi2_service):
+    jarvis_speak("Initiating system shutdown sequence, sir.", "info")
+    remote_jobs.run(["gnome-terminal", "--", "poweroff"], "shut down main PC", failure=REMOTE_FAILED)
+
+@router.intent("restart_computer", phrases=["restart system", "restart computer"])
+def handle_restart_computer(command, slots, phi2_service):
+    jarvis_speak("Initiating system restart sequence, sir.", "info")
+    remote_jobs.run(["gnome-terminal", "--", "bash", "-c", "reboot; exec bash"], "restart main PC",
+                    failure=REMOTE_FAILED)
+
+@router.intent("power_down", phrases=["power down", "shut down jarvis"])
+def handle_power_down(command, slots, phi2_service):
+    jarvis_speak("Powering down all systems. Goodbye, sir.", "info")
+    logging.info("JARVIS shutting down")
+    remote_jobs.wait_idle(timeout=5)
+    flush_conversations()
+    sys.exit()
+
+@router.intent("exit", phrases=["exit", "quit"])
+def handle_exit(command, slots, phi2_service):
+    jarvis_speak("Going offline, sir. Have a good day.", "info")
+    logging.info("JARVIS exiting")
+    remote_jobs.wait_idle(timeout=5)
+    flush_conversations()
+    sys.exit()
+
+@router.intent("status_report", phrases=["status report", "system status"])
+def handle_status_report(command, slots, phi2_service):
+    status_report = check_system_status()
+    jarvis_speak(status_report, "info")
+
+@router.intent("remote_jobs", phrases=["remote jobs", "what are you running"])
+def handle_remote_jobs(command, slots, phi2_service):
+    jarvis_speak(describe_remote_jobs(), "info")
+
+@router.intent("help", phrases=["help", "what can you do"])
+def handle_help(command, slots, phi2_service):
+    help_text = """I can assist with:
         - Launching YouTube, Google, calculator, text editors
         - Internet searches
         - Time and date
@@ -297,158 +402,175 @@ def process_command(command, phi2_service=None):
         - Viewing conversation history (e.g., 'what did we talk about')
         - Setting preferences (e.g., 'set my preferred weather city to New York')
         - System status report (e.g., 'status report')
+        - Searching our past conversations (e.g., 'what did we say about the weather')
         - Answering questions or reasoning (e.g., 'why is the sky blue')
         - Generating code (e.g., 'write a Python function to sort a list')
         - Say 'exit' to terminate"""
-        jarvis_speak("Here are my capabilities, sir:", "info")
-        print(help_text)
+    jarvis_speak("Here are my capabilities, sir:", "info")
+    print(help_text)
 
-    elif "thank you" in command or "thanks" in command:
-        responses = ["You're welcome, sir.", "My pleasure, sir.", "Always happy to help, sir.", "At your service, sir."]
-        jarvis_speak(random.choice(responses), "info")
+@router.intent("thanks", phrases=["thank you", "thanks"])
+def handle_thanks(command, slots, phi2_service):
+    responses = ["You're welcome, sir.", "My pleasure, sir.", "Always happy to help, sir.", "At your service, sir."]
+    jarvis_speak(random.choice(responses), "info")
 
-    elif "good morning" in command:
+def speak_briefing_body():
+    try:
+        speech_pipeline.put(compose_briefing(greeting=False))
+    except Exception as e:
+        logging.error(f"Morning briefing failed: {e}")
+
+@router.intent("good_morning", phrases=["good morning"])
+def handle_good_morning(command, slots, phi2_service):
+    briefing = take_briefing()
+    if briefing:
+        # Precomputed by the scheduler; its audio is already in the TTS cache
+        jarvis_speak(briefing["text"], "info")
+    elif BRIEFING_ENABLED:
+        # Nothing precomputed: greet at once, the rest follows through the speech queue once the
+        # weather has been fetched
+        jarvis_speak("Good morning, sir.", "info")
+        event_loop.submit(event_loop.to_thread(speak_briefing_body))
+    else:
         jarvis_speak("Good morning, sir. How may I assist you today?", "info")
-        history = get_conversation_history(limit=20)
-        weather_count = sum(1 for h in history if h["command"] and "weather" in h["command"])
-        if weather_count > 3:
-            city = get_preference("weather_city") or "Heraklion"
-            jarvis_speak(f"Would you like the weather for {city}?", "info")
-
-    elif "good evening" in command:
-        jarvis_speak("Good evening, sir. What can I do for you?", "info")
-
-    elif "good night" in command:
-        jarvis_speak("Good night, sir. Rest well.", "info")
-
-    elif "what did we talk about" in command:
-        history = get_conversation_history()
-        if history:
-            response = "Our recent conversations include: "
-            for entry in history:
-                if entry["command"]:
-                    response += f"You said '{entry['command']}' and I responded '{entry['response']}' on {entry['timestamp'].split('T')[0]}, "
-            jarvis_speak(response.rstrip(', '), "info")
-        else:
-            jarvis_speak("We haven't had any conversations stored yet, sir.", "info")
-
-    elif "remember that" in command:
-        parts = command.split("remember that")[1].split("is")
-        if len(parts) == 2:
-            key = parts[0].strip()
-            value = parts[1].strip()
-            existing = retrieve_memory(key)
-            data = {"type": "simple", "value": value, "timestamp": datetime.datetime.now().isoformat()}
-            if existing:
-                try:
-                    old_value = json.loads(existing)["value"]
-                    jarvis_speak(f"Updating {key} from {old_value} to {value}.", "info")
-                except json.JSONDecodeError:
-                    logging.error(f"Failed to parse existing memory JSON for key={key}")
-            store_memory(key, json.dumps(data))
-            jarvis_speak(f"I have remembered that {key} is {value}", "confirmation")
-        else:
-            jarvis_speak("I'm not sure what to remember, sir.", "error")
 
-    elif command.startswith("what is") or command.startswith("tell me about"):
-        key = command.replace("what is", "").replace("tell me about", "").strip()
-        data = retrieve_memory(key)
-        if data:
-            try:
-                data = json.loads(data)
-                if data["type"] == "simple":
-                    response_key = key.replace("my", "your")
-                    jarvis_speak(f"You mentioned on {data['timestamp'].split('T')[0]} that {response_key} is {data['value']}.", "info")
-                elif data["type"] == "list":
-                    items = ', '.join(data["items"])
-                    jarvis_speak(f"Your {key.replace('_list', '')} list includes {items}.", "info")
-                elif data["type"] == "reminders":
-                    items = ', '.join([f"{item['task']} at {item['time']}" for item in data["items"]])
-                    jarvis_speak(f"Your reminders include {items}.", "info")
-            except json.JSONDecodeError:
-                logging.error(f"Failed to parse memory JSON for key={key}")
-                jarvis_speak(f"I encountered an issue reading {key}, sir.", "error")
+@router.intent("good_evening", phrases=["good evening"])
+def handle_good_evening(command, slots, phi2_service):
+    jarvis_speak("Good evening, sir. What can I do for you?", "info")
+
+@router.intent("good_night", phrases=["good night"])
+def handle_good_night(command, slots, phi2_service):
+    jarvis_speak("Good night, sir. Rest well.", "info")
+
+SEARCH_PAGE_SIZE = 3
+# Commands of the search intents; their exchanges would only repeat earlier results
+SEARCH_COMMAND_PHRASES = ("what did we say about", "more results", "next results")
+# The last conversation search, so "more results" can continue from where it stopped
+last_search = {"topic": None, "offset": 0}
+
+def speak_search_page(topic, offset):
+    results, has_more = search_conversation(topic, limit=SEARCH_PAGE_SIZE, offset=offset,
+                                            exclude_phrases=SEARCH_COMMAND_PHRASES)
+    last_search.update(topic=topic, offset=offset + len(results) if has_more else None)
+    if not results:
+        if offset:
+            jarvis_speak(f"That's everything we said about {topic}, sir.", "info")
         else:
-            if phi2_service:
-                prompt = f"You are JARVIS, an AI assistant inspired by Iron Man. Respond to the following command or question concisely, in a helpful and witty tone: {command}"
-                for sentence in phi2_service.generate_response(prompt):
-                    speech_queue.put(sentence)
-            else:
-                jarvis_speak("Phi-2 service is unavailable, sir.", "error")
-
-    elif "add" in command and "to my" in command:
-        parts = command.split("to my")
-        if len(parts) == 2:
-            item = parts[0].replace("add", "").strip()
-            list_name = parts[1].strip().replace(" list", "")
-            add_to_list(list_name, item)
-        else:
-            jarvis_speak("I'm not sure what to add, sir.", "error")
-
-    elif "remove" in command and "from my" in command:
-        parts = command.split("from my")
-        if len(parts) == 2:
-            item = parts[0].replace("remove", "").strip()
-            list_name = parts[1].strip().replace(" list", "")
-            list_key = f"{list_name}_list"
-            current_list = retrieve_memory(list_key)
-            if current_list:
-                try:
-                    current_list = json.loads(current_list)
-                    if item in current_list["items"]:
-                        current_list["items"].remove(item)
-                        store_memory(list_key, json.dumps(current_list))
-                        jarvis_speak(f"{item} has been removed from your {list_name} list.", "confirmation")
-                    else:
-                        jarvis_speak(f"{item} is not in your {list_name} list.", "info")
-                except json.JSONDecodeError:
-                    logging.error(f"Failed to parse list JSON for key={list_key}")
-                    jarvis_speak(f"I encountered an issue with your {list_name} list, sir.", "error")
-            else:
-                jarvis_speak(f"You don't have a {list_name} list yet.", "info")
-
-    elif command.startswith("what's on my"):
-        list_name = command.split("what's on my")[1].strip().replace(" list", "")
-        read_list(list_name)
-
-    elif "remind me to" in command:
-        parts = command.split(" at ")
-        if len(parts) == 2:
-            task = parts[0].replace("remind me to", "").strip()
-            time_str = parts[1].strip()
-            add_reminder(task, time_str)
-        else:
-            jarvis_speak("Please specify a task and time, sir.", "error")
-
-    elif "what do you know about me" in command:
-        list_memories()
-
-    elif "forget" in command:
-        key = command.replace("forget", "").strip()
-        forget_memory(key)
-
-    elif command.startswith("write a") or command.startswith("generate a") or command.startswith("code for"):
-        if phi2_service:
-            prompt = f"Generate Python code for the following request: {command}"
-            jarvis_speak("Here is the generated code, sir:", "info")
-            for sentence in phi2_service.generate_response(prompt, max_length=500):
-                speech_queue.put(sentence)
-                print(sentence)
-            jarvis_speak("The code has been printed to the console for your review.", "info")
-        else:
-            jarvis_speak("Phi-2 service is unavailable, sir.", "error")
+            jarvis_speak(f"I don't recall us discussing {topic}, sir.", "info")
+        return
+    lines = []
+    for r in results:
+        said = [f"you said '{r['command']}'"] if r["command"] else []
+        said += [f"I mentioned '{r['snippet']}'"] if r["snippet"] else []
+        lines.append(f"On {r['timestamp'].split('T')[0]} {' and '.join(said)}.")
+    if has_more:
+        lines.append("Say 'more results' to hear more.")
+    jarvis_speak(" ".join(lines), "info")
+
+@router.intent("search_conversation", phrases=["what did we say about"], priority=TEMPLATE_PRIORITY,
+               slots=r"what did we say about\s+(?P<topic>.+?)\s*\??$")
+def handle_search_conversation(command, slots, phi2_service):
+    if slots.get("topic"):
+        speak_search_page(slots["topic"], 0)
+    else:
+        jarvis_speak("What topic should I look for, sir?", "info")
 
+@router.intent("more_results", phrases=["more results", "next results"])
+def handle_more_results(command, slots, phi2_service):
+    if last_search["topic"] and last_search["offset"] is not None:
+        speak_search_page(last_search["topic"], last_search["offset"])
     else:
-        if phi2_service:
-            prompt = f"You are JARVIS, an AI assistant inspired by Iron Man. Respond to the following command or question concisely, in a helpful and witty tone: {command}"
-            for sentence in phi2_service.generate_response(prompt):
-                speech_queue.put(sentence)
-        else:
-            responses = [
-                "I'm not sure I understand that command, sir.",
-                "Could you please rephrase that, sir?",
-                "I don't have that capability currently, sir.",
-                "I'm afraid I cannot process that request, sir."
-            ]
-            jarvis_speak(random.choice(responses), "error")
-            jarvis_speak("Say 'help' for available commands.", "info")
+        jarvis_speak("There are no more results, sir.", "info")
+
+@router.intent("conversation_history", phrases=["what did we talk about"])
+def handle_conversation_history(command, slots, phi2_service):
+    history = get_conversation_history()
+    if history:
+        response = "Our recent conversations include: "
+        for entry in history:
+            if entry["command"]:
+                response += f"You said '{entry['command']}' and I responded '{entry['response']}' on {entry['timestamp'].split('T')[0]}, "
+        jarvis_speak(response.rstrip(', '), "info")
+    else:
+        jarvis_speak("We haven't had any conversations stored yet, sir.", "info")
+
+@router.intent("what_is", prefixes=["what is", "tell me about"],
+               slots=r"^(?:what is|tell me about)\s*(?P<key>.*)$")
+def handle_what_is(command, slots, phi2_service):
+    key = slots.get("key", "")
+    try:
+        data = retrieve_memory_json(key)
+    except json.JSONDecodeError:
+        logging.error(f"Failed to parse memory JSON for key={key}")
+        jarvis_speak(f"I encountered an issue reading {key}, sir.", "error")
+        return
+    if data:
+        if data["type"] == "simple":
+            response_key = key.replace("my", "your")
+            jarvis_speak(f"You mentioned on {data['timestamp'].split('T')[0]} that {response_key} is {data['value']}.", "info")
+    elif key.endswith("_list") and get_list_items(key.replace("_list", "")):
+        read_list(key.replace("_list", ""))
+    elif key == "reminders" and get_pending_reminders():
+        jarvis_speak(f"Your reminders include {describe_reminders(get_pending_reminders())}.", "info")
+    elif phi2_service:
+        for sentence in persona_response(phi2_service, command):
+            speech_pipeline.put(sentence)
+    else:
+        jarvis_speak("Phi-2 service is unavailable, sir.", "error")
+
+@router.intent("read_list", prefixes=["what's on my"],
+               slots=r"^what's on my\s*(?P<list_name>.*?)(?:\s+list)?\s*$")
+def handle_read_list(command, slots, phi2_service):
+    read_list(slots.get("list_name", ""))
+
+@router.intent("list_memories", phrases=["what do you know about me"])
+def handle_list_memories(command, slots, phi2_service):
+    list_memories()
+
+@router.intent("forget", phrases=["forget"], slots=r"forget\s*(?P<key>.*)$")
+def handle_forget(command, slots, phi2_service):
+    forget_memory(slots.get("key", ""))
+
+@router.intent("generate_code", prefixes=["write a", "generate a", "code for"])
+def handle_generate_code(command, slots, phi2_service):
+    if phi2_service:
+        prompt = f"Generate Python code for the following request: {command}"
+        jarvis_speak("Here is the generated code, sir:", "info")
+        for sentence in phi2_service.generate_response(prompt, max_length=500):
+            speech_pipeline.put(sentence)
+            print(sentence)
+        speech_pipeline.put("The code has been printed to the console for your review.")
+    else:
+        jarvis_speak("Phi-2 service is unavailable, sir.", "error")
+
+@router.default
+def handle_unknown(command, slots, phi2_service):
+    if phi2_service:
+        for sentence in persona_response(phi2_service, command):
+            speech_pipeline.put(sentence)
+    else:
+        responses = [
+            "I'm not sure I understand that command, sir.",
+            "Could you please rephrase that, sir?",
+            "I don't have that capability currently, sir.",
+            "I'm afraid I cannot process that request, sir."
+        ]
+        jarvis_speak(random.choice(responses), "error")
+        jarvis_speak("Say 'help' for available commands.", "info")
+
+router.compile()
+
+
+def process_command(command, phi2_service=None):
+    #context = check_context(command)
+    #if context:
+    #    jarvis_speak(context, "info")
+    # A summary being generated gives way to the command, which would otherwise queue behind it in Ollama
+    context_assembler.command_started()
+    try:
+        router.dispatch(command, phi2_service)
+    finally:
+        context_assembler.command_finished()
+    if CONTEXT_ENABLED:
+        # Folds older turns into the summary while JARVIS waits for the next wake word
+        context_assembler.schedule_refresh(phi2_service)
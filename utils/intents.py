@@ -0,0 +1,152 @@
+import re
+import logging
+
+
+class Intent:
+    def __init__(self, name, handler, clauses, slots, priority, order):
+        self.name = name
+        self.handler = handler
+        # Each clause is a tuple of (phrase, anchored) requirements that must all hold
+        self.clauses = clauses
+        self.slots = re.compile(slots) if isinstance(slots, str) else slots
+        self.priority = priority
+        self.order = order
+
+    def extract(self, text):
+        if self.slots is None:
+            return {}
+        match = self.slots.search(text)
+        if not match:
+            return {}
+        return {k: v.strip() for k, v in match.groupdict().items() if v is not None}
+
+
+def trie_pattern(phrases):
+    # One alternation per shared prefix ("open (?:youtube|google|...)") instead of one per phrase,
+    # so a failed position costs one character test, not one per phrase. Longer continuations are
+    # tried before a phrase ends, which keeps the leftmost-longest match of a length-sorted alternation.
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node):
+        alternatives = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not alternatives:
+            return ""
+        body = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+        return f"(?:{body})?" if "" in node else body
+    return emit(trie)
+
+
+class IntentRouter:
+    """Routes a command to the best registered intent with one combined-regex pass over the text.
+
+    Intents are ranked by priority (higher first) and then by registration order. The
+    phrases a pass finds are resolved once into a ranked list of intents with the prefixes
+    and overlapping phrases each still needs, cached by phrase combination, so a repeat
+    costs one dict lookup.
+    """
+
+    # Distinct phrase combinations are few; the cache is only cleared if commands are adversarial
+    MAX_RESOLVED = 4096
+
+    def __init__(self):
+        self.intents = []
+        self._pattern = None
+        self._expansions = {}
+        self._hidden = {}
+        self._ranked = []
+        self._resolved = {}
+        self.fallback = None
+
+    def intent(self, name, phrases=(), prefixes=(), all_of=(), slots=None, priority=0):
+        clauses = [((phrase, False),) for phrase in phrases]
+        clauses += [((phrase, True),) for phrase in prefixes]
+        clauses += [tuple((phrase, False) for phrase in group) for group in all_of]
+
+        def register(handler):
+            self.intents.append(Intent(name, handler, clauses, slots, priority, len(self.intents)))
+            self._pattern = None
+            return handler
+        return register
+
+    def default(self, handler):
+        self.fallback = handler
+        return handler
+
+    def compile(self):
+        phrases = {phrase for intent in self.intents for clause in intent.clauses for phrase, _ in clause}
+        ordered = sorted(phrases, key=len, reverse=True)
+        self._pattern = re.compile(trie_pattern(ordered))
+        # A match implies every trigger phrase it contains
+        self._expansions = {p: frozenset(q for q in phrases if q in p) for p in ordered}
+        # Leftmost-longest scanning skips phrases that start inside a match and run past its end;
+        # those are the only ones that need a separate substring check, done only for the
+        # intents that depend on them
+        hidden = {p: tuple(q for q in ordered if any(p.endswith(q[:k]) for k in range(1, min(len(p), len(q)))))
+                  for p in ordered}
+        self._hidden = {p: qs for p, qs in hidden.items() if qs}
+        self._ranked = sorted(self.intents, key=lambda i: (-i.priority, i.order))
+        self._resolved = {}
+        logging.info(f"Intent router compiled: {len(self.intents)} intents, {len(phrases)} trigger phrases")
+
+    def _resolve(self, key):
+        # Ranked (intent, prefix, needs) triples whose phrases were all found or may be hidden
+        # by an overlap, `needs` being the latter; the first triple needing nothing ends the list,
+        # as nothing ranked below it can win
+        hits = set()
+        for phrase in key:
+            hits.update(self._expansions[phrase])
+        maybe = set()
+        for phrase in key:
+            for hidden in self._hidden.get(phrase, ()):
+                maybe.update(self._expansions[hidden])
+        maybe -= hits
+        resolved = []
+        for intent in self._ranked:
+            for clause in intent.clauses:
+                if not all(phrase in hits or phrase in maybe for phrase, _ in clause):
+                    continue
+                # Every prefix holds exactly when the longest does, if the others are prefixes of it
+                prefix = max((phrase for phrase, anchored in clause if anchored), key=len, default="")
+                if not all(prefix.startswith(phrase) for phrase, anchored in clause if anchored):
+                    continue
+                needs = tuple(phrase for phrase, _ in clause if phrase in maybe)
+                resolved.append((intent, prefix, needs))
+                if not prefix and not needs:
+                    break
+            if resolved and not (resolved[-1][1] or resolved[-1][2]):
+                break
+        if len(self._resolved) >= self.MAX_RESOLVED:
+            self._resolved.clear()
+        self._resolved[key] = resolved
+        return resolved
+
+    def match(self, text):
+        if self._pattern is None:
+            self.compile()
+        key = tuple(self._pattern.findall(text))
+        if not key:
+            return None, {}
+        resolved = self._resolved.get(key)
+        if resolved is None:
+            resolved = self._resolve(key)
+        for intent, prefix, needs in resolved:
+            if needs and not all(map(text.__contains__, needs)):
+                continue
+            if prefix and not text.startswith(prefix):
+                continue
+            return intent, intent.extract(text)
+        return None, {}
+
+    def dispatch(self, text, *args):
+        intent, slots = self.match(text)
+        if intent is None:
+            if self.fallback is not None:
+                return self.fallback(text, {}, *args)
+            return None
+        logging.info(f"Routed command to intent {intent.name}: {slots}")
+        return intent.handler(text, slots, *args)